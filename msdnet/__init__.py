@@ -1 +1,2 @@
 from msdnet.msdn import MSDNet
+from msdnet.ensemble import Ensemble
\ No newline at end of file
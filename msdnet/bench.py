@@ -0,0 +1,306 @@
+"""
+
+Headless performance benchmarks of the hot paths (no pygame window)
+
+usage: python -m msdnet.bench [--sizes 10,100,1000,10000,100000] [--shapes string,circle,cloth] [--paths 16,64,256,1024,4096]
+                              [--backend numpy] [--min-time 0.2] [--out bench.json] [--compare previous.json] [--tolerance 0.25]
+                              [--reorder 160000]
+
+benchmarks:
+
+    build/<shape>/<size>  -> network construction and compile time (sec)
+    memory/<shape>/<size> -> peak memory of the construction (tracemalloc, bytes)
+    step/<shape>/<size>   -> physics steps/sec (MSDNet.run_steps)
+    scan/<path length>    -> Scanner.scan calls/sec
+    hammer/<path length>  -> Hammer.apply_hammer_force calls/sec
+    synth/<path length>   -> Synth.next_block audio samples/sec (and real-time factor at 48 kHz, rate 500)
+    reorder/<layout>/<method>/<size> -> cloth steps/sec in the generated ("built") or a random ("scrambled") mass order,
+                             as is ("none") or renumbered with MSDNet.reorder ("rcm", "morton"), with the mean distance
+                             in memory between the masses of a spring (only with --reorder, sizes of 100k+ masses show the cache effects)
+
+Cloth sizes are rounded to levels x levels·n masses (the number of masses must be a multiple of the levels).
+The results are written as JSON together with the commit, python, numpy and platform versions, so that two commits
+can be compared: --compare prints the change of each benchmark against a previous result and exits with status 1
+if any of them got worse than tolerance (rates lower, times and memory higher).
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from msdnet.render import build_network
+from msdnet.ordering import METHODS, bandwidth
+from msdnet_tools.scanner import Scanner
+from msdnet_tools.hammer import Hammer
+from msdnet_tools.synth import Synth
+
+
+PARAMS = {"origin": [0, 0.5], "scale": [1, 0.5], "g": [0, 0, 0], "dt": 1, "m": 50, "d": 0.999, "k": 30, "c": 1, "r": 5}
+
+
+def describe(shape: str, size: int) -> dict:
+
+    """
+    network description of a benchmark (see msdnet.render.build_network)
+
+    shape: str, ["string", "circle", "cloth"]
+    size: int, number of masses (approximate for cloth)
+
+    return: dict
+    """
+
+    if shape == "cloth":
+        levels = max(1, math.isqrt(size))
+        return PARAMS | {"shape": shape, "levels": levels, "n_masses": levels * max(1, round(size/levels**2))}
+    anchored = [1, size] if shape == "string" else []
+    return PARAMS | {"shape": shape, "n_masses": size, "anchored_mass": anchored}
+
+
+def measure(call, min_time: float) -> tuple[int, float]:
+
+    """
+    run call(n) with n = 1, 2, 4... until min_time has elapsed
+
+    call: callable, n -> runs n units of work
+    min_time: float, minimum measured time in sec
+
+    return: units, elapsed time
+    """
+
+    units, n = 0, 1
+    start = time.perf_counter()
+    while True:
+        call(n)
+        units += n
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return units, elapsed
+        n *= 2
+
+
+def result(name: str, value: float, unit: str, better: str, **extra) -> dict:
+    return {"name": name, "value": value, "unit": unit, "better": better} | extra
+
+
+def bench_build(shape: str, size: int, min_time: float) -> list[dict]:
+
+    description = describe(shape=shape, size=size)
+    n = len(build_network(description=description).masses)
+
+    def call(count: int) -> None:
+        for _ in range(count):
+            build_network(description=description).compile()
+
+    builds, elapsed = measure(call=call, min_time=min_time)
+
+    tracemalloc.start()
+    net = build_network(description=description)
+    net.compile()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return [
+        result(f"build/{shape}/{size}", elapsed/builds, "sec", "lower", masses=n),
+        result(f"memory/{shape}/{size}", peak, "bytes", "lower", masses=n)
+    ]
+
+
+def bench_step(shape: str, size: int, backend: str, min_time: float) -> dict:
+
+    net = build_network(description=describe(shape=shape, size=size))
+    net.add_backend(backend)
+    first = [next(iter(net.masses))]
+    call = lambda n: net.run_steps(n_steps=n, clip_pos=(0, 1), masses=first, coordinates="y")
+
+    call(1) # compile (numba) and warm up
+    steps, elapsed = measure(call=call, min_time=min_time)
+    return result(f"step/{shape}/{size}", steps/elapsed, "steps/sec", "higher", masses=len(net.masses), backend=backend)
+
+
+def bench_paths(lengths: list[int], min_time: float) -> list[dict]:
+
+    net = build_network(description=describe(shape="string", size=max(lengths)))
+    motion = net.run_network(clip_pos=(0, 1))
+    names = list(net.masses)
+    scanner = Scanner(masses=net.masses)
+    results = []
+
+    for q in lengths:
+        path = [(name, "y") for name in names[:q]]
+
+        scanner.scan(masses_motion=motion, path=path)
+        calls, elapsed = measure(call=lambda n: [scanner.scan(masses_motion=motion, path=path) for _ in range(n)], min_time=min_time)
+        results.append(result(f"scan/{q}", calls/elapsed, "calls/sec", "higher"))
+
+        hammer = Hammer()
+        hammer.create_hammer(shape="sine", mode="always_on")
+        hammer.add_hammer_path(path=path)
+        hammer.apply_hammer_force(masses=net.masses)
+        calls, elapsed = measure(call=lambda n: [hammer.apply_hammer_force(masses=net.masses) for _ in range(n)], min_time=min_time)
+        results.append(result(f"hammer/{q}", calls/elapsed, "calls/sec", "higher"))
+
+        if q > 1:
+            network = build_network(description=describe(shape="string", size=q))
+            synth = Synth(network=network, path=[(name, "y") for name in network.masses], freq=220, sr=48000, rate=500)
+            synth.next_block(block_size=4096)
+            blocks, elapsed = measure(call=lambda n: [synth.next_block(block_size=4096) for _ in range(n)], min_time=min_time)
+            rate = 4096 * blocks/elapsed
+            results.append(result(f"synth/{q}", rate, "samples/sec", "higher", realtime=rate/48000))
+
+    return results
+
+
+def bench_reorder(size: int, backend: str, min_time: float) -> list[dict]:
+
+    description = describe(shape="cloth", size=size)
+    results = []
+
+    for layout in ["built", "scrambled"]:
+        for method in ["none"] + METHODS:
+            net = build_network(description=description)
+            net.add_backend(backend)
+            if layout == "scrambled":
+                net.reorder(method=np.random.default_rng(0).permutation(len(net.masses)), edges=False)
+
+            start = time.perf_counter()
+            if method != "none":
+                net.reorder(method=method)
+            elapsed = time.perf_counter() - start
+
+            engine = net.engine
+            span = bandwidth(i=np.concatenate((engine.s1, engine.d1)), j=np.concatenate((engine.s2, engine.d2)))
+            first = [next(iter(net.masses))]
+            call = lambda n: net.run_steps(n_steps=n, clip_pos=(0, 1), masses=first, coordinates="y")
+            call(1)
+            steps, measured = measure(call=call, min_time=min_time)
+            results.append(result(
+                f"reorder/{layout}/{method}/{size}", steps/measured, "steps/sec", "higher",
+                masses=len(net.masses), backend=backend, reorder_time=elapsed, **span
+            ))
+            del net, engine
+
+    return results
+
+
+def environment() -> dict:
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(__file__)).stdout.strip()
+    except OSError:
+        commit = ""
+
+    return {
+        "commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+        "platform": platform.platform(), "machine": platform.machine(), "time": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+
+
+def run_benchmarks(sizes: list[int], shapes: list[str], lengths: list[int], backend: str = "numpy", min_time: float = 0.2, reorder: list[int]|None = None) -> dict:
+
+    """
+    run the benchmarks
+
+    sizes: list[int], network sizes (masses)
+    shapes: list[str], shapes to step -> ["string", "circle", "cloth"]
+    lengths: list[int], path lengths of scan, hammer and synth
+    backend: str, step backend (see MSDNet.add_backend)
+    min_time: float, minimum measured time of each benchmark in sec
+    reorder: list[int]|None, cloth sizes of the node reordering benchmarks (None -> skip)
+
+    return: dict -> {"environment": {...}, "results": [{"name", "value", "unit", "better", ...}, ...]}
+    """
+
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            for entry in bench_build(shape=shape, size=size, min_time=min_time) + [bench_step(shape=shape, size=size, backend=backend, min_time=min_time)]:
+                results.append(entry)
+                print(f"[INFO] {entry['name']}: {entry['value']:.6g} {entry['unit']}")
+
+    for entry in bench_paths(lengths=lengths, min_time=min_time):
+        results.append(entry)
+        print(f"[INFO] {entry['name']}: {entry['value']:.6g} {entry['unit']}")
+
+    for size in reorder or []:
+        for entry in bench_reorder(size=size, backend=backend, min_time=min_time):
+            results.append(entry)
+            print(f"[INFO] {entry['name']}: {entry['value']:.6g} {entry['unit']} (mean spring span {entry['mean']:.1f} rows)")
+
+    return {"environment": environment(), "results": results}
+
+
+def compare(current: dict, previous: dict, tolerance: float = 0.25) -> list[dict]:
+
+    """
+    change of each benchmark against a previous run
+
+    current: dict, see run_benchmarks
+    previous: dict, see run_benchmarks
+    tolerance: float, relative change that counts as a regression
+
+    return: list[dict] -> {"name", "previous", "current", "change", "regression"}
+    """
+
+    old = {entry["name"]: entry for entry in previous["results"]}
+    report = []
+    for entry in current["results"]:
+        before = old.get(entry["name"])
+        if before is None or not before["value"]:
+            continue
+        change = entry["value"]/before["value"] - 1
+        worse = -change if entry["better"] == "higher" else change
+        report.append({"name": entry["name"], "previous": before["value"], "current": entry["value"], "change": change, "regression": worse > tolerance})
+    return report
+
+
+def main(argv: list[str]|None = None) -> None:
+
+    parser = argparse.ArgumentParser(prog="python -m msdnet.bench", description="headless MSDNet benchmarks")
+    parser.add_argument("--sizes", default="10,100,1000,10000,100000")
+    parser.add_argument("--shapes", default="string,circle,cloth")
+    parser.add_argument("--paths", default="16,64,256,1024,4096")
+    parser.add_argument("--backend", default="numpy", choices=["numpy", "numba"])
+    parser.add_argument("--min-time", type=float, default=0.2)
+    parser.add_argument("--out", default="bench.json")
+    parser.add_argument("--compare", default=None)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--reorder", default="")
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    try:
+        sizes = [int(size) for size in args.sizes.split(",")]
+        lengths = [int(length) for length in args.paths.split(",")]
+        shapes = args.shapes.split(",")
+        reorder = [int(size) for size in args.reorder.split(",")] if args.reorder else []
+        assert all(size >= 2 for size in sizes) and all(length >= 1 for length in lengths)
+        assert all(shape in ["string", "circle", "cloth"] for shape in shapes) and all(size >= 2 for size in reorder)
+    except:
+        print("[ERROR] sizes, reorder (>= 2) and paths (>= 1) must be comma separated integers, shapes any of string, circle, cloth!\n")
+        exit(0)
+
+    report = run_benchmarks(sizes=sizes, shapes=shapes, lengths=lengths, backend=args.backend, min_time=args.min_time, reorder=reorder)
+
+    with open(f"{args.out}.tmp", "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(f"{args.out}.tmp", args.out)
+    print(f"[INFO] results written to {args.out}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        changes = compare(current=report, previous=previous, tolerance=args.tolerance)
+        for change in changes:
+            flag = " REGRESSION" if change["regression"] else ""
+            print(f"[INFO] {change['name']}: {change['previous']:.6g} -> {change['current']:.6g} ({change['change']:+.1%}){flag}")
+        if any(change["regression"] for change in changes):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+
+Mass-mass collision: sorted-cell broad phase and penalty response
+
+"""
+
+import numpy as np
+
+
+# half of the 26 neighbour cells: every pair of adjacent cells is visited once
+NEIGHBOURS = np.array(
+    [(i, j, l) for i in (-1, 0, 1) for j in (-1, 0, 1) for l in (-1, 0, 1) if (i, j, l) > (0, 0, 0)],
+    dtype=np.int64
+)
+
+# cell coordinates -> key (linear: key(a + b) = key(a) + key(b), aliasing only adds candidates)
+KEY = np.array([1 << 42, 1 << 21, 1], dtype=np.int64)
+
+
+def expand(query: np.ndarray, first: np.ndarray, count: np.ndarray, order: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+
+    """
+    pairs (query[n], order[first[n] + 0...count[n] - 1]) for all n
+
+    query: np.ndarray, mass of each query
+    first: np.ndarray, first partner of each query in order
+    count: np.ndarray, number of partners of each query
+    order: np.ndarray, masses sorted by cell
+
+    return: i, j
+    """
+
+    total = int(count.sum())
+    i = np.repeat(query, count)
+    offset = np.arange(total) - np.repeat(np.cumsum(count) - count, count)
+    j = order[np.repeat(first, count) + offset]
+    return i, j
+
+
+class Collision():
+
+    def __init__(self, k: float, scale: float, c: float = 0.0, exclude_connected: bool = True) -> None:
+
+        """
+        Create mass-mass collision. Two masses collide when they are closer than (radius1 + radius2)·scale,
+        the overlap is pushed back by a penalty spring along the contact normal: F = k·overlap (+ c·approach speed).
+        Candidate pairs come from a uniform grid (cell = largest contact distance) sorted by cell key:
+        only masses in the same or in adjacent cells are checked, so the cost grows ~linearly with the masses.
+
+        k: float, contact stiffness
+        scale: float, radius -> position units (radius is in pixels, for example 1/800 on a 800 x 800 canvas)
+        c: float, contact damping on the normal approach speed
+        exclude_connected: bool, if True masses joined by a spring or a damper do not collide
+        """
+
+        try:
+            assert k >= 0 and scale > 0 and c >= 0
+        except:
+            print("[ERROR] k and c must be >= 0 and scale > 0!\n")
+            exit(0)
+
+        self.k = k
+        self.c = c
+        self.scale = scale
+        self.exclude_connected = exclude_connected
+
+        self.engine = None # engine of the excluded pairs
+        self.excluded = np.zeros(0, dtype=np.int64) # sorted i·N + j (i < j) of connected masses
+
+        # counters
+        self.candidates = 0 # pairs checked by the last step (broad phase)
+        self.contacts = 0 # pairs in contact in the last step (narrow phase)
+        self.touching = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)) # i, j of the contacts of the last step (see Sleep.touch)
+        self.total = {"steps": 0, "total_candidates": 0, "total_contacts": 0}
+
+
+    def __bind(self, engine) -> None:
+
+        n = engine.n_masses
+        i = np.concatenate((engine.s1, engine.d1))
+        j = np.concatenate((engine.s2, engine.d2))
+        self.excluded = np.unique(np.minimum(i, j).astype(np.int64) * n + np.maximum(i, j))
+        self.engine = engine
+
+
+    def pairs(self, pos: np.ndarray, cell: float) -> tuple[np.ndarray, np.ndarray]:
+
+        """
+        broad phase: pairs of masses in the same or in adjacent cells
+
+        pos: np.ndarray, N x 3 positions
+        cell: float, cell size
+
+        return: i, j (i != j, each pair once)
+        """
+
+        cells = np.floor(pos/cell).astype(np.int64)
+        keys = cells @ KEY
+
+        # flat networks (all masses in one z layer) -> only the 4 neighbour cells in the plane
+        neighbours = NEIGHBOURS[NEIGHBOURS[:, 2] == 0] if np.ptp(cells[:, 2]) == 0 else NEIGHBOURS
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        n = keys.size
+        sorted_index = np.arange(n)
+
+        # same cell: every mass with the ones after it in its cell
+        end = np.searchsorted(keys, keys, side="right")
+        pairs = [expand(query=order, first=sorted_index + 1, count=end - sorted_index - 1, order=order)]
+
+        # adjacent cells
+        for offset in neighbours @ KEY:
+            start = np.searchsorted(keys, keys + offset, side="left")
+            end = np.searchsorted(keys, keys + offset, side="right")
+            pairs.append(expand(query=order, first=start, count=end - start, order=order))
+
+        i = np.concatenate([p[0] for p in pairs])
+        j = np.concatenate([p[1] for p in pairs])
+        return i, j
+
+
+    def forces(self, engine) -> np.ndarray:
+
+        """
+        contact forces of all the masses
+
+        engine: Engine, compiled network
+
+        return: N x 3 forces
+        """
+
+        try:
+            assert not engine.batch
+        except:
+            print("[ERROR] collision does not support ensembles!\n")
+            exit(0)
+
+        if engine is not self.engine:
+            self.__bind(engine=engine)
+
+        force = np.zeros(engine.pos.shape)
+        self.touching = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp))
+        radius = engine.radius * self.scale
+        n = engine.n_masses
+        if n < 2:
+            return force
+
+        cell = 2 * float(radius.max())
+        if cell <= 0:
+            return force
+
+        i, j = self.pairs(pos=engine.pos, cell=cell)
+        if self.exclude_connected and self.excluded.size and i.size:
+            key = np.minimum(i, j) * n + np.maximum(i, j)
+            found = np.searchsorted(self.excluded, key)
+            keep = self.excluded[np.minimum(found, self.excluded.size - 1)] != key
+            i, j = i[keep], j[keep]
+
+        # narrow phase
+        delta = engine.pos[j] - engine.pos[i]
+        mag = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+        overlap = radius[i] + radius[j] - mag
+        hit = (overlap > 0) & (mag > 0)
+
+        self.candidates = int(i.size)
+        self.contacts = int(hit.sum())
+        self.total["steps"] += 1
+        self.total["total_candidates"] += self.candidates
+        self.total["total_contacts"] += self.contacts
+
+        if not self.contacts:
+            return force
+
+        i, j, delta, mag, overlap = i[hit], j[hit], delta[hit], mag[hit], overlap[hit]
+        self.touching = (i, j)
+        normal = delta/mag[:, None]
+        s = self.k * overlap
+        if self.c:
+            approach = np.einsum("ij,ij->i", engine.vel[i] - engine.vel[j], normal)
+            s = s + self.c * np.maximum(approach, 0)
+
+        # +f on i, -f on j (same convention of the springs), pushing the masses apart
+        return engine.scatter(i, j, -normal * s[:, None])
+
+
+    def stats(self) -> dict:
+
+        """
+        counters snapshot
+
+        return: dict, last step and total candidate pairs and contacts, plus the contact ratio (contacts/candidates)
+        """
+
+        return {
+            "candidates": self.candidates, "contacts": self.contacts, **self.total,
+            "ratio": self.total["total_contacts"]/max(self.total["total_candidates"], 1)
+        }
@@ -0,0 +1,128 @@
+"""
+
+Draw: whole-network rasterization with NumPy (masses as discs, springs as lines) into a pixel buffer
+
+"""
+
+import numpy as np
+
+
+def clip_segments(start: np.ndarray, end: np.ndarray, width: int, height: int) -> tuple[np.ndarray, np.ndarray]:
+
+    """
+    segments clipped to the canvas [0, width - 1] x [0, height - 1] (Liang-Barsky),
+    the ones outside or with non finite endpoints are dropped
+
+    start: np.ndarray, E x 2 screen coordinates of the first endpoint
+    end: np.ndarray, E x 2 screen coordinates of the second endpoint
+    width: int, canvas width
+    height: int, canvas height
+
+    return: start, end of the visible segments
+    """
+
+    with np.errstate(invalid="ignore", over="ignore"):
+        delta = end - start
+    keep = np.isfinite(start).all(axis=1) & np.isfinite(end).all(axis=1) & np.isfinite(delta).all(axis=1)
+    t0 = np.zeros(start.shape[0])
+    t1 = np.ones(start.shape[0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in ((-delta[:, 0], start[:, 0]), (delta[:, 0], (width - 1) - start[:, 0]), (-delta[:, 1], start[:, 1]), (delta[:, 1], (height - 1) - start[:, 1])):
+            r = q/p
+            keep &= (p != 0) | (q >= 0)
+            t0 = np.where(p < 0, np.maximum(t0, r), t0)
+            t1 = np.where(p > 0, np.minimum(t1, r), t1)
+        keep &= t0 <= t1
+
+    # clamped: rounding of far endpoints can land just outside
+    start, end, delta, t0, t1 = start[keep], end[keep], delta[keep], t0[keep, None], t1[keep, None]
+    low, high = np.zeros(2), np.array([width - 1, height - 1], dtype=float)
+    return np.clip(np.where(t0 > 0, start + t0 * delta, start), low, high), np.clip(np.where(t1 < 1, start + t1 * delta, end), low, high)
+
+
+def segment_pixels(start: np.ndarray, end: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+
+    """
+    pixels of many line segments at once (DDA: one pixel per step along the longest axis)
+
+    start: np.ndarray, E x 2 integer screen coordinates of the first endpoint
+    end: np.ndarray, E x 2 integer screen coordinates of the second endpoint
+
+    return: x, y of all the pixels
+    """
+
+    delta = end - start
+    steps = np.abs(delta).max(axis=1)
+    count = steps + 1
+    edge = np.repeat(np.arange(start.shape[0]), count)
+    first = np.cumsum(count) - count
+    t = (np.arange(edge.size) - first[edge])/np.maximum(steps, 1)[edge]
+    x = np.rint(start[edge, 0] + delta[edge, 0] * t).astype(np.intp)
+    y = np.rint(start[edge, 1] + delta[edge, 1] * t).astype(np.intp)
+    return x, y
+
+
+def disc_pixels(centers: np.ndarray, radius: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+
+    """
+    pixels of many filled discs at once (one stencil for each radius)
+
+    centers: np.ndarray, N x 2 integer screen coordinates
+    radius: np.ndarray, N radius in pixels
+
+    return: x, y of all the pixels
+    """
+
+    xs, ys = [], []
+    radius = np.rint(radius).astype(np.intp)
+    for r in np.unique(radius).tolist():
+        which = centers[radius == r]
+        offset = np.arange(-r, r + 1)
+        dx, dy = np.meshgrid(offset, offset)
+        inside = dx * dx + dy * dy <= r * r
+        xs.append((which[:, 0, None] + dx[inside][None, :]).ravel())
+        ys.append((which[:, 1, None] + dy[inside][None, :]).ravel())
+    if not xs:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+    return np.concatenate(xs), np.concatenate(ys)
+
+
+def plot(pixels: np.ndarray, x: np.ndarray, y: np.ndarray, color: int) -> None:
+
+    """
+    set the pixels inside the buffer
+
+    pixels: np.ndarray, W x H buffer (pygame.surfarray.pixels2d)
+    x: np.ndarray, x of the pixels
+    y: np.ndarray, y of the pixels
+    color: int, mapped color (Surface.map_rgb)
+    """
+
+    w, h = pixels.shape
+    inside = (x >= 0) & (x < w) & (y >= 0) & (y < h)
+    pixels[x[inside], y[inside]] = color
+
+
+def draw_network(pixels: np.ndarray, pos: np.ndarray, radius: np.ndarray, s1: np.ndarray, s2: np.ndarray, mass_color: int, spring_color: int) -> None:
+
+    """
+    draw all the masses and then all the springs of a network. Springs are clipped to the buffer,
+    masses and springs with non finite positions (a network that blew up) are not drawn
+
+    pixels: np.ndarray, W x H buffer (pygame.surfarray.pixels2d)
+    pos: np.ndarray, N x 2 screen coordinates of the masses
+    radius: np.ndarray, N radius in pixels
+    s1: np.ndarray, first mass of each spring
+    s2: np.ndarray, second mass of each spring
+    mass_color: int, mapped color of the masses
+    spring_color: int, mapped color of the springs
+    """
+
+    w, h = pixels.shape
+    x, y = pos[:, 0], pos[:, 1]
+    with np.errstate(invalid="ignore"):
+        visible = (x >= -radius) & (x < w + radius) & (y >= -radius) & (y < h + radius)
+    plot(pixels, *disc_pixels(centers=np.floor(pos[visible]).astype(np.intp), radius=radius[visible]), color=mass_color)
+    if s1.size:
+        start, end = clip_segments(start=pos[s1], end=pos[s2], width=w, height=h)
+        plot(pixels, *segment_pixels(start=np.floor(start).astype(np.intp), end=np.floor(end).astype(np.intp)), color=spring_color)
@@ -0,0 +1,546 @@
+"""
+
+Engine: compiled (struct-of-arrays) state of a MSDNetwork
+
+"""
+
+from collections.abc import Mapping
+from msdnet.kernels import verlet_step, verlet_steps
+import numpy as np
+
+
+def norm(v: np.ndarray) -> np.ndarray:
+
+    """
+    magnitude of (...) x 3 vectors (summed in x, y, z order, as the compiled kernels do)
+    """
+
+    return np.sqrt(v[..., 0] * v[..., 0] + v[..., 1] * v[..., 1] + v[..., 2] * v[..., 2])
+
+
+class Engine():
+
+    # mass arrays and edge arrays of the engine (see from_arrays)
+    mass_arrays = ["m", "d", "radius", "anchored", "pressed", "g", "pos", "prev_pos", "vel", "acc", "start_pos", "frame"]
+    edge_arrays = ["s1", "s2", "k", "length", "d1", "d2", "c"]
+    spring_arrays = ["s1", "s2", "k", "length"]
+    damper_arrays = ["d1", "d2", "c"]
+
+    profiler = None # per-phase timers of step (see MSDNet.add_profiler)
+    sleep = None # sleeping islands skipped by step (see MSDNet.add_sleep)
+    parallel = None # islands stepped on a thread pool (see MSDNet.add_parallel)
+
+    # array -> (dtype, element shape)
+    specs = {
+        "m": (float, ()), "d": (float, ()), "radius": (float, ()), "anchored": (bool, ()), "pressed": (bool, ()),
+        "g": (float, (3,)), "pos": (float, (3,)), "prev_pos": (float, (3,)), "vel": (float, (3,)), "acc": (float, (3,)),
+        "start_pos": (float, (3,)), "frame": (float, (3,)),
+        "s1": (np.intp, ()), "s2": (np.intp, ()), "k": (float, ()), "length": (float, ()),
+        "d1": (np.intp, ()), "d2": (np.intp, ()), "c": (float, ())
+    }
+
+    def __init__(self, masses: list, springs: list, dampers: list, external_forces: dict) -> None:
+
+        """
+        compile masses, springs and dampers into arrays and bind them to the engine
+
+        masses: list[Mass], masses of the network
+        springs: list[Spring], springs of the network
+        dampers: list[Damper], dampers of the network
+        external_forces: dict, external forces of the network (see MSDNet.add_external_force)
+        """
+
+        row = {mass.name: i for i, mass in enumerate(masses)}
+        self.names = [mass.name for mass in masses] # mass name of each row
+
+        arrays = self.mass_values(masses=masses) | self.spring_values(springs=springs, row=row) | self.damper_values(dampers=dampers, row=row)
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+        self.external_forces = self.compile_external_forces(external_forces=external_forces, row=row)
+
+        self.backend = "numpy" # "numba" -> compiled kernel (see msdnet.kernels)
+
+        self.bind(masses=masses, springs=springs, dampers=dampers)
+
+    @staticmethod
+    def mass_values(masses: list) -> dict:
+
+        """
+        masses -> N and N x 3 arrays (mass_arrays)
+        """
+
+        n = len(masses)
+        pos = np.array([mass.pos for mass in masses], dtype=float).reshape(n, 3)
+        return {
+            "m": np.array([mass.m for mass in masses], dtype=float),
+            "d": np.array([mass.d for mass in masses], dtype=float),
+            "radius": np.array([mass.radius for mass in masses], dtype=float),
+            "anchored": np.array([mass.anchored for mass in masses], dtype=bool),
+            "pressed": np.array([mass.is_anchored_press for mass in masses], dtype=bool),
+            "g": np.array([mass.g for mass in masses], dtype=float).reshape(n, 3),
+            "pos": pos,
+            "prev_pos": np.array([mass.prev_pos for mass in masses], dtype=float).reshape(n, 3),
+            "vel": np.array([mass.vel for mass in masses], dtype=float).reshape(n, 3),
+            "acc": np.array([mass.acc for mass in masses], dtype=float).reshape(n, 3),
+            "start_pos": np.array([mass.start_pos for mass in masses], dtype=float).reshape(n, 3),
+            "frame": pos.copy() # positions before the last update (what run_network returns)
+        }
+
+    @staticmethod
+    def spring_values(springs: list, row: dict) -> dict:
+
+        """
+        springs -> edge arrays (spring_arrays)
+
+        row: dict, mass name -> row
+        """
+
+        return {
+            "s1": np.array([row[spring.m1.name] for spring in springs], dtype=np.intp),
+            "s2": np.array([row[spring.m2.name] for spring in springs], dtype=np.intp),
+            "k": np.array([spring.k for spring in springs], dtype=float),
+            "length": np.array([spring.length for spring in springs], dtype=float)
+        }
+
+    @staticmethod
+    def damper_values(dampers: list, row: dict) -> dict:
+
+        """
+        dampers -> edge arrays (damper_arrays)
+
+        row: dict, mass name -> row
+        """
+
+        return {
+            "d1": np.array([row[damper.m1.name] for damper in dampers], dtype=np.intp),
+            "d2": np.array([row[damper.m2.name] for damper in dampers], dtype=np.intp),
+            "c": np.array([damper.c for damper in dampers], dtype=float)
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, names: list[str], external_forces: dict, row: dict|None = None) -> "Engine":
+
+        """
+        build an engine from its arrays without components (see MSDNet.load), bind them with bind
+
+        arrays: dict, mass_arrays and edge_arrays
+        names: list[str], mass name of each row
+        external_forces: dict, external forces of the network (see MSDNet.add_external_force)
+        row: dict|None, mass name -> row (None -> from names)
+
+        return: Engine
+        """
+
+        engine = cls.__new__(cls)
+        for name in cls.mass_arrays + cls.edge_arrays:
+            setattr(engine, name, arrays[name])
+        engine.names = list(names)
+        row = {name: i for i, name in enumerate(engine.names)} if row is None else row
+        engine.external_forces = engine.compile_external_forces(external_forces=external_forces, row=row)
+        engine.backend = "numpy"
+        return engine
+
+    def compile_external_forces(self, external_forces: dict, row: dict) -> list:
+
+        """
+        external forces -> (params, mass indexes), None means all masses
+        """
+
+        compiled = []
+        for params in external_forces.values():
+            where = params["where"]
+            if where == "all":
+                index = None
+            else:
+                names = [where] if isinstance(where, str) else where
+                index = np.array([row[name] for name in names], dtype=np.intp)
+            compiled.append((params, index))
+        return compiled
+
+    def bind(self, masses: list, springs: list, dampers: list) -> None:
+
+        """
+        bind components to the engine rows (their attributes read and write the engine arrays)
+        """
+
+        for components in (masses, springs, dampers):
+            for i, component in enumerate(components):
+                component.index = i
+                component.engine = self
+
+    # all the arrays may have a leading batch axis (see Ensemble): the kernels index masses on axis -2 (vectors) or -1
+
+    @property
+    def n_masses(self) -> int:
+        return self.pos.shape[-2]
+
+    @property
+    def batch(self) -> tuple:
+        return self.pos.shape[:-2]
+
+    def scatter(self, i1: np.ndarray, i2: np.ndarray, f: np.ndarray) -> np.ndarray:
+
+        """
+        sum edge forces on masses: +f on i1, -f on i2
+
+        i1: np.ndarray, first mass of each edge
+        i2: np.ndarray, second mass of each edge
+        f: np.ndarray, (B x) E x 3 forces
+
+        return: (B x) N x 3 net force
+        """
+
+        n = self.n_masses
+        batch = self.batch
+        size = int(np.prod(batch))
+        index = np.concatenate((i1, i2))
+        if batch:
+            index = (np.arange(size)[:, None] * n + index).ravel()
+        f = np.concatenate((f, -f), axis=-2)
+        total = np.empty(batch + (n, 3))
+        for i in range(3):
+            total[..., i] = np.bincount(index, weights=f[..., i].ravel(), minlength=size * n).reshape(batch + (n,))
+        return total
+
+    def spring_forces(self, pos: np.ndarray|None = None, edges: np.ndarray|None = None) -> np.ndarray:
+
+        """
+        F = -k · x (Hooke's law), for all springs at once
+
+        pos: np.ndarray|None, positions where to evaluate the forces (None -> current positions)
+        edges: np.ndarray|None, springs to evaluate (None -> all)
+
+        return: E x 3 forces (applied +f on m1, -f on m2)
+        """
+
+        pos = self.pos if pos is None else pos
+        s1, s2, k, length = (self.s1, self.s2, self.k, self.length) if edges is None else (self.s1[edges], self.s2[edges], self.k[edges], self.length[edges])
+        delta = pos[..., s2, :] - pos[..., s1, :]
+        mag = norm(delta)
+        safe = np.where(mag > 0, mag, 1)
+        return delta * (k * (mag - length)/safe)[..., None]
+
+    def drag_forces(self, vel: np.ndarray|None = None, edges: np.ndarray|None = None) -> np.ndarray:
+
+        """
+        F = -c·v^2, for all dampers at once
+
+        vel: np.ndarray|None, displacements per step where to evaluate the forces (None -> current vel)
+        edges: np.ndarray|None, dampers to evaluate (None -> all)
+
+        return: E x 3 forces (applied +f on m1, -f on m2)
+        """
+
+        vel = self.vel if vel is None else vel
+        d1, d2, c = (self.d1, self.d2, self.c) if edges is None else (self.d1[edges], self.d2[edges], self.c[edges])
+        drag = vel[..., d2, :] - vel[..., d1, :]
+        mag = norm(drag)
+        return drag * (c * mag)[..., None]
+
+    def internal_forces(self, pos: np.ndarray|None = None, vel: np.ndarray|None = None) -> np.ndarray:
+
+        """
+        net spring and damper force on each mass
+
+        pos: np.ndarray|None, positions (None -> current positions)
+        vel: np.ndarray|None, displacements per step (None -> current vel)
+
+        return: (B x) N x 3 forces
+        """
+
+        force = np.zeros(self.pos.shape)
+        if self.s1.size:
+            force += self.scatter(self.s1, self.s2, self.spring_forces(pos=pos))
+        if self.d1.size:
+            force += self.scatter(self.d1, self.d2, self.drag_forces(vel=vel))
+        return force
+
+    def apply_external_forces(self) -> None:
+
+        for params, index in self.external_forces:
+            f = params["force"]
+            mode = params["mode"]
+
+            if index is None:
+                self.acc += f/self.m[..., None]
+            else:
+                np.add.at(self.acc, (Ellipsis, index, slice(None)), f/self.m[..., index, None])
+            if mode in ["one_shot", "rand_shot"]:
+                params["force"] *= 0
+            if mode == "rand_shot" and self.batch:
+                # one draw for each member (see Ensemble)
+                hit = np.random.rand(*self.batch) < np.random.rand(*self.batch) * 0.01
+                direc = np.random.choice([-1, 1], size=self.batch)
+                params["force"][hit] = direc[hit, None, None] * params["start_force"]
+            elif mode == "rand_shot":
+                v, p = np.random.rand(), np.random.rand() * 0.01
+                if v < p:
+                    direc = np.random.choice([-1, 1])
+                    params["force"] = direc * params["start_force"]
+
+    def movable(self) -> np.ndarray:
+
+        """
+        masses moved by the step: not anchored, not pressed (mouse) and not asleep (see msdnet.sleep)
+
+        return: (B x) N mask
+        """
+
+        free = ~(self.anchored | self.pressed)
+        if self.sleep is not None and self.sleep.any:
+            free &= ~self.sleep.masses
+        return free
+
+    def integrate(self, dt: float, acc_is_costant: bool = False, clip_pos: tuple|None = None) -> None:
+
+        """
+        Verlet update of all the masses in one shot (see Mass.update_position)
+
+        dt: float, sample time
+        acc_is_costant: bool, if False reset accelerations after the update
+        clip_pos: tuple|None, (min, max) position, masses bounce on the limits
+        """
+
+        free = self.movable()[..., None]
+
+        np.add(self.acc, self.g, out=self.acc, where=free)
+        np.subtract(self.pos, self.prev_pos, out=self.vel, where=free)
+        np.copyto(self.prev_pos, self.pos, where=free)
+        np.add(self.pos, self.vel * self.d[..., None] + self.acc * dt**2, out=self.pos, where=free)
+
+        if not acc_is_costant:
+            self.acc.fill(0)
+
+        self.clip(clip_pos=clip_pos)
+
+    def clip(self, clip_pos: tuple|None = None) -> None:
+
+        """
+        masses bounce on the limits
+
+        clip_pos: tuple|None, (min, max) position
+        """
+
+        if clip_pos:
+            for limit, hit in ((clip_pos[0], np.less_equal), (clip_pos[1], np.greater_equal)):
+                out = hit(self.pos, limit)
+                if out.any():
+                    self.prev_pos[out] = self.pos[out]
+                    self.pos[out] = limit
+                    self.vel[out] *= -0.987
+
+    def step(self, dt: float, acc_is_costant: bool = False, clip_pos: tuple|None = None, integrator = None, collision = None) -> None:
+
+        """
+        advance the network by one step
+
+        dt: float, sample time
+        acc_is_costant: bool, if False reset accelerations after the update
+        clip_pos: tuple|None, (min, max) position, masses bounce on the limits
+        integrator: object|None, integrator with integrate(engine, dt, acc_is_costant, clip_pos) (None -> Verlet, see integrate).
+            If integrator.evaluates_forces acc holds only the external (and contact) forces
+        collision: Collision|None, mass-mass collision (see msdnet.collision), contact forces are added with the spring forces
+        """
+
+        prof = self.profiler
+
+        # external forces first: they do not depend on the springs and the compiled kernel starts from acc
+        if self.external_forces:
+            self.apply_external_forces()
+            if prof is not None:
+                prof.mark("external")
+
+        # sleeping islands: forces wake them up, nothing to do when they all sleep
+        sleep = self.sleep
+        if sleep is not None:
+            if sleep.check(engine=self):
+                np.copyto(self.frame, self.pos)
+                if not acc_is_costant:
+                    self.acc.fill(0)
+                sleep.skipped += 1
+                if prof is not None:
+                    prof.mark("sleep")
+                return
+            if prof is not None:
+                prof.mark("sleep")
+
+        # islands on a thread pool (built-in Verlet step only, see msdnet.parallel)
+        parallel = self.parallel
+        if parallel is not None and integrator is None and not self.batch and not (sleep is not None and sleep.any) and parallel.ready(engine=self):
+            if collision is not None:
+                self.acc += self.__contacts(collision=collision)/self.m[:, None]
+                if prof is not None:
+                    prof.mark("collision")
+            parallel.step(engine=self, dt=dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos)
+            if prof is not None:
+                prof.mark("parallel")
+        else:
+            self.__forces_and_update(dt=dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos, integrator=integrator, collision=collision)
+
+        if sleep is not None:
+            sleep.update(engine=self)
+            if prof is not None:
+                prof.mark("sleep")
+
+    def run(self, n_steps: int, dt: float, acc_is_costant: bool = False, clip_pos: tuple|None = None, integrator = None, collision = None) -> None:
+
+        """
+        advance the network by n_steps steps with nothing in between (same results of n_steps calls of step).
+        With the numba backend and a plain network (built-in Verlet, no external forces, collision, sleep,
+        parallel islands or profiler) all the steps run in a single compiled call
+
+        n_steps: int, number of steps
+        dt, acc_is_costant, clip_pos, integrator, collision: see step
+        """
+
+        plain = (
+            self.backend == "numba" and integrator is None and collision is None and not self.batch and not self.external_forces
+            and self.sleep is None and self.parallel is None and self.profiler is None
+        )
+        if not plain or n_steps <= 1:
+            for _ in range(n_steps):
+                self.step(dt=dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos, integrator=integrator, collision=collision)
+            return
+
+        verlet_steps(
+            int(n_steps), self.pos, self.prev_pos, self.vel, self.acc, self.frame, self.m, self.d, self.g, self.movable(),
+            self.s1, self.s2, self.k, self.length, self.d1, self.d2, self.c,
+            float(dt), bool(acc_is_costant), bool(clip_pos), float(clip_pos[0]) if clip_pos else 0.0, float(clip_pos[1]) if clip_pos else 0.0
+        )
+
+    def __contacts(self, collision) -> np.ndarray:
+
+        # contact forces, sleeping islands touched by awake masses wake up (see Sleep.touch)
+        force = collision.forces(engine=self)
+        if self.sleep is not None and self.sleep.any:
+            self.sleep.touch(*collision.touching)
+        return force
+
+    def __forces_and_update(self, dt: float, acc_is_costant: bool, clip_pos: tuple|None, integrator, collision) -> None:
+
+        prof = self.profiler
+        if self.backend == "numba" and integrator is None and not self.batch:
+            if collision is not None:
+                self.acc += self.__contacts(collision=collision)/self.m[:, None]
+                if prof is not None:
+                    prof.mark("collision")
+            s1, s2, k, length, d1, d2, c = self.s1, self.s2, self.k, self.length, self.d1, self.d2, self.c
+            if self.sleep is not None and self.sleep.any:
+                # awake springs and dampers only (see msdnet.sleep), same order -> same force sums
+                springs, dampers = self.sleep.springs, self.sleep.dampers
+                s1, s2, k, length = s1[springs], s2[springs], k[springs], length[springs]
+                d1, d2, c = d1[dampers], d2[dampers], c[dampers]
+            verlet_step(
+                self.pos, self.prev_pos, self.vel, self.acc, self.frame, self.m, self.d, self.g, self.movable(),
+                s1, s2, k, length, d1, d2, c,
+                float(dt), bool(acc_is_costant), bool(clip_pos), float(clip_pos[0]) if clip_pos else 0.0, float(clip_pos[1]) if clip_pos else 0.0
+            )
+            if prof is not None:
+                prof.mark("kernel")
+            return
+
+        # integrators that evaluate the spring and damper forces at their own stages (see msdnet.integrators)
+        if getattr(integrator, "evaluates_forces", False):
+            if collision is not None:
+                self.acc += self.__contacts(collision=collision)/self.m[..., None]
+                if prof is not None:
+                    prof.mark("collision")
+            np.copyto(self.frame, self.pos)
+            integrator.integrate(engine=self, dt=dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos)
+            if prof is not None:
+                prof.mark("integrate")
+            return
+
+        # contacts first: they can wake sleeping islands
+        contact = None
+        if collision is not None:
+            contact = self.__contacts(collision=collision)
+            if prof is not None:
+                prof.mark("collision")
+
+        # awake springs and dampers only when some island sleeps (see msdnet.sleep)
+        springs = dampers = None
+        if self.sleep is not None and self.sleep.any:
+            springs, dampers = self.sleep.springs, self.sleep.dampers
+
+        force = np.zeros(self.pos.shape)
+        if self.s1.size:
+            if springs is None:
+                force += self.scatter(self.s1, self.s2, self.spring_forces())
+            else:
+                force += self.scatter(self.s1[springs], self.s2[springs], self.spring_forces(edges=springs))
+            if prof is not None:
+                prof.mark("springs")
+        if self.d1.size:
+            if dampers is None:
+                force += self.scatter(self.d1, self.d2, self.drag_forces())
+            else:
+                force += self.scatter(self.d1[dampers], self.d2[dampers], self.drag_forces(edges=dampers))
+            if prof is not None:
+                prof.mark("dampers")
+        if contact is not None:
+            force += contact
+        self.acc += force/self.m[..., None]
+
+        np.copyto(self.frame, self.pos)
+        if integrator is None:
+            self.integrate(dt=dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos)
+        else:
+            integrator.integrate(engine=self, dt=dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos)
+        if prof is not None:
+            prof.mark("integrate")
+
+    def reset(self) -> None:
+
+        """
+        take the network to zero time
+        """
+
+        np.copyto(self.pos, self.start_pos)
+        np.copyto(self.prev_pos, self.start_pos)
+        np.copyto(self.frame, self.start_pos)
+        self.vel.fill(0)
+        self.acc.fill(0)
+
+
+class MassMotion(Mapping):
+
+    """
+    current position of a mass -> {"x": ..., "y": ..., "z": ...}
+    """
+
+    coord = {"x": 0, "y": 1, "z": 2}
+
+    def __init__(self, frame: np.ndarray, index: int) -> None:
+        self.frame = frame
+        self.index = index
+
+    def __getitem__(self, key: str) -> float:
+        return float(self.frame[self.index, self.coord[key]])
+
+    def __iter__(self):
+        return iter(self.coord)
+
+    def __len__(self) -> int:
+        return 3
+
+
+class MotionView(Mapping):
+
+    """
+    read-only dict[mass][coordinate] view of the engine positions, returned by MSDNet.run_network
+    """
+
+    def __init__(self, network) -> None:
+        self.network = network
+
+    def __getitem__(self, name: str) -> MassMotion:
+        engine = self.network.engine
+        return MassMotion(frame=engine.frame, index=self.network.masses.rows[name])
+
+    def __iter__(self):
+        return iter(self.network.masses)
+
+    def __len__(self) -> int:
+        return len(self.network.masses)
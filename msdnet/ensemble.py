@@ -0,0 +1,182 @@
+"""
+
+Ensemble: many independent copies of the same MSDNetwork stepped together
+
+"""
+
+from msdnet.engine import Engine
+import numpy as np
+import copy
+
+
+class Ensemble(Engine):
+
+    # per-member arrays: name -> number of element axes after the batch axis
+    params = {
+        "m": 1, "d": 1, "radius": 1, "anchored": 1, "pressed": 1, "g": 2,
+        "pos": 2, "prev_pos": 2, "vel": 2, "acc": 2, "frame": 2,
+        "k": 1, "length": 1, "c": 1
+    }
+
+    def __init__(self, network, size: int) -> None:
+
+        """
+        Create ensemble: size copies of network sharing its topology (springs and dampers edges).
+        All state and parameter arrays get a leading batch axis (member), for example pos -> B x N x 3, k -> B x E,
+        so that one step advances all the members with vectorized NumPy.
+        Set per-member parameters with set_param or writing the arrays (ensemble.k[b] = ...)
+
+        network: MSDNet, template network (its current state is copied in all the members)
+        size: int, number of members (B)
+        """
+
+        try:
+            assert size >= 1
+        except:
+            print("[ERROR] size must be >= 1!\n")
+            exit(0)
+
+        engine = network.engine
+
+        for name in self.params:
+            setattr(self, name, np.repeat(getattr(engine, name)[None], size, axis=0))
+
+        # shared topology
+        self.start_pos = engine.start_pos.copy()
+        self.s1, self.s2 = engine.s1, engine.s2
+        self.d1, self.d2 = engine.d1, engine.d2
+
+        # every member owns its external forces (modes one_shot/rand_shot change them): force -> B x 1 x 3
+        self.external_forces = []
+        for params, index in engine.external_forces:
+            params = copy.deepcopy(params)
+            params["force"] = np.repeat(params["force"][None, None], size, axis=0)
+            self.external_forces.append((params, index))
+
+        # g holds gravity·m (see Mass): it follows the member masses (see set_param)
+        self.gravity = np.array(network.g, dtype=float)
+
+        self.size = size
+        self.dt = network.dt
+        self.backend = "numpy" # the compiled kernel does not support the batch axis
+        self.index = {name: i for i, name in enumerate(engine.names)}
+        self.members = dict() # member -> masses (see member_masses)
+
+
+    def set_param(self, name: str, values) -> None:
+
+        """
+        set a parameter for each member
+
+        name: str, parameter -> ["m", "d", "radius", "anchored", "g", "k", "length", "c", ...]
+            (setting m sets g to gravity·m, set g after m for a per-member gravity)
+        values: scalar (same for all), B values (one for each member, broadcast on all the elements) or the full array
+        """
+
+        try:
+            assert name in self.params
+        except:
+            print(f"[ERROR] {name} is not a parameter of the ensemble!\n")
+            exit(0)
+
+        array = getattr(self, name)
+        values = np.asarray(values)
+        if values.ndim == 1 and values.shape[0] == self.size and array.ndim > 1:
+            values = values.reshape((self.size,) + (1,) * (array.ndim - 1))
+        array[...] = values
+        if name == "m":
+            self.g[...] = self.gravity * self.m[..., None]
+
+
+    def run_network(self, clip_pos: tuple|None = None, acc_is_costant: bool = False) -> np.ndarray:
+
+        """
+        advance all the members by one step
+
+        return -> np.ndarray B x N x 3, current position of all masses of all members (see MSDNet.run_network)
+        """
+
+        self.step(dt=self.dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos)
+        return self.frame
+
+
+    def run_steps(self, n_steps: int, clip_pos: tuple|None = None, acc_is_costant: bool = False, stride: int = 1, masses: list[str]|None = None, coordinates: str = "xyz", out: np.ndarray|None = None) -> np.ndarray:
+
+        """
+        advance all the members for n_steps and record the trajectory (see MSDNet.run_steps)
+
+        return -> np.ndarray (T, B, M, C)
+        """
+
+        index = {"x": 0, "y": 1, "z": 2}
+
+        try:
+            assert n_steps >= 0 and stride >= 1
+            assert coordinates and all(c in index for c in coordinates)
+        except:
+            print("[ERROR] n_steps must be >= 0, stride >= 1 and coordinates any of x, y, z!\n")
+            exit(0)
+
+        rows = slice(None) if masses is None else np.array([self.index[mass] for mass in masses], dtype=np.intp)
+        cols = slice(None) if coordinates == "xyz" else np.array([index[c] for c in coordinates], dtype=np.intp)
+        shape = ((n_steps + stride - 1)//stride, self.size, self.n_masses if masses is None else len(masses), len(coordinates))
+
+        if out is None:
+            out = np.empty(shape)
+        else:
+            try:
+                assert out.shape == shape
+            except:
+                print(f"[ERROR] out must have shape {shape}!\n")
+                exit(0)
+
+        for n in range(n_steps):
+            self.step(dt=self.dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos)
+            if n % stride == 0:
+                out[n//stride] = self.frame[:, rows][..., cols]
+
+        return out
+
+
+    def member_masses(self, member: int) -> dict:
+
+        """
+        masses of a member, to excite it with a Hammer -> hammer.apply_hammer_force(masses=ensemble.member_masses(b))
+
+        member: int, member index
+
+        return: dict[mass name, MemberMass]
+        """
+
+        if member not in self.members:
+            self.members[member] = {name: MemberMass(ensemble=self, member=member, index=i) for name, i in self.index.items()}
+        return self.members[member]
+
+
+class MemberMass():
+
+    def __init__(self, ensemble: Ensemble, member: int, index: int) -> None:
+
+        """
+        mass of an ensemble member (same interface of Mass used by Hammer and Scanner)
+
+        ensemble: Ensemble
+        member: int, member index
+        index: int, mass index
+        """
+
+        self.ensemble = ensemble
+        self.member = member
+        self.index = index
+
+    @property
+    def anchored(self) -> bool:
+        return bool(self.ensemble.anchored[self.member, self.index])
+
+    @property
+    def start_pos(self) -> np.ndarray:
+        return self.ensemble.start_pos[self.index]
+
+    def apply_force(self, force: list[float]) -> None:
+        f = np.array(force, dtype=float)/self.ensemble.m[self.member, self.index]
+        self.ensemble.acc[self.member, self.index] += f
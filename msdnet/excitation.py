@@ -0,0 +1,115 @@
+"""
+
+Excitation: input signals (for example sounds) driving masses of a MSDNetwork, one sample per step
+
+"""
+
+from collections import deque
+from collections.abc import Iterable
+import numpy as np
+
+
+class InputSignal():
+
+    def __init__(self, signal, rows: np.ndarray, cols: np.ndarray, gains: np.ndarray) -> None:
+
+        """
+        Create input signal: at step t the n-th element of the path gets the force signal[t]·gains[n]
+        (signal[t, n]·gains[n] for a T x P signal) on its coordinate. The signal is consumed block by block:
+        each block is scaled once (gains/m) and each step is a single vectorized add on the accelerations.
+        When there are no samples left the input applies no force (push more blocks to continue)
+
+        signal: np.ndarray|Iterable|None, T (mono) or T x P samples, an iterable of such blocks (pulled when needed)
+            or None (blocks are pushed with push)
+        rows: np.ndarray, mass row of each element of the path
+        cols: np.ndarray, coordinate of each element of the path
+        gains: np.ndarray, gain of each element of the path
+        """
+
+        self.rows = rows
+        self.cols = cols
+        self.gains = gains
+        self.unique = len(set(zip(rows.tolist(), cols.tolist()))) == rows.size # no element repeated -> plain fancy add
+
+        self.queue = deque() # pushed blocks
+        self.source = None # iterator of blocks
+        if isinstance(signal, np.ndarray):
+            self.queue.append(signal)
+        elif isinstance(signal, Iterable):
+            self.source = iter(signal)
+
+        self.scaled = None # current block, already multiplied by gains/m (B x P)
+        self.position = 0 # next sample of the current block
+        self.steps = 0 # consumed samples
+
+
+    def push(self, block) -> None:
+
+        """
+        append a block of samples (B or B x P)
+        """
+
+        self.queue.append(block)
+
+
+    def __next_block(self, engine) -> bool:
+
+        while True:
+            if self.queue:
+                block = self.queue.popleft()
+            elif self.source is not None:
+                block = next(self.source, None)
+                if block is None:
+                    self.source = None
+                    return False
+            else:
+                return False
+
+            block = np.asarray(block, dtype=float)
+            if block.ndim == 1:
+                block = block[:, None]
+            if not block.shape[0]:
+                continue
+
+            try:
+                assert block.ndim == 2 and block.shape[1] in [1, self.rows.size]
+            except:
+                print(f"[ERROR] input blocks must be B or B x {self.rows.size} samples!\n")
+                exit(0)
+
+            self.scaled = block * (self.gains/engine.m[self.rows])
+            self.position = 0
+            return True
+
+
+    def apply(self, engine) -> None:
+
+        """
+        add the force of the current sample to the accelerations (called by the network before each step)
+
+        engine: Engine, compiled network
+        """
+
+        if self.scaled is None or self.position >= self.scaled.shape[0]:
+            if not self.__next_block(engine=engine):
+                self.scaled = None
+                return
+
+        sample = self.scaled[self.position]
+        if self.unique:
+            engine.acc[self.rows, self.cols] += sample
+        else:
+            np.add.at(engine.acc, (self.rows, self.cols), sample)
+
+        self.position += 1
+        self.steps += 1
+
+
+    def pending(self) -> int:
+
+        """
+        samples left in the current block and in the pushed blocks (iterator blocks are not counted)
+        """
+
+        current = 0 if self.scaled is None else self.scaled.shape[0] - self.position
+        return current + sum(len(block) for block in self.queue)
@@ -0,0 +1,164 @@
+"""
+
+Implicit (backward-Euler) integrator on a sparse stiffness matrix (requires scipy)
+
+"""
+
+import numpy as np
+
+try:
+    import scipy.sparse as sparse
+    from scipy.sparse.linalg import splu
+except ImportError:
+    sparse = None
+
+
+def blocks(i: np.ndarray, j: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+
+    """
+    coordinates of the 3 x 3 blocks of an edge Jacobian in a 3N x 3N matrix:
+    -b on (i, i) and (j, j), +b on (i, j) and (j, i)
+
+    i: np.ndarray, first mass of each edge
+    j: np.ndarray, second mass of each edge
+    b: np.ndarray, E x 3 x 3 blocks
+
+    return: rows, cols, values
+    """
+
+    r = np.arange(3)
+    rows, cols, values = [], [], []
+    for a, c, sign in ((i, i, -1), (i, j, 1), (j, i, 1), (j, j, -1)):
+        rows.append(np.broadcast_to((3 * a)[:, None, None] + r[None, :, None], b.shape).ravel())
+        cols.append(np.broadcast_to((3 * c)[:, None, None] + r[None, None, :], b.shape).ravel())
+        values.append((sign * b).ravel())
+    return np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+
+class ImplicitIntegrator():
+
+    def __init__(self, jacobian: str = "constant") -> None:
+
+        """
+        Create implicit integrator. With u the displacement of a step (vel) it solves
+
+            (I - dt^2·J) u[n + 1] = d·u[n] + a[n]·dt^2 (- dt^2·Ju·u[n])
+            x[n + 1] = x[n] + u[n + 1]
+
+        on the free masses (anchored, pressed and sleeping masses do not move).
+        Stiff networks stay stable with a dt much larger than the Verlet one.
+
+        jacobian: str, ["constant", "full"]
+            constant -> J = k·I for each spring (graph Laplacian): it does not depend on the positions,
+                the factorization is reused until dt, k, m or the anchored masses change. Dampers are explicit
+            full -> exact spring and damper Jacobian at the current positions, factorized at each step
+        """
+
+        try:
+            assert sparse is not None
+            assert jacobian in ["constant", "full"]
+        except:
+            print("[ERROR] implicit integrator needs scipy and jacobian must be constant or full!\n")
+            exit(0)
+
+        self.jacobian = jacobian
+        self.key = None # (dt, k, m, free) of the current factorization
+        self.lu = None
+        self.factorizations = 0
+
+
+    def __constant(self, engine, dt: float, free: np.ndarray):
+
+        key = (dt, engine.k.copy(), engine.m.copy(), free.copy(), engine.s1, engine.s2)
+        if self.key is not None and self.key[0] == dt and all(np.array_equal(a, b) for a, b in zip(self.key[1:], key[1:])):
+            return self.lu
+
+        n = engine.n_masses
+        k = engine.k
+        rows = np.concatenate((engine.s1, engine.s2, engine.s1, engine.s2))
+        cols = np.concatenate((engine.s2, engine.s1, engine.s1, engine.s2))
+        laplacian = sparse.coo_matrix((np.concatenate((k, k, -k, -k)), (rows, cols)), shape=(n, n)).tocsr()
+
+        a = sparse.identity(n, format="csr") - dt**2 * sparse.diags(1/engine.m) @ laplacian
+        self.lu = splu(a[free][:, free].tocsc())
+        self.key = key
+        self.factorizations += 1
+        return self.lu
+
+
+    def __full(self, engine, dt: float, free: np.ndarray, u: np.ndarray) -> tuple:
+
+        n = engine.n_masses
+        eye = np.eye(3)
+        rows, cols, values = [], [], []
+
+        # springs: dF/dx = k·(n·n^T + max(0, 1 - L/l)·(I - n·n^T))
+        delta = engine.pos[engine.s2] - engine.pos[engine.s1]
+        mag = np.sqrt(np.einsum("ij,ij->i", delta, delta))
+        safe = np.where(mag > 0, mag, 1)
+        nn = np.einsum("ei,ej->eij", delta/safe[:, None], delta/safe[:, None])
+        soft = np.maximum(0, 1 - engine.length/safe)
+        ks = engine.k[:, None, None] * (nn + soft[:, None, None] * (eye - nn))
+        r, c, v = blocks(engine.s1, engine.s2, ks)
+        rows.append(r); cols.append(c); values.append(v)
+
+        # dampers: dF/du = c·(|du|·I + du·du^T/|du|)
+        ju = None
+        if engine.d1.size:
+            du = u[engine.d2] - u[engine.d1]
+            mag = np.sqrt(np.einsum("ij,ij->i", du, du))
+            safe = np.where(mag > 0, mag, 1)
+            cd = engine.c[:, None, None] * (mag[:, None, None] * eye + np.einsum("ei,ej->eij", du, du)/safe[:, None, None])
+            r, c, v = blocks(engine.d1, engine.d2, cd)
+            ju = sparse.coo_matrix((v, (r, c)), shape=(3 * n, 3 * n)).tocsr()
+            ju = sparse.diags(np.repeat(1/engine.m, 3)) @ ju
+
+        jx = sparse.coo_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))), shape=(3 * n, 3 * n)).tocsr()
+        j = sparse.diags(np.repeat(1/engine.m, 3)) @ jx
+        if ju is not None:
+            j = j + ju
+
+        free3 = np.repeat(free, 3)
+        a = sparse.identity(3 * n, format="csr") - dt**2 * j
+        self.factorizations += 1
+        return splu(a[free3][:, free3].tocsc()), ju, free3
+
+
+    def integrate(self, engine, dt: float, acc_is_costant: bool = False, clip_pos: tuple|None = None) -> None:
+
+        """
+        implicit update of all the masses (same interface of Engine.integrate)
+
+        engine: Engine, compiled network (forces already accumulated in acc)
+        """
+
+        try:
+            assert not engine.batch
+        except:
+            print("[ERROR] implicit integrator does not support ensembles!\n")
+            exit(0)
+
+        free = engine.movable()
+        u = engine.pos - engine.prev_pos
+        rhs = u * engine.d[:, None] + (engine.acc + engine.g) * dt**2
+
+        if not free.any():
+            step = np.zeros((0, 3))
+        elif self.jacobian == "constant":
+            lu = self.__constant(engine=engine, dt=dt, free=free)
+            step = lu.solve(np.ascontiguousarray(rhs[free]))
+        else:
+            lu, ju, free3 = self.__full(engine=engine, dt=dt, free=free, u=u)
+            rhs = rhs.ravel()
+            if ju is not None:
+                rhs = rhs - dt**2 * (ju @ u.ravel())
+            step = lu.solve(rhs[free3]).reshape(-1, 3)
+
+        engine.vel[free] = step
+        engine.prev_pos[free] = engine.pos[free]
+        engine.pos[free] += step
+
+        if not acc_is_costant:
+            engine.acc.fill(0)
+
+        engine.clip(clip_pos=clip_pos)
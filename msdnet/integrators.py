@@ -0,0 +1,149 @@
+"""
+
+Explicit integrators (position Verlet, velocity Verlet, symplectic Euler, RK4) with fixed or adaptive substeps
+
+"""
+
+import numpy as np
+from msdnet.engine import norm
+
+
+METHODS = ["verlet", "velocity_verlet", "euler", "rk4"]
+
+
+class ExplicitIntegrator():
+
+    evaluates_forces = True # spring and damper forces are evaluated at each stage (see Engine.step)
+
+    def __init__(self, method: str = "verlet", substeps: int = 1, max_strain: float|None = None, max_speed: float|None = None, max_substeps: int = 16) -> None:
+
+        """
+        Create explicit integrator. The state of a mass is its position x and its velocity v = (pos - prev_pos)/dt,
+        the acceleration a(x, v) = (external + springs(x) + dampers(v·dt))/m + g is evaluated at each stage.
+        The damping d stays a velocity factor per step (d^(1/n) on each of n substeps).
+
+            verlet -> position Verlet (see Mass.update_position), dampers use the velocity of the previous substep
+            velocity_verlet -> half kick, drift, half kick (second order)
+            euler -> symplectic Euler: v += a(x, v)·h, then x += v·h
+            rk4 -> classic Runge-Kutta (fourth order, four force evaluations per substep)
+
+        Each step is split in n substeps of dt/n: n = substeps, or adaptive with max_strain and/or max_speed:
+        n = ceil(max(strain/max_strain, speed/max_speed)) at the start of the step, limited to [substeps, max_substeps].
+        Quiet passages run at dt, strikes are refined automatically (counters in stats)
+
+        method: str, see METHODS
+        substeps: int, (minimum) substeps per step
+        max_strain: float|None, largest spring strain |l - L|/L integrated in a single substep
+        max_speed: float|None, largest mass speed (position units per unit of time) integrated in a single substep
+        max_substeps: int, upper limit of the adaptive substeps
+        """
+
+        try:
+            assert method in METHODS
+            assert 1 <= substeps <= max_substeps
+            assert max_strain is None or max_strain > 0
+            assert max_speed is None or max_speed > 0
+        except:
+            print(f"[ERROR] method must be one of {METHODS}, 1 <= substeps <= max_substeps and max_strain, max_speed > 0!\n")
+            exit(0)
+
+        self.method = method
+        self.substeps = substeps
+        self.max_strain = max_strain
+        self.max_speed = max_speed
+        self.max_substeps = max_substeps
+
+        # counters
+        self.last = 0 # substeps of the last step
+        self.total = {"steps": 0, "substeps": 0, "refined": 0} # refined -> steps with more than substeps
+
+
+    def __count(self, engine, v: np.ndarray) -> int:
+
+        ratio = 0.0
+        if self.max_strain is not None and engine.s1.size:
+            delta = engine.pos[..., engine.s2, :] - engine.pos[..., engine.s1, :]
+            length = engine.length
+            strain = np.abs(norm(delta) - length)/np.where(length > 0, length, 1)
+            ratio = max(ratio, float(strain.max())/self.max_strain)
+        if self.max_speed is not None and v.size:
+            ratio = max(ratio, float(norm(v).max())/self.max_speed)
+
+        if not np.isfinite(ratio):
+            return self.max_substeps
+        return min(max(self.substeps, int(np.ceil(ratio))), self.max_substeps)
+
+
+    def integrate(self, engine, dt: float, acc_is_costant: bool = False, clip_pos: tuple|None = None) -> None:
+
+        """
+        advance the free masses by dt (same interface of Engine.integrate)
+
+        engine: Engine, compiled network (acc holds the external and contact forces)
+        """
+
+        free = engine.movable()[..., None]
+        inv_m = 1/engine.m[..., None]
+        base = engine.acc + engine.g # external forces and gravity, constant over the step
+
+        def acc(x: np.ndarray, v: np.ndarray) -> np.ndarray:
+            a = base + engine.internal_forces(pos=x, vel=v * dt) * inv_m
+            return np.where(free, a, 0)
+
+        x = engine.pos.copy()
+        v = np.where(free, (engine.pos - engine.prev_pos)/dt, 0)
+        lag = engine.vel/dt # velocity of the previous step (verlet dampers)
+
+        n = self.__count(engine=engine, v=v)
+        h = dt/n
+        damp = engine.d[..., None] ** (1/n)
+
+        for _ in range(n):
+            if self.method == "verlet":
+                a = acc(x, lag)
+                lag = v
+                v = v * damp + a * h
+                x = x + v * h
+            elif self.method == "euler":
+                v = v * damp + acc(x, v) * h
+                x = x + v * h
+            elif self.method == "velocity_verlet":
+                half = v + acc(x, v) * (h/2)
+                x = x + half * h
+                v = (half + acc(x, half) * (h/2)) * damp
+            else:
+                k1x, k1v = v, acc(x, v)
+                k2x = v + k1v * (h/2)
+                k2v = acc(x + k1x * (h/2), k2x)
+                k3x = v + k2v * (h/2)
+                k3v = acc(x + k2x * (h/2), k3x)
+                k4x = v + k3v * h
+                k4v = acc(x + k3x * h, k4x)
+                x = x + (k1x + 2 * k2x + 2 * k3x + k4x) * (h/6)
+                v = (v + (k1v + 2 * k2v + 2 * k3v + k4v) * (h/6)) * damp
+
+        # back to the engine state: pos - prev_pos is the velocity per step, vel the one seen by the dampers
+        np.copyto(engine.vel, (lag if self.method == "verlet" else v) * dt, where=free)
+        np.copyto(engine.prev_pos, x - v * dt, where=free)
+        np.copyto(engine.pos, x, where=free)
+
+        if not acc_is_costant:
+            engine.acc.fill(0)
+
+        engine.clip(clip_pos=clip_pos)
+
+        self.last = n
+        self.total["steps"] += 1
+        self.total["substeps"] += n
+        self.total["refined"] += n > self.substeps
+
+
+    def stats(self) -> dict:
+
+        """
+        counters snapshot
+
+        return: dict, substeps of the last step, total steps, substeps and refined steps, mean substeps per step
+        """
+
+        return {"last": self.last, **self.total, "mean": self.total["substeps"]/max(self.total["steps"], 1)}
@@ -7,33 +7,129 @@ import numpy as np
 
 
 class Interact():
-    def __init__(self, network: dict, masses: dict, canvas_size: tuple[int, int]) -> None:
-        self.net = network
-        self.masses = masses
+    def __init__(self, network: "MSDNet", canvas_size: tuple[int, int], grab_radius: float|None = None) -> None:
+
+        """
+        move (left button pressed) and free (right button pressed) the masses
+
+        network: MSDNet, network on the canvas (the pick index and the drag work on its engine arrays)
+        canvas_size: tuple[int, int], canvas size
+        grab_radius: float|None, if None pick the mass under the mouse (within its radius),
+            otherwise grab all the masses within grab_radius pixels from the mouse
+        """
+
+        try:
+            assert hasattr(network, "engine") and hasattr(network, "masses")
+        except:
+            print("[ERROR] network must be a MSDNet!\n")
+            exit(0)
+
+        self.network = network
+        self.masses = network.masses
         self.width = canvas_size[0]
         self.height = canvas_size[1]
         self.mouse = pg.mouse
+        self.grab_radius = grab_radius
+
+        self.size = np.array([self.width, self.height], dtype=float)
+        self.grabbed = np.zeros(0, dtype=np.intp) # masses moved by the mouse
+        self.offset = np.zeros((0, 2)) # position of the grabbed masses from the mouse
+
+        # uniform grid of the screen positions (see update)
+        self.engine = None
+        self.cell = 1.0
+        self.pos = None
+        self.order = None
+        self.keys = None
+
+    def update(self) -> None:
+
+        """
+        rebuild the pick index from the current positions (once per frame)
+        """
+
+        engine = self.network.engine
+        pos = engine.frame[:, :2] * self.size
+
+        radius = engine.radius.max() if engine.radius.size else 1.0
+        self.cell = max(float(self.grab_radius if self.grab_radius is not None else radius), 1.0)
+
+        # only the masses on (or next to) the canvas, a network that blew up has far and non finite positions
+        with np.errstate(invalid="ignore"):
+            near = np.flatnonzero(((pos >= -self.cell) & (pos < self.size + self.cell)).all(axis=1))
+        keys = self.__key(np.floor(pos[near]/self.cell).astype(np.int64))
+        order = np.argsort(keys, kind="stable")
+        self.order = near[order]
+        self.keys = keys[order]
+        self.pos = pos
+        self.engine = engine
+
+    @staticmethod
+    def __key(cell: np.ndarray) -> np.ndarray:
+        return cell[..., 0] * 1_000_003 + cell[..., 1]
+
+    def pick(self, point: tuple[float, float]) -> np.ndarray:
+
+        """
+        masses under point (without grab_radius only the nearest one)
+
+        point: tuple[float, float], screen coordinates
+
+        return: np.ndarray, indexes of the masses
+        """
+
+        if self.engine is None or self.engine is not self.network.engine:
+            self.update()
+
+        point = np.asarray(point, dtype=float)
+        cx, cy = np.floor(point/self.cell).astype(np.int64)
+        cells = np.array([[cx + i, cy + j] for i in (-1, 0, 1) for j in (-1, 0, 1)], dtype=np.int64)
+        keys = self.__key(cells)
+        start = np.searchsorted(self.keys, keys, side="left")
+        end = np.searchsorted(self.keys, keys, side="right")
+        candidates = np.concatenate([self.order[a:b] for a, b in zip(start, end)])
+
+        if candidates.size == 0:
+            return candidates
+
+        d = self.pos[candidates] - point
+        dist = np.sqrt(np.einsum("ij,ij->i", d, d))
+        radius = self.grab_radius if self.grab_radius is not None else self.engine.radius[candidates]
+        inside = dist < radius
+
+        if self.grab_radius is None and np.count_nonzero(inside) > 1:
+            nearest = np.flatnonzero(inside)[np.argmin(dist[inside])]
+            return candidates[nearest:nearest + 1]
+        return candidates[inside]
 
     def interact_with_mass(self, event: pg.event):
 
-        for mass in self.net:
-            curr_pos = np.array([self.net[mass]["x"] * self.width, self.net[mass]["y"] * self.height], dtype=float)
-            mouse_pos = self.mouse.get_pos()
-            mouse_pos = np.array([mouse_pos[0], mouse_pos[1]], dtype=float)
-            dist = np.sqrt(np.sum(np.square(curr_pos - mouse_pos)))
-
-            if dist < self.masses[mass].radius:
-                if self.mouse.get_pressed()[2]:
-                    self.masses[mass].anchored = False
-
-                if event.type == pg.MOUSEBUTTONDOWN:
-                    self.masses[mass].is_pressed = True
-                    self.masses[mass].is_anchored_press = True
-                if event.type == pg.MOUSEBUTTONUP:
-                    for mass_pressed in self.masses:
-                        self.masses[mass_pressed].is_pressed = False
-                        self.masses[mass_pressed].is_anchored_press = False
-            
-                if self.mouse.get_pressed()[0] and self.masses[mass].is_pressed:
-                    self.masses[mass].pos = np.array([self.mouse.get_pos()[0]/self.width, self.mouse.get_pos()[1]/self.height, 0])
-                    self.masses[mass].prev_pos = self.masses[mass].pos
+        engine = self.network.engine
+        mouse_pos = np.array(event.pos if hasattr(event, "pos") else self.mouse.get_pos(), dtype=float)
+        pressed = self.mouse.get_pressed()
+
+        if event.type == pg.MOUSEBUTTONDOWN or pressed[2]:
+            hits = self.pick(point=mouse_pos)
+
+            if pressed[2]:
+                engine.anchored[hits] = False
+                if engine.sleep is not None:
+                    engine.sleep.wake(rows=hits)
+
+            if event.type == pg.MOUSEBUTTONDOWN and hits.size:
+                self.grabbed = hits
+                self.offset = self.pos[hits] - mouse_pos
+                engine.pressed[hits] = True
+                for i in hits:
+                    self.masses[engine.names[i]].is_pressed = True
+
+        if event.type == pg.MOUSEBUTTONUP and self.grabbed.size:
+            engine.pressed[self.grabbed] = False
+            for i in self.grabbed:
+                self.masses[engine.names[i]].is_pressed = False
+            self.grabbed = np.zeros(0, dtype=np.intp)
+
+        if pressed[0] and self.grabbed.size:
+            pos = (mouse_pos + self.offset)/self.size
+            engine.pos[self.grabbed, :2] = pos
+            engine.prev_pos[self.grabbed, :2] = pos
@@ -0,0 +1,66 @@
+"""
+
+Islands: connected components of the spring/damper graph of a MSDNetwork
+
+"""
+
+import numpy as np
+
+try:
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+except ImportError:
+    connected_components = None
+
+
+def components(n: int, i: np.ndarray, j: np.ndarray) -> tuple[int, np.ndarray]:
+
+    """
+    connected components of a graph of n nodes (scipy.sparse.csgraph if available, union-find otherwise)
+
+    n: int, number of nodes (masses)
+    i: np.ndarray, first node of each edge
+    j: np.ndarray, second node of each edge
+
+    return: number of components, component of each node (numbered by first node: component 0 holds node 0)
+    """
+
+    if connected_components is not None:
+        graph = coo_matrix((np.ones(i.size, dtype=np.int8), (i, j)), shape=(n, n))
+        count, labels = connected_components(graph, directed=False)
+    else:
+        parent = list(range(n))
+
+        def root(a: int) -> int:
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            return a
+
+        for a, b in zip(i.tolist(), j.tolist()):
+            ra, rb = root(a), root(b)
+            if ra != rb:
+                parent[max(ra, rb)] = min(ra, rb)
+
+        labels = np.array([root(a) for a in range(n)], dtype=np.int64)
+        count = int(np.unique(labels).size)
+
+    # renumber by first node, so that the labels do not depend on the backend
+    _, first, inverse = np.unique(labels, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first))
+    return int(count), order[inverse].astype(np.intp)
+
+
+def network_components(engine) -> tuple[int, np.ndarray]:
+
+    """
+    islands of a compiled network: masses joined by springs or dampers
+
+    engine: Engine, compiled network
+
+    return: number of islands, island of each mass
+    """
+
+    i = np.concatenate((engine.s1, engine.d1))
+    j = np.concatenate((engine.s2, engine.d2))
+    return components(n=engine.n_masses, i=i, j=j)
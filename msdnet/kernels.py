@@ -0,0 +1,172 @@
+"""
+
+Compiled kernels (optional, used only when numba is importable)
+
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def verlet_step(pos, prev_pos, vel, acc, frame, m, d, g, free, s1, s2, k, length, d1, d2, c, dt, acc_is_costant, clip, low, high):
+
+    """
+    one step of the network fused in a single loop over edges and masses:
+    spring forces, damper drag, Verlet update (with gravity) and clip_pos bouncing.
+    External and hammer forces are already in acc.
+    Same operations in the same order of the NumPy path (Engine.step), so the results are identical.
+    It releases the GIL: the islands of msdnet.parallel run on several threads
+    """
+
+    n = pos.shape[0]
+    fs = np.zeros((n, 3))
+    fd = np.zeros((n, 3))
+
+    # springs: F = -k · x
+    f = np.empty((s1.shape[0], 3))
+    for e in range(s1.shape[0]):
+        i, j = s1[e], s2[e]
+        dx = pos[j, 0] - pos[i, 0]
+        dy = pos[j, 1] - pos[i, 1]
+        dz = pos[j, 2] - pos[i, 2]
+        mag = np.sqrt(dx * dx + dy * dy + dz * dz)
+        safe = mag if mag > 0 else 1.0
+        s = k[e] * (mag - length[e])/safe
+        f[e, 0] = dx * s
+        f[e, 1] = dy * s
+        f[e, 2] = dz * s
+    for e in range(s1.shape[0]):
+        for x in range(3):
+            fs[s1[e], x] += f[e, x]
+    for e in range(s1.shape[0]):
+        for x in range(3):
+            fs[s2[e], x] -= f[e, x]
+
+    # dampers: F = -c·v^2
+    f = np.empty((d1.shape[0], 3))
+    for e in range(d1.shape[0]):
+        i, j = d1[e], d2[e]
+        dx = vel[j, 0] - vel[i, 0]
+        dy = vel[j, 1] - vel[i, 1]
+        dz = vel[j, 2] - vel[i, 2]
+        s = c[e] * np.sqrt(dx * dx + dy * dy + dz * dz)
+        f[e, 0] = dx * s
+        f[e, 1] = dy * s
+        f[e, 2] = dz * s
+    for e in range(d1.shape[0]):
+        for x in range(3):
+            fd[d1[e], x] += f[e, x]
+    for e in range(d1.shape[0]):
+        for x in range(3):
+            fd[d2[e], x] -= f[e, x]
+
+    # Verlet
+    dt2 = dt**2
+    for i in range(n):
+        for x in range(3):
+            acc[i, x] += (fs[i, x] + fd[i, x])/m[i]
+            frame[i, x] = pos[i, x]
+            if free[i]:
+                acc[i, x] += g[i, x]
+                vel[i, x] = pos[i, x] - prev_pos[i, x]
+                prev_pos[i, x] = pos[i, x]
+                pos[i, x] = pos[i, x] + (vel[i, x] * d[i] + acc[i, x] * dt2)
+            if not acc_is_costant:
+                acc[i, x] = 0.0
+            if clip:
+                if pos[i, x] <= low:
+                    prev_pos[i, x] = pos[i, x]
+                    pos[i, x] = low
+                    vel[i, x] *= -0.987
+                if pos[i, x] >= high:
+                    prev_pos[i, x] = pos[i, x]
+                    pos[i, x] = high
+                    vel[i, x] *= -0.987
+
+
+if njit is not None:
+    verlet_step = njit(cache=True, nogil=True)(verlet_step) # nogil -> islands run at the same time (see msdnet.parallel)
+
+
+def verlet_steps(n_steps, pos, prev_pos, vel, acc, frame, m, d, g, free, s1, s2, k, length, d1, d2, c, dt, acc_is_costant, clip, low, high):
+
+    """
+    n_steps steps of verlet_step in a single call (nothing runs between the steps, see Engine.run)
+    """
+
+    for _ in range(n_steps):
+        verlet_step(pos, prev_pos, vel, acc, frame, m, d, g, free, s1, s2, k, length, d1, d2, c, dt, acc_is_costant, clip, low, high)
+
+
+if njit is not None:
+    verlet_steps = njit(cache=True, nogil=True)(verlet_steps)
+
+
+def draw_network(pixels, pos, radius, s1, s2, mass_color, spring_color):
+
+    """
+    masses (discs) and then springs (lines) of a network drawn into a W x H pixel buffer,
+    springs clipped to the buffer (Liang-Barsky), non finite positions skipped.
+    Same pixels of the NumPy path (msdnet.draw.draw_network)
+    """
+
+    w, h = pixels.shape
+    for i in range(pos.shape[0]):
+        if not (pos[i, 0] >= -radius[i] and pos[i, 0] < w + radius[i] and pos[i, 1] >= -radius[i] and pos[i, 1] < h + radius[i]):
+            continue
+        cx, cy = int(np.floor(pos[i, 0])), int(np.floor(pos[i, 1]))
+        r = int(np.rint(radius[i]))
+        for dy in range(-r, r + 1):
+            for dx in range(-r, r + 1):
+                if dx * dx + dy * dy <= r * r:
+                    x, y = cx + dx, cy + dy
+                    if x >= 0 and x < w and y >= 0 and y < h:
+                        pixels[x, y] = mass_color
+
+    p = np.empty(4)
+    q = np.empty(4)
+    for e in range(s1.shape[0]):
+        ax, ay, bx, by = pos[s1[e], 0], pos[s1[e], 1], pos[s2[e], 0], pos[s2[e], 1]
+        if not (np.isfinite(ax) and np.isfinite(ay) and np.isfinite(bx) and np.isfinite(by)):
+            continue
+
+        # Liang-Barsky
+        dx, dy = bx - ax, by - ay
+        if not (np.isfinite(dx) and np.isfinite(dy)):
+            continue
+        p[0], p[1], p[2], p[3] = -dx, dx, -dy, dy
+        q[0], q[1], q[2], q[3] = ax, (w - 1) - ax, ay, (h - 1) - ay
+        t0, t1, keep = 0.0, 1.0, True
+        for side in range(4):
+            if p[side] == 0:
+                if q[side] < 0:
+                    keep = False
+            elif p[side] < 0:
+                t0 = max(t0, q[side]/p[side])
+            else:
+                t1 = min(t1, q[side]/p[side])
+        if not keep or t0 > t1:
+            continue
+        if t1 < 1:
+            bx, by = ax + t1 * dx, ay + t1 * dy
+        if t0 > 0:
+            ax, ay = ax + t0 * dx, ay + t0 * dy
+        ax, ay = min(max(ax, 0.0), w - 1.0), min(max(ay, 0.0), h - 1.0)
+        bx, by = min(max(bx, 0.0), w - 1.0), min(max(by, 0.0), h - 1.0)
+
+        x0, y0 = int(np.floor(ax)), int(np.floor(ay))
+        ex, ey = int(np.floor(bx)) - x0, int(np.floor(by)) - y0
+        steps = max(abs(ex), abs(ey))
+        for j in range(steps + 1):
+            t = j/max(steps, 1)
+            x, y = int(np.rint(x0 + ex * t)), int(np.rint(y0 + ey * t))
+            if x >= 0 and x < w and y >= 0 and y < h:
+                pixels[x, y] = spring_color
+
+
+if njit is not None:
+    draw_network = njit(cache=True, nogil=True)(draw_network)
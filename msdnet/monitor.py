@@ -0,0 +1,165 @@
+"""
+
+Monitor: energy and strain of the whole network every K steps, early abort of diverging runs
+
+"""
+
+import numpy as np
+from msdnet.engine import norm
+
+
+class Monitor():
+
+    def __init__(self, every: int = 100, growth: float = 1e3, window: int = 8, limit: float|None = None, max_strain: float|None = None, action: str = "abort") -> None:
+
+        """
+        Create monitor. Every every steps it computes (vectorized over all the masses and springs)
+        the kinetic energy 1/2·m·v^2 (v = (pos - prev_pos)/dt), the spring potential energy 1/2·k·(l - L)^2
+        and the largest spring strain |l - L|/L, and appends them to the trace.
+        The run diverges when:
+
+            nan -> energy or strain are not finite (NaN/inf positions)
+            growth -> the energy grew at each of the last window checks and by more than growth in total
+                (unstable steps grow exponentially, strikes and inputs add energy once)
+            limit -> the energy is larger than limit
+            strain -> the largest strain is larger than max_strain
+
+        every: int, steps between two checks
+        growth: float, total energy growth over window checks
+        window: int, checks of steady growth
+        limit: float|None, largest energy
+        max_strain: float|None, largest spring strain
+        action: str, ["abort", "flag"]
+            abort -> raise FloatingPointError at the first divergence (the run stops at once)
+            flag -> set diverged, reason and step and go on
+        """
+
+        try:
+            assert every >= 1 and window >= 1 and growth > 1
+            assert action in ["abort", "flag"]
+        except:
+            print("[ERROR] every and window must be >= 1, growth > 1 and action abort or flag!\n")
+            exit(0)
+
+        self.every = every
+        self.growth = growth
+        self.window = window
+        self.limit = limit
+        self.max_strain = max_strain
+        self.action = action
+
+        self.buffer = np.zeros((64, 4)) # step, kinetic, potential, strain (grown by doubling)
+        self.size = 0
+        self.rising = 0 # consecutive checks with growing energy
+
+        self.diverged = False
+        self.reason = None
+        self.step = None # step of the first divergence
+
+
+    def measure(self, network) -> tuple[float, float, float]:
+
+        """
+        energy and strain of the network now
+
+        network: MSDNet
+
+        return: kinetic energy, potential energy, largest strain
+        """
+
+        engine = network.engine
+        v = (engine.pos - engine.prev_pos)/network.dt
+        kinetic = 0.5 * float(np.sum(engine.m[..., None] * v * v))
+
+        if not engine.s1.size:
+            return kinetic, 0.0, 0.0
+
+        length = engine.length
+        stretch = norm(engine.pos[..., engine.s2, :] - engine.pos[..., engine.s1, :]) - length
+        potential = 0.5 * float(np.sum(engine.k * stretch * stretch))
+        strain = float(np.max(np.abs(stretch)/np.where(length > 0, length, 1)))
+        return kinetic, potential, strain
+
+
+    def check(self, network, step: int) -> None:
+
+        """
+        measure the network every every steps (called by the network after each step)
+
+        network: MSDNet
+        step: int, steps done
+        """
+
+        if step % self.every:
+            return
+
+        kinetic, potential, strain = self.measure(network=network)
+        energy = kinetic + potential
+
+        if self.size == self.buffer.shape[0]:
+            self.buffer = np.concatenate((self.buffer, np.zeros_like(self.buffer)))
+        self.buffer[self.size] = step, kinetic, potential, strain
+        self.size += 1
+
+        energies = self.buffer[:self.size, 1] + self.buffer[:self.size, 2]
+        if self.size > 1 and energy > energies[-2]:
+            self.rising += 1
+        else:
+            self.rising = 0
+
+        reason = None
+        if not (np.isfinite(energy) and np.isfinite(strain)):
+            reason = "nan"
+        elif self.limit is not None and energy > self.limit:
+            reason = "limit"
+        elif self.max_strain is not None and strain > self.max_strain:
+            reason = "strain"
+        elif self.rising >= self.window and energy > self.growth * energies[-1 - self.window]:
+            reason = "growth"
+
+        if reason is None or self.diverged:
+            return
+
+        self.diverged = True
+        self.reason = reason
+        self.step = step
+        if self.action == "abort":
+            raise FloatingPointError(f"network diverged at step {step} ({reason}: energy {energy:.6g}, strain {strain:.6g})")
+
+
+    def trace(self) -> np.ndarray:
+
+        """
+        measures so far
+
+        return: np.ndarray (T, 4) -> step, kinetic energy, potential energy, largest strain
+        """
+
+        return self.buffer[:self.size]
+
+
+    def energy(self) -> np.ndarray:
+
+        """
+        total energy of each check
+
+        return: np.ndarray (T,)
+        """
+
+        return self.buffer[:self.size, 1] + self.buffer[:self.size, 2]
+
+
+    def stats(self) -> dict:
+
+        """
+        counters snapshot
+
+        return: dict -> {"checks", "diverged", "reason", "step", "energy", "strain"} (last energy and strain, None if not finite)
+        """
+
+        last = self.buffer[self.size - 1] if self.size else np.zeros(4)
+        energy, strain = float(last[1] + last[2]), float(last[3])
+        return {
+            "checks": self.size, "diverged": self.diverged, "reason": self.reason, "step": self.step,
+            "energy": energy if np.isfinite(energy) else None, "strain": strain if np.isfinite(strain) else None
+        }
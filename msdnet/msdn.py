@@ -3,29 +3,51 @@ MSDN (Mass-Spring-Damper Network)
 
 """
 
-from msdnet.network_components import Mass, Spring, Damper
+from msdnet.network_components import Mass, Spring, Damper, bound
+from msdnet.engine import Engine, MotionView, norm
+from msdnet.draw import draw_network
+from msdnet.tables import ComponentTable, MassParams, SpringParams
+from msdnet.storage import save_arrays, load_arrays
+from msdnet.kernels import njit, draw_network as draw_compiled
 import numpy as np
 from msdnet.interact import Interact
 import pygame as pg
+import json
+import time
 
 class MSDNet():
 
     def __init__(self) -> None:
         
-        self.masses = dict()
-        self.springs = dict()
-        self.dampers = dict()
+        # name -> component tables (components added in bulk are created on first access, see msdnet.tables)
+        self.masses = ComponentTable(make=self.__make_mass)
+        self.springs = ComponentTable(make=self.__make_spring)
+        self.dampers = ComponentTable(make=self.__make_damper)
+        self.damper_spring = [] # spring row of each damper (-1 -> none)
 
-        self.mass_params = dict() # mass parameters
-        self.masses_motion = dict() # motion of masses
-        self.spring_params = dict() # spring parameters
+        self.mass_params = MassParams(network=self) # mass parameters
+        self.spring_params = SpringParams(network=self) # spring parameters
 
         self.external_forces = dict()
 
-        self.motion = dict()
+        self.motion = MotionView(network=self) # current position of all masses, dict[mass][pos]
+
+        self.__engine = None # compiled arrays, built lazily (see compile)
+        self.__changed = True # the network changed since the last compile
 
         self.g = np.zeros(3)
         self.dt = 0.1
+        self.integrator = None # None -> Verlet (see add_integrator)
+        self.backend = "numpy" # see add_backend
+        self.collision = None # None -> masses pass through each other (see add_collision)
+        self.recorder = None # trajectory capture (see add_recorder)
+        self.schedule = None # hammer shots applied in the step loop (see add_schedule)
+        self.inputs = dict() # name -> input signal driving masses, one sample per step (see add_input)
+        self.profiler = None # per-phase timers of the step loop (see add_profiler)
+        self.monitor = None # energy and strain checks, abort on blow-up (see add_monitor)
+        self.sleep = None # quiescent islands skipped by the step (see add_sleep)
+        self.parallel = None # islands stepped on a thread pool (see add_parallel)
+        self.steps = 0 # steps since the last reset
     
 
     def add_dt(self, dtime: float) -> None:
@@ -39,6 +61,261 @@ class MSDNet():
         self.dt = dtime
     
 
+    def add_integrator(self, integrator: str = "verlet", **kwargs) -> None:
+
+        """
+        set integration method
+
+        integrator: str, ["verlet", "velocity_verlet", "euler", "rk4", "implicit"]
+            verlet -> position Verlet (see Mass.update_position)
+            velocity_verlet -> velocity Verlet (second order)
+            euler -> symplectic Euler
+            rk4 -> fourth order Runge-Kutta
+            implicit -> backward Euler on a sparse stiffness matrix, stable with stiff springs and large dt (requires scipy)
+        kwargs:
+            explicit -> substeps, max_strain, max_speed, max_substeps: fixed or adaptive substeps of dt
+                (see msdnet.integrators.ExplicitIntegrator, counters in network.integrator.stats())
+            implicit -> jacobian, ["constant", "full"] (see msdnet.implicit.ImplicitIntegrator)
+        """
+
+        from msdnet.integrators import METHODS
+
+        try:
+            assert integrator in METHODS + ["implicit"]
+        except:
+            print("[ERROR] integrator not yet implemented!\n")
+            exit(0)
+
+        if integrator == "verlet" and not kwargs:
+            self.integrator = None # built-in step (numba backend)
+        elif integrator == "implicit":
+            from msdnet.implicit import ImplicitIntegrator
+            self.integrator = ImplicitIntegrator(**kwargs)
+        else:
+            from msdnet.integrators import ExplicitIntegrator
+            self.integrator = ExplicitIntegrator(method=integrator, **kwargs)
+
+
+    def add_backend(self, backend: str = "numpy") -> None:
+
+        """
+        set computation backend of the Verlet step
+
+        backend: str, ["numpy", "numba"]
+            numpy -> vectorized NumPy
+            numba -> spring, damper, gravity, Verlet update and clip_pos fused in a single compiled loop (same results of numpy).
+                Used only if numba is importable, otherwise numpy is used
+        """
+
+        try:
+            assert backend in ["numpy", "numba"]
+        except:
+            print("[ERROR] backend must be numpy or numba!\n")
+            exit(0)
+
+        if backend == "numba" and njit is None:
+            print("[WARNING] numba not found, using numpy backend\n")
+            backend = "numpy"
+
+        self.backend = backend
+        if self.__engine is not None:
+            self.__engine.backend = backend
+
+
+    def add_collision(self, k: float, scale: float, c: float = 0.0, exclude_connected: bool = True) -> None:
+
+        """
+        enable mass-mass collision (masses collide when closer than the sum of their radius)
+
+        k: float, contact stiffness (0 -> disable collision)
+        scale: float, radius -> position units (radius is in pixels, for example 1/800 on a 800 x 800 canvas)
+        c: float, contact damping
+        exclude_connected: bool, if True masses joined by a spring or a damper do not collide
+        (see msdnet.collision.Collision, counters in network.collision.stats())
+        """
+
+        if k == 0:
+            self.collision = None
+            return
+
+        from msdnet.collision import Collision
+        self.collision = Collision(k=k, scale=scale, c=c, exclude_connected=exclude_connected)
+
+
+    def add_recorder(self, capacity: int|None = None, path: str|None = None, velocities: bool = False, **kwargs):
+
+        """
+        record the motion of the network at each step (run_network, run_steps, render...)
+
+        capacity: int|None, keep the last capacity steps in a ring buffer in memory
+        path: str|None, record all the steps in a memory-mapped file (long runs)
+        velocities: bool, if True record the velocities too
+        kwargs: chunk, dtype (see msdnet.recorder.Recorder)
+
+        return: Recorder -> recorder.positions(), recorder.velocities() (T, N, 3)
+        """
+
+        from msdnet.recorder import Recorder
+        if self.recorder is not None:
+            self.recorder.close()
+        self.recorder = Recorder(shape=self.engine.frame.shape, capacity=capacity, path=path, velocities=velocities, **kwargs)
+        return self.recorder
+
+
+    def add_schedule(self, schedule) -> None:
+
+        """
+        strike the network with a schedule of hammer shots, applied before the scheduled steps
+        (run_network, run_steps, render, Synth...)
+
+        schedule: StrikeSchedule|None, see msdnet_tools.hammer.StrikeSchedule (None -> remove the schedule)
+        """
+
+        self.schedule = schedule
+
+
+    def add_input(self, name: str, signal, path: list[tuple], gains: float|np.ndarray = 1.0):
+
+        """
+        drive masses with an input signal (for example a recorded sound), one sample per step:
+        at step t each element of the path gets the force signal[t]·gain on its coordinate (run_network, run_steps, render, Synth...)
+
+        name: str, input name (an input with the same name is replaced)
+        signal: np.ndarray|Iterable|None, T (mono) or T x P samples (P = length of the path), an iterable of such blocks
+            (pulled when needed, so long files are never loaded at once) or None (push the blocks with input.push)
+        path: list[tuple], masses and coordinates driven by the input -> [(mass_name, coordinate), ...]
+        gains: float|np.ndarray, gain of each element of the path
+
+        return: InputSignal (see msdnet.excitation.InputSignal)
+        """
+
+        from msdnet.excitation import InputSignal
+
+        rows, cols = self.__path_index(path=path)
+        gains = np.broadcast_to(np.asarray(gains, dtype=float), rows.shape).copy()
+        self.inputs[name] = InputSignal(signal=signal, rows=rows, cols=cols, gains=gains)
+        return self.inputs[name]
+
+
+    def __path_index(self, path: list[tuple]) -> tuple[np.ndarray, np.ndarray]:
+
+        index = {"x": 0, "y": 1, "z": 2}
+
+        try:
+            assert len(path) and all(mass in self.masses and coord in index for mass, coord in path)
+        except:
+            print("[ERROR] path must be a non empty list of (mass_name, coordinate), coordinate -> x, y, z!\n")
+            exit(0)
+
+        rows = self.masses.index([mass for mass, _ in path])
+        cols = np.array([index[coord] for _, coord in path], dtype=np.intp)
+        return rows, cols
+
+
+    def add_profiler(self, enabled: bool = True, callback = None):
+
+        """
+        time the phases of each step (schedule, inputs, external forces, springs, dampers, collision, integration, recording...).
+        When disabled (default) the step loop only checks that the profiler is None
+
+        enabled: bool, False -> remove the profiler
+        callback: callable|None, called at the end of each step -> callback(network, step, phases) (see msdnet.profiler.Profiler)
+
+        return: Profiler|None -> counters in network.stats()
+        """
+
+        from msdnet.profiler import Profiler
+
+        self.profiler = Profiler(callback=callback) if enabled else None
+        if self.__engine is not None:
+            self.__engine.profiler = self.profiler
+        return self.profiler
+
+
+    def add_monitor(self, every: int = 100, **kwargs):
+
+        """
+        check energy and strain of the network every every steps, abort (or flag) the run when it diverges (NaN, energy blow-up)
+
+        every: int, steps between two checks (0 -> remove the monitor)
+        kwargs: growth, window, limit, max_strain, action (see msdnet.monitor.Monitor)
+
+        return: Monitor|None -> monitor.trace() (T, 4) step, kinetic, potential energy, largest strain
+        """
+
+        if every == 0:
+            self.monitor = None
+            return None
+
+        from msdnet.monitor import Monitor
+        self.monitor = Monitor(every=every, **kwargs)
+        return self.monitor
+
+
+    def add_sleep(self, enabled: bool = True, speed: float = 1e-7, force: float = 1e-8, steps: int = 60):
+
+        """
+        freeze the islands (masses joined by springs or dampers) that stay at rest and skip them in the step,
+        they wake up when a force, an input, a hammer shot or the mouse reaches them
+
+        enabled: bool, False -> remove sleeping (all the masses move again)
+        speed: float, displacement per step of a mass at rest
+        force: float, displacement per step due to the net force of a mass at rest
+        steps: int, steps at rest before an island falls asleep
+
+        return: Sleep|None (see msdnet.sleep.Sleep, counters in network.stats())
+        """
+
+        from msdnet.sleep import Sleep
+
+        self.sleep = Sleep(speed=speed, force=force, steps=steps) if enabled else None
+        if self.__engine is not None:
+            self.__engine.sleep = self.sleep
+        return self.sleep
+
+
+    def add_parallel(self, enabled: bool = True, workers: int|None = None, min_masses: int = 256):
+
+        """
+        step the islands of the network (masses joined by springs or dampers, for example the instruments of a patch)
+        at the same time on a thread pool, same results of the serial step
+
+        enabled: bool, False -> remove the thread pool (serial step)
+        workers: int|None, threads (None -> number of cpus)
+        min_masses: int, islands smaller than min_masses are packed in a single task
+
+        return: Parallel|None (see msdnet.parallel.Parallel, per-island timings in network.stats())
+        """
+
+        from msdnet.parallel import Parallel
+
+        if self.parallel is not None:
+            self.parallel.close()
+        self.parallel = Parallel(workers=workers, min_masses=min_masses) if enabled else None
+        if self.__engine is not None:
+            self.__engine.parallel = self.parallel
+        return self.parallel
+
+
+    def stats(self) -> dict:
+
+        """
+        counters snapshot of the network (plain types, ready for json.dumps, for example one line per render in a log)
+
+        return: dict -> {"steps", "profile" (see Profiler.stats), "collision" (see Collision.stats), "integrator" (see ExplicitIntegrator.stats),
+            "monitor" (see Monitor.stats), "sleep" (see Sleep.stats), "parallel" (see Parallel.stats)}, None for the parts that are not enabled
+        """
+
+        def snapshot(part):
+            return part.stats() if hasattr(part, "stats") else None
+
+        return {
+            "steps": self.steps, "profile": snapshot(self.profiler), "collision": snapshot(self.collision),
+            "integrator": snapshot(self.integrator), "monitor": snapshot(self.monitor), "sleep": snapshot(self.sleep),
+            "parallel": snapshot(self.parallel)
+        }
+
+
     def add_gravity(self, g: list[float, float, float]) -> None:
         self.g = np.array(g, dtype=float)
     
@@ -59,21 +336,7 @@ class MSDNet():
 
         mass = Mass(name=name, m=m, pos=pos, d=d, radius=r, anchored=anchored, g=self.g)
         self.masses[name] = mass
-
-        self.mass_params[name] = {
-            "start": pos,
-            "weight": m,
-            "radius": r,
-            }
-
-        self.masses_motion[name] = {
-            "x": [],
-            "y": [],
-            "z": [],
-            "xyz": []
-        }
-        
-        self.motion[name] = {"x": pos[0], "y": pos[1], "z": pos[2]}
+        self.__changed = True
 
 
     def lock_unlock_mass(self, name: str, anchored: bool):
@@ -86,6 +349,8 @@ class MSDNet():
         """
 
         self.masses[name].anchored = anchored
+        if self.sleep is not None:
+            self.sleep.wake(rows=self.masses.index([name]))
 
 
     def add_spring(self, name: str, k: float, length: float, m1: str, m2: str) -> None:
@@ -102,13 +367,7 @@ class MSDNet():
 
         spring = Spring(name=name, k=k, length=length, m1=self.masses[m1], m2=self.masses[m2])
         self.springs[name] = spring
-        self.spring_params[name] = {
-            "stiffness": k,
-            "length": length,
-            "link": f"{self.masses[m1].name} < -- > {self.masses[m2].name}",
-            "m1": self.masses[m1].name,
-            "m2": self.masses[m2].name
-        }
+        self.__changed = True
     
 
     def add_damper(self, name: str, c: float, spring: str) -> None:
@@ -123,7 +382,158 @@ class MSDNet():
 
         damper = Damper(name=name, c=c, m1=self.springs[spring].m1, m2=self.springs[spring].m2)
         self.dampers[name] = damper
-        self.spring_params[spring].update({"damper": name, "c": c})
+        self.__changed = True
+
+        row = self.dampers.rows[name]
+        if row == len(self.damper_spring):
+            self.damper_spring.append(self.springs.rows[spring])
+        else:
+            self.damper_spring[row] = self.springs.rows[spring]
+
+
+    def add_masses(self, positions: np.ndarray, m: float|np.ndarray, d: float|np.ndarray, r: float|np.ndarray, anchored: bool|np.ndarray = False, names: list[str]|None = None) -> np.ndarray:
+
+        """
+        add many masses at once (same as add_mass for each row, without creating the Mass objects:
+        they are created when accessed, see msdnet.tables.ComponentTable)
+
+        positions: np.ndarray, N x 3 positions (N x 2 -> z = 0)
+        m: float|np.ndarray, mass in kg (one value or N values, the same for d, r and anchored)
+        d: float|np.ndarray, air friction factor
+        r: float|np.ndarray, radius of mass
+        anchored: bool|np.ndarray, if True the mass is anchored
+        names: list[str]|None, mass names (None -> "m<row>")
+
+        return: np.ndarray, rows of the new masses (edges of add_springs)
+        """
+
+        positions = np.asarray(positions, dtype=float)
+        n = positions.shape[0]
+        start = len(self.masses)
+        names = [f"m{i}" for i in range(start, start + n)] if names is None else list(names)
+
+        try:
+            assert positions.ndim == 2 and positions.shape[1] in [2, 3] and len(names) == n
+        except:
+            print("[ERROR] positions must be N x 3 (or N x 2) with one name for each mass!\n")
+            exit(0)
+
+        pos = np.zeros((n, 3))
+        pos[:, :positions.shape[1]] = positions
+        m = np.broadcast_to(np.asarray(m, dtype=float), (n,)).copy()
+
+        arrays = {
+            "m": m,
+            "d": np.broadcast_to(np.asarray(d, dtype=float), (n,)),
+            "radius": np.broadcast_to(np.asarray(r, dtype=float), (n,)),
+            "anchored": np.broadcast_to(np.asarray(anchored, dtype=bool), (n,)),
+            "pressed": False,
+            "g": self.g * m[:, None],
+            "pos": pos, "prev_pos": pos, "start_pos": pos, "frame": pos,
+            "vel": 0.0, "acc": 0.0
+        }
+
+        self.__changed = True
+        return self.masses.extend(names=names, arrays=arrays)
+
+
+    def add_springs(self, edges: np.ndarray, k: float|np.ndarray, length: float|np.ndarray|None = None, c: float|np.ndarray|None = None, names: list[str]|None = None, damper_names: list[str]|None = None) -> np.ndarray:
+
+        """
+        add many springs at once (and a damper on each of them if c is given)
+
+        edges: np.ndarray, E x 2 masses (rows, for example from add_masses, or names) -> [m1, m2]
+        k: float|np.ndarray, stiffness in N/m (one value or E values, the same for length and c)
+        length: float|np.ndarray|None, spring length (None -> distance of the masses at their start positions)
+        c: float|np.ndarray|None, damping factor of the dampers (None -> no dampers)
+        names: list[str]|None, spring names (None -> "s<row>")
+        damper_names: list[str]|None, damper names (None -> "d<row>")
+
+        return: np.ndarray, rows of the new springs
+        """
+
+        edges = self.masses.index(edges)
+        try:
+            assert edges.ndim == 2 and edges.shape[1] == 2
+            assert edges.size == 0 or (edges.min() >= 0 and edges.max() < len(self.masses))
+        except:
+            print("[ERROR] edges must be E x 2 masses of the network!\n")
+            exit(0)
+
+        n = edges.shape[0]
+        start = len(self.springs)
+        names = [f"s{i}" for i in range(start, start + n)] if names is None else list(names)
+        if length is None:
+            start_pos = self.engine.start_pos
+            length = norm(start_pos[edges[:, 1]] - start_pos[edges[:, 0]])
+
+        arrays = {
+            "s1": edges[:, 0], "s2": edges[:, 1],
+            "k": np.broadcast_to(np.asarray(k, dtype=float), (n,)),
+            "length": np.broadcast_to(np.asarray(length, dtype=float), (n,))
+        }
+        rows = self.springs.extend(names=names, arrays=arrays)
+        self.__changed = True
+
+        if c is not None:
+            self.__add_dampers(springs=rows, edges=edges, c=c, names=damper_names)
+
+        return rows
+
+
+    def add_dampers(self, springs: np.ndarray, c: float|np.ndarray, names: list[str]|None = None) -> np.ndarray:
+
+        """
+        add many dampers at once, one on each spring
+
+        springs: np.ndarray, springs (rows, for example from add_springs, or names)
+        c: float|np.ndarray, damping factor (one value or one for each spring)
+        names: list[str]|None, damper names (None -> "d<row>")
+
+        return: np.ndarray, rows of the new dampers
+        """
+
+        springs = self.springs.index(springs).ravel()
+        try:
+            assert springs.size == 0 or (springs.min() >= 0 and springs.max() < len(self.springs))
+        except:
+            print("[ERROR] springs must be springs of the network!\n")
+            exit(0)
+
+        engine = self.engine
+        edges = np.stack((engine.s1[springs], engine.s2[springs]), axis=1)
+        return self.__add_dampers(springs=springs, edges=edges, c=c, names=names)
+
+
+    def __add_dampers(self, springs: np.ndarray, edges: np.ndarray, c: float|np.ndarray, names: list[str]|None) -> np.ndarray:
+
+        n = springs.size
+        start = len(self.dampers)
+        names = [f"d{i}" for i in range(start, start + n)] if names is None else list(names)
+
+        arrays = {"d1": edges[:, 0], "d2": edges[:, 1], "c": np.broadcast_to(np.asarray(c, dtype=float), (n,))}
+        rows = self.dampers.extend(names=names, arrays=arrays)
+        self.damper_spring.extend(springs.tolist())
+        self.__changed = True
+        return rows
+
+
+    def __make_mass(self, row: int) -> Mass:
+        return bound(Mass, engine=self.engine, index=row, name=self.masses.names[row], is_pressed=False)
+
+    def __make_spring(self, row: int) -> Spring:
+        engine = self.engine
+        return bound(
+            Spring, engine=engine, index=row, name=self.springs.names[row],
+            m1=self.masses[engine.names[engine.s1[row]]], m2=self.masses[engine.names[engine.s2[row]]]
+        )
+
+    def __make_damper(self, row: int) -> Damper:
+        engine = self.engine
+        return bound(
+            Damper, engine=engine, index=row, name=self.dampers.names[row],
+            m1=self.masses[engine.names[engine.d1[row]]], m2=self.masses[engine.names[engine.d2[row]]]
+        )
 
 
     def add_external_force(self, name: str, direction: list[float], masses: str|list[str] = "all", mode: str = "always_on") -> None:
@@ -148,29 +558,121 @@ class MSDNet():
         }
 
         self.external_forces[name] = params
-    
+        self.__changed = True
+
+
+    def compile(self) -> Engine:
+
+        """
+        compile the network into arrays (positions, previous positions, accelerations, masses, damping,
+        anchor flags as N x 3 / N arrays, springs and dampers as edge-index arrays).
+        Masses, springs and dampers stay usable: their attributes read and write the compiled arrays.
+        Called automatically by run_network after the network has been changed
 
-    def __generate_external_force(self):
+        return: Engine
+        """
+
+        previous = self.__engine
+        rows = self.masses.rows
+        arrays = self.masses.assemble(fields=Engine.mass_arrays, specs=Engine.specs, previous=previous, values=Engine.mass_values)
+        arrays |= self.springs.assemble(
+            fields=Engine.spring_arrays, specs=Engine.specs, previous=previous,
+            values=lambda springs: Engine.spring_values(springs=springs, row=rows)
+        )
+        arrays |= self.dampers.assemble(
+            fields=Engine.damper_arrays, specs=Engine.specs, previous=previous,
+            values=lambda dampers: Engine.damper_values(dampers=dampers, row=rows)
+        )
+
+        return self.__install(arrays=arrays)
+
+
+    def __install(self, arrays: dict) -> Engine:
+
+        # new engine from the arrays of the tables rows, bound to the components
+        engine = Engine.from_arrays(arrays=arrays, names=self.masses.names, external_forces=self.external_forces, row=self.masses.rows)
+        engine.backend = self.backend
+        engine.profiler = self.profiler
+        engine.sleep = self.sleep
+        engine.parallel = self.parallel
+        for table in (self.masses, self.springs, self.dampers):
+            table.bind(engine=engine)
+
+        self.__engine = engine
+        self.__changed = False
+        return engine
+
+
+    def reorder(self, method: str = "rcm", edges: bool = True) -> np.ndarray:
+
+        """
+        renumber the masses of a built network so that connected (or close) masses are close in memory:
+        the gather of positions and the scatter of forces of the springs walk the arrays almost in order (large meshes).
+        Names keep their masses (Scanner paths, hammer paths, inputs, lock_unlock_mass, run_steps(masses=...) keep working),
+        only the rows change: network.masses.rows maps names to the new rows. Same results of the original order
+        (up to the rounding of the force sums when edges is True).
+        Call it once the network is built (trajectories recorded before are in the old row order)
+
+        method: str|np.ndarray, ["rcm", "morton"] or the old row of each new row
+            rcm -> reverse Cuthill-McKee on the spring/damper graph (smallest bandwidth, see msdnet.ordering)
+            morton -> Z-order curve of the start positions
+        edges: bool, if True springs and dampers are sorted by their first mass in the new order
+
+        return: np.ndarray, old row of each new row
+        """
+
+        from msdnet.ordering import METHODS, order
+
+        engine = self.engine
+        n = engine.n_masses
+        try:
+            assert not engine.batch
+            if isinstance(method, str):
+                assert method in METHODS
+                masses = order(engine=engine, method=method)
+            else:
+                masses = np.asarray(method, dtype=np.intp)
+                assert np.array_equal(np.sort(masses), np.arange(n))
+        except:
+            print(f"[ERROR] method must be one of {METHODS} or a permutation of the mass rows!\n")
+            exit(0)
+
+        inverse = np.empty(n, dtype=np.intp)
+        inverse[masses] = np.arange(n)
+        s1, s2, d1, d2 = inverse[engine.s1], inverse[engine.s2], inverse[engine.d1], inverse[engine.d2]
 
-        for force in self.external_forces:
+        # springs and dampers in the order of their masses (endpoints are not swapped: the force sign stays)
+        springs = np.lexsort((np.maximum(s1, s2), np.minimum(s1, s2))) if edges else np.arange(s1.size)
+        dampers = np.lexsort((np.maximum(d1, d2), np.minimum(d1, d2))) if edges else np.arange(d1.size)
 
-            f = self.external_forces[force]["force"]
-            w = self.external_forces[force]["where"]
-            mode = self.external_forces[force]["mode"]
+        arrays = {name: getattr(engine, name)[masses] for name in Engine.mass_arrays}
+        arrays |= {"s1": s1[springs], "s2": s2[springs], "k": engine.k[springs], "length": engine.length[springs]}
+        arrays |= {"d1": d1[dampers], "d2": d2[dampers], "c": engine.c[dampers]}
 
-            if w == "all":
-                for mass in self.masses:
-                    self.masses[mass].apply_force(f)
-            if isinstance(w, list):
-                for mass in w:
-                    self.masses[mass].apply_force(f)
-            if mode in ["one_shot", "rand_shot"]:
-                self.external_forces[force]["force"] *= 0
-            if mode == "rand_shot":
-                v, p = np.random.rand(), np.random.rand() * 0.01
-                if v < p:
-                    direc = np.random.choice([-1, 1])
-                    self.external_forces[force]["force"] = direc * self.external_forces[force]["start_force"]
+        spring_row = np.empty(springs.size, dtype=np.intp)
+        spring_row[springs] = np.arange(springs.size)
+        self.damper_spring = [int(spring_row[spring]) if spring >= 0 else -1 for spring in np.asarray(self.damper_spring, dtype=np.intp)[dampers].tolist()]
+
+        self.masses.permute(order=masses)
+        self.springs.permute(order=springs)
+        self.dampers.permute(order=dampers)
+        for source in self.inputs.values():
+            source.rows = inverse[source.rows]
+
+        self.__install(arrays=arrays)
+        return masses
+
+
+    @property
+    def engine(self) -> Engine:
+
+        """
+        compiled network (compile it if needed)
+        """
+
+        if self.__changed:
+            self.compile()
+        return self.__engine
 
     
     def reset_network(self) -> None:
@@ -179,33 +681,132 @@ class MSDNet():
         reset network... take the network to zero time
         """
 
-        for mass in self.masses:
-            self.masses[mass].pos = self.masses[mass].start_pos
-            self.masses[mass].vel = np.zeros(3)
-            self.masses[mass].acc = np.zeros(3)
-            for coord in self.masses_motion[mass]:
-                self.masses_motion[mass][coord] = []
+        self.engine.reset()
+        self.steps = 0
     
 
-    def __in_motion(self, clip_pos, acc_is_costant=False) -> None:
+    def save(self, path: str, compressed: bool = False) -> None:
 
-        for spring in self.springs:
-            self.springs[spring].generate_spring_force()
+        """
+        save topology and current state of the network in a .npz archive (see load)
 
-        for damper in self.dampers:
-            self.dampers[damper].generate_drag_force()
-        
-        if self.external_forces:
-            self.__generate_external_force()
-        
-        for mass in self.masses:
-            self.motion[mass]["x"] = self.masses[mass].pos[0] 
-            self.motion[mass]["y"] = self.masses[mass].pos[1] 
-            self.motion[mass]["z"] = self.masses[mass].pos[2] 
-            
-            self.masses[mass].update_position(dt=self.dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos)
+        mass, spring and damper arrays, names, external forces, gravity, dt, the current pos, prev_pos, vel, acc
+        and the step count (a schedule added to the loaded network goes on from the same step)
+        (integrator, backend, collision, recorder, schedule, inputs, profiler, monitor, sleep and parallel are not saved)
+
+        path: str, file name (.npz)
+        compressed: bool, if True the archive is compressed (smaller, but it can not be memory-mapped)
+        """
+
+        engine = self.engine
+        arrays = {name: getattr(engine, name) for name in Engine.mass_arrays + Engine.edge_arrays}
+
+        arrays["mass_names"] = np.array(engine.names, dtype=str)
+        arrays["spring_names"] = np.array(self.springs.names, dtype=str)
+        arrays["damper_names"] = np.array(self.dampers.names, dtype=str)
+        arrays["damper_spring"] = np.array(self.damper_spring, dtype=np.intp)
+
+        forces = {
+            name: {"force": params["force"].tolist(), "start_force": params["start_force"].tolist(), "where": params["where"], "mode": params["mode"]}
+            for name, params in self.external_forces.items()
+        }
+        arrays["network"] = np.array(json.dumps({"g": self.g.tolist(), "dt": self.dt, "external_forces": forces, "steps": self.steps}))
+
+        save_arrays(path=path, arrays=arrays, compressed=compressed)
+
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str|None = None) -> "MSDNet":
+
+        """
+        load a network saved with save, it resumes from the saved state
+
+        path: str, file name (.npz)
+        mmap_mode: str|None, None -> read the arrays, "c" -> map the arrays of an uncompressed archive on the file
+            (copy on write: the network runs, the file is not changed), "r" -> read only (inspection, it can not run)
+
+        return: MSDNet
+        """
+
+        try:
+            arrays = load_arrays(path=path, mmap_mode=mmap_mode)
+            meta = json.loads(str(arrays["network"]))
+            assert all(name in arrays for name in Engine.mass_arrays + Engine.edge_arrays + ["damper_spring"])
+            assert all(key in meta for key in ["g", "dt", "external_forces", "steps"])
+        except:
+            print(f"[ERROR] {path} is not a saved network (see MSDNet.save)!\n")
+            exit(0)
+
+        net = cls()
+        net.add_gravity(meta["g"])
+        net.add_dt(meta["dt"])
+        for name, params in meta["external_forces"].items():
+            net.external_forces[name] = {
+                "force": np.array(params["force"], dtype=float),
+                "start_force": np.array(params["start_force"], dtype=float),
+                "where": params["where"],
+                "mode": params["mode"]
+            }
+
+        names = arrays["mass_names"].tolist()
+        engine = Engine.from_arrays(arrays=arrays, names=names, external_forces=net.external_forces)
+        engine.backend = net.backend
+
+        # tables of the engine rows (components are created on first access)
+        net.masses.attach(names=names)
+        net.springs.attach(names=arrays["spring_names"].tolist())
+        net.dampers.attach(names=arrays["damper_names"].tolist())
+        net.damper_spring = arrays["damper_spring"].tolist()
+
+        net.steps = int(meta["steps"])
+        net.__engine = engine
+        net.__changed = False
+        return net
+
+
+    def __in_motion(self, clip_pos, acc_is_costant=False) -> None:
+
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin()
+
+        if self.schedule is not None:
+            self.schedule.apply(network=self, step=self.steps)
+            if profiler is not None:
+                profiler.mark("schedule")
+        if self.inputs:
+            for source in self.inputs.values():
+                source.apply(engine=self.engine)
+            if profiler is not None:
+                profiler.mark("inputs")
+        self.engine.step(dt=self.dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos, integrator=self.integrator, collision=self.collision)
+        if self.recorder is not None:
+            self.recorder.capture(engine=self.engine)
+            if profiler is not None:
+                profiler.mark("record")
+        self.steps += 1
+        if self.monitor is not None:
+            self.monitor.check(network=self, step=self.steps)
+            if profiler is not None:
+                profiler.mark("monitor")
+
+        if profiler is not None:
+            profiler.end(network=self)
 
     
+    def __advance(self, n_steps: int, clip_pos, acc_is_costant=False) -> None:
+
+        # n_steps steps: one engine call (see Engine.run) when nothing runs between the steps
+        if n_steps <= 0:
+            return
+        if self.schedule is None and not self.inputs and self.recorder is None and self.monitor is None and self.profiler is None:
+            self.engine.run(n_steps=n_steps, dt=self.dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos, integrator=self.integrator, collision=self.collision)
+            self.steps += n_steps
+        else:
+            for _ in range(n_steps):
+                self.__in_motion(clip_pos=clip_pos, acc_is_costant=acc_is_costant)
+
+
     def run_network(self, clip_pos: tuple|None = None, acc_is_costant: bool = False) -> dict["MSDNet"]:
 
         """
@@ -220,15 +821,123 @@ class MSDNet():
         self.__in_motion(clip_pos=clip_pos, acc_is_costant=acc_is_costant)
         return self.motion
 
+
+    def run_steps(self, n_steps: int, clip_pos: tuple|None = None, acc_is_costant: bool = False, stride: int = 1, masses: list[str]|None = None, coordinates: str = "xyz", out: np.ndarray|None = None) -> np.ndarray:
+
+        """
+        set network in motion for n_steps and record the trajectory
+
+        n_steps: int, number of steps
+        stride: int, record one step every stride steps (decimation)
+        masses: list[str]|None, masses to record (None -> all masses)
+        coordinates: str, coordinates to record, any of "x", "y", "z" (for example "xyz", "y", "xz")
+        out: np.ndarray|None, buffer of shape (T, M, C) where to write the trajectory (preallocated if None)
+
+        return -> np.ndarray (T, M, C), T = ceil(n_steps/stride), M = number of recorded masses, C = number of coordinates.
+            out[t] is what run_network returns at step t * stride
+        """
+
+        index = {"x": 0, "y": 1, "z": 2}
+
+        try:
+            assert n_steps >= 0 and stride >= 1
+            assert coordinates and all(c in index for c in coordinates)
+        except:
+            print("[ERROR] n_steps must be >= 0, stride >= 1 and coordinates any of x, y, z!\n")
+            exit(0)
+
+        engine = self.engine
+        rows = None if masses is None else self.masses.index(masses)
+        cols = None if coordinates == "xyz" else np.array([index[c] for c in coordinates], dtype=np.intp)
+        shape = ((n_steps + stride - 1)//stride, engine.n_masses if rows is None else rows.size, len(coordinates))
+
+        if out is None:
+            out = np.empty(shape)
+        else:
+            try:
+                assert out.shape == shape
+            except:
+                print(f"[ERROR] out must have shape {shape}!\n")
+                exit(0)
+        
+        # step t·stride is recorded, the stride - 1 steps in between run in a single call (see __advance)
+        for t in range(shape[0]):
+            self.__in_motion(clip_pos=clip_pos, acc_is_costant=acc_is_costant)
+            frame = engine.frame if rows is None else engine.frame[rows]
+            out[t] = frame if cols is None else frame[:, cols]
+            self.__advance(n_steps=min(stride, n_steps - t * stride) - 1, clip_pos=clip_pos, acc_is_costant=acc_is_costant)
+        
+        return out
+
+
+    def filter_blocks(self, blocks, path: list[tuple], listen: list[tuple], gains: float|np.ndarray = 1.0, clip_pos: tuple|None = None, name: str = "filter"):
+
+        """
+        use the network as a physical-model filter: each input block drives path (see add_input)
+        and the positions at listen are returned for each step of the block
+
+        blocks: Iterable, blocks of input samples (B or B x P)
+        path: list[tuple], driven masses and coordinates -> [(mass_name, coordinate), ...]
+        listen: list[tuple], output masses and coordinates -> [(mass_name, coordinate), ...]
+        gains: float|np.ndarray, gain of each element of path
+        name: str, name of the input while filtering (removed at the end)
+
+        return -> Generator of np.ndarray (B, L), L = length of listen
+        """
+
+        source = self.add_input(name=name, signal=None, path=path, gains=gains)
+        rows, cols = self.__path_index(path=listen)
+
+        try:
+            for block in blocks:
+                source.push(block)
+                out = np.empty((len(block), rows.size))
+                for t in range(len(block)):
+                    self.__in_motion(clip_pos=clip_pos)
+                    out[t] = self.engine.frame[rows, cols]
+                yield out
+        finally:
+            if self.inputs.get(name) is source:
+                del self.inputs[name]
+
+
+    def audio_blocks(self, path: list[tuple], freq: float, block_size: int = 256, sr: int = 48000, **kwargs):
+
+        """
+        real-time scanned synthesis: pull fixed-size float32 blocks of audio scanning path
+
+        path: list[tuple], path to scan -> [(mass_name, coordinate), ...]
+        freq: float, scan frequency (pitch) in Hz
+        block_size: int, samples per block
+        sr: int, sample rate
+        kwargs: see msdnet_tools.synth.Synth (rate, hammer, clip_pos, gain, ...)
+
+        return -> AudioBlocks, iterator of blocks, with per-block compute time vs deadline (see AudioBlocks.stats)
+        """
+
+        from msdnet_tools.synth import Synth
+
+        synth = Synth(network=self, path=path, freq=freq, sr=sr, **kwargs)
+        return synth.blocks(block_size=block_size)
+
     
-    def render(self, canvas_size: tuple[int, int], clip_pos: tuple[float, float], fps: int = 60, acc_is_costant: bool = False) -> None:
+    def render(self, canvas_size: tuple[int, int], clip_pos: tuple[float, float], fps: int = 60, acc_is_costant: bool = False, rate: float|None = None, max_steps: int = 100, stats: bool = True, frames: int|None = None, grab_radius: float|None = None) -> None:
 
         """
-        render and show network with pygame
+        render and show network with pygame.
+        Fixed timestep: the physics runs at rate steps per second whatever the frame rate,
+        all the steps of a frame are run before drawing it, in a single engine call when nothing runs between them (see Engine.run).
+        Masses and springs are rasterized all at once into the screen pixels (msdnet.draw, compiled with the numba backend)
 
-        surface: pg.Surface
-        event: pg.event, main loop events
         canvas_size: tuple[int, int], canvas size
+        clip_pos: tuple[float, float], see run_network
+        fps: int, frame rate
+        acc_is_costant: bool, see run_network
+        rate: float|None, physics steps per second (None -> fps, one step per frame)
+        max_steps: int, maximum physics steps per frame (if the physics can not keep up, the simulation slows down)
+        stats: bool, show physics steps/sec and frame time
+        frames: int|None, number of frames to render (None -> until the window is closed)
+        grab_radius: float|None, grab all the masses within grab_radius pixels from the mouse (None -> the mass under the mouse, see Interact)
         """
 
         pg.init()
@@ -237,43 +946,59 @@ class MSDNet():
         win = (w, h)
         screen = pg.display.set_mode(win)
         clock = pg.time.Clock()
-        fps = fps
+        font = pg.font.Font(None, 20)
+        rate = fps if rate is None else rate
+        scale = np.array([w, h], dtype=float)
+
+        interact = Interact(network=self, canvas_size=canvas_size, grab_radius=grab_radius)
 
-        interact = Interact(network=self.motion, masses=self.masses, canvas_size=canvas_size)
+        mass_color, spring_color = screen.map_rgb((255, 0, 0)), screen.map_rgb((255, 255, 255))
+        accumulator = 0.0
+        last = time.perf_counter()
+        count, count_start, steps_per_sec = 0, last, 0.0
+        frame = 0
 
         run = True
         while run:
-            self.run_network(clip_pos=clip_pos, acc_is_costant=acc_is_costant)
-
+            now = time.perf_counter()
+            accumulator += (now - last) * rate
+            last = now
+            steps = min(int(accumulator), max_steps)
+            accumulator = min(accumulator - steps, 1.0)
+            self.__advance(n_steps=steps, clip_pos=clip_pos, acc_is_costant=acc_is_costant)
+
+            interact.update()
             for event in pg.event.get():
                 if event.type == pg.QUIT:
                     run = False
-                    pg.quit()
 
                 interact.interact_with_mass(event=event)
 
-            w = canvas_size[0]
-            h = canvas_size[1]
-
-            for mass in self.motion:
-                m = self.motion[mass]
-                x = m["x"] * w
-                y = m["y"] * h
-
-                pg.draw.circle(surface=screen, color=(255, 0, 0), center=(x, y), radius=self.masses[mass].radius)
-            
-            for spring in self.spring_params:
-                m1_name= self.spring_params[spring]["m1"]
-                m2_name = self.spring_params[spring]["m2"]
-
-                m1 = self.motion[m1_name]
-                m2 = self.motion[m2_name]
+            if not run:
+                break
+
+            # whole network rasterized in one shot into the screen pixels (see msdnet.draw)
+            engine = self.engine
+            pos = engine.frame[:, :2] * scale
+            pixels = pg.surfarray.pixels2d(screen)
+            draw = draw_compiled if self.backend == "numba" else draw_network
+            draw(pixels, pos, engine.radius, engine.s1, engine.s2, mass_color, spring_color)
+            del pixels # unlock the screen
+
+            count += steps
+            if now - count_start >= 1:
+                steps_per_sec = count/(now - count_start)
+                count, count_start = 0, now
+            if stats:
+                text = f"physics {steps_per_sec:.0f} steps/s | frame {clock.get_time()} ms ({clock.get_fps():.0f} fps)"
+                screen.blit(font.render(text, True, (255, 255, 0)), (10, 10))
 
-                x1, y1 = m1["x"] * w, m1["y"] * h
-                x2, y2 = m2["x"] * w, m2["y"] * h
-
-                pg.draw.line(screen, color=(255, 255, 255), start_pos=(x1, y1), end_pos=(x2, y2))
-            
             clock.tick(fps)
             pg.display.update()
-            screen.fill((0, 0, 0))
\ No newline at end of file
+            screen.fill((0, 0, 0))
+
+            frame += 1
+            if frames is not None and frame >= frames:
+                run = False
+
+        pg.quit()
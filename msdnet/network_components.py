@@ -26,8 +26,68 @@ def limit(v: list, max_value: float) -> list:
     return v
 
 
+class EngineField():
+
+    """
+    component attribute backed by the compiled Engine arrays.
+    Until the component is bound to an engine the value is kept in the component itself,
+    once bound read and write go through engine.<array>[component.index]
+
+    array: str, name of the Engine array
+    vector: bool, if True the value is a 3D vector
+    """
+
+    def __init__(self, array: str, vector: bool = False) -> None:
+        self.array = array
+        self.vector = vector
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.local = f"_{name}"
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        if obj.engine is not None:
+            return getattr(obj.engine, self.array)[obj.index]
+        return getattr(obj, self.local)
+
+    def __set__(self, obj, value) -> None:
+        if self.vector:
+            value = np.array(value, dtype=float)
+        if obj.engine is not None:
+            getattr(obj.engine, self.array)[obj.index] = value
+        else:
+            setattr(obj, self.local, value)
+
+
+def bound(cls, engine, index: int, **attributes):
+
+    """
+    component of class cls bound to the engine row index, without initializing its fields
+    (they are already in the engine arrays, see MSDNet.load)
+
+    attributes: plain attributes of the component (name, m1, m2...)
+    """
+
+    component = cls.__new__(cls)
+    component.__dict__.update(attributes, engine=engine, index=index)
+    return component
+
+
 class Mass():
 
+    m = EngineField("m")
+    d = EngineField("d")
+    radius = EngineField("radius")
+    anchored = EngineField("anchored")
+    is_anchored_press = EngineField("pressed")
+    g = EngineField("g", vector=True)
+    pos = EngineField("pos", vector=True)
+    prev_pos = EngineField("prev_pos", vector=True)
+    vel = EngineField("vel", vector=True)
+    acc = EngineField("acc", vector=True)
+    start_pos = EngineField("start_pos", vector=True)
+
     def __init__(self, name: str, m: float, pos: list[float], d: float, radius: float, g: list[float, float, float], anchored: bool = False) -> None:
 
         """
@@ -40,6 +100,9 @@ class Mass():
         anchored: bool, if True the mass is anchored
         """
 
+        self.engine = None # compiled Engine, see MSDNet.compile
+        self.index = None # row of the mass in the Engine arrays
+
         self.name = name
         self.m = m
         self.d = d
@@ -91,6 +154,9 @@ class Mass():
 
 class Spring():
 
+    k = EngineField("k")
+    length = EngineField("length")
+
     def __init__(self, name: str, k: float, length: float, m1: Mass, m2: Mass) -> None:
 
 
@@ -104,6 +170,9 @@ class Spring():
         m2: Mass, mass anchored to the left of the spring
         """
 
+        self.engine = None
+        self.index = None
+
         self.name = name
         self.k = k
         self.length = length
@@ -128,6 +197,8 @@ class Spring():
 
 class Damper():
 
+    c = EngineField("c")
+
     def __init__(self, name: str, c: float, m1: Mass, m2: Mass) -> None:
 
 
@@ -139,6 +210,9 @@ class Damper():
         m2: Mass, mass anchored to the left of the spring
         """
 
+        self.engine = None
+        self.index = None
+
         self.name = name
         self.c = c
         self.m1 = m1
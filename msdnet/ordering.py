@@ -0,0 +1,118 @@
+"""
+
+Ordering: cache-friendly renumbering of the masses of a MSDNetwork (see MSDNet.reorder)
+
+"""
+
+import numpy as np
+
+try:
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import reverse_cuthill_mckee
+except ImportError:
+    reverse_cuthill_mckee = None
+
+
+METHODS = ["rcm", "morton"]
+
+
+def bandwidth(i: np.ndarray, j: np.ndarray) -> dict:
+
+    """
+    distance in memory (rows) between the two masses of each edge
+
+    i: np.ndarray, first mass of each edge
+    j: np.ndarray, second mass of each edge
+
+    return: dict -> {"bandwidth": largest distance, "mean": mean distance}
+    """
+
+    if not i.size:
+        return {"bandwidth": 0, "mean": 0.0}
+    span = np.abs(i.astype(np.int64) - j.astype(np.int64))
+    return {"bandwidth": int(span.max()), "mean": float(span.mean())}
+
+
+def rcm(n: int, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+
+    """
+    reverse Cuthill-McKee order of a graph of n nodes (scipy.sparse.csgraph if available, breadth-first search otherwise):
+    connected nodes get close rows, the bandwidth of the graph becomes small
+
+    n: int, number of nodes (masses)
+    i: np.ndarray, first node of each edge
+    j: np.ndarray, second node of each edge
+
+    return: np.ndarray, old row of each new row
+    """
+
+    if reverse_cuthill_mckee is not None:
+        graph = coo_matrix((np.ones(i.size, dtype=np.int8), (i, j)), shape=(n, n)).tocsr()
+        return reverse_cuthill_mckee(graph, symmetric_mode=False).astype(np.intp)
+
+    # neighbours of each node sorted by degree, each component from a node of lowest degree
+    a = np.concatenate((i, j))
+    b = np.concatenate((j, i))
+    degree = np.bincount(a, minlength=n)
+    by = np.lexsort((degree[b], a))
+    start = np.concatenate(([0], np.cumsum(degree)))
+    neighbours = b[by].tolist()
+
+    order = []
+    seen = np.zeros(n, dtype=bool)
+    for root in np.argsort(degree, kind="stable").tolist():
+        if seen[root]:
+            continue
+        seen[root] = True
+        queue = [root]
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for other in neighbours[start[node]:start[node + 1]]:
+                if not seen[other]:
+                    seen[other] = True
+                    queue.append(other)
+        order.extend(queue)
+
+    return np.array(order[::-1], dtype=np.intp)
+
+
+def morton(pos: np.ndarray, bits: int = 10) -> np.ndarray:
+
+    """
+    Z-order (Morton) space-filling curve: masses close in space get close rows, whatever the springs
+
+    pos: np.ndarray, N x 3 positions
+    bits: int, bits of each coordinate (2^bits cells on each axis)
+
+    return: np.ndarray, old row of each new row
+    """
+
+    low = pos.min(axis=0)
+    size = np.where(pos.max(axis=0) > low, pos.max(axis=0) - low, 1)
+    cells = np.minimum(((pos - low)/size * (1 << bits)).astype(np.uint64), (1 << bits) - 1)
+
+    code = np.zeros(pos.shape[0], dtype=np.uint64)
+    for bit in range(bits):
+        for axis in range(3):
+            code |= ((cells[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit + axis)
+    return np.argsort(code, kind="stable").astype(np.intp)
+
+
+def order(engine, method: str) -> np.ndarray:
+
+    """
+    new order of the masses of a compiled network
+
+    engine: Engine, compiled network
+    method: str, see METHODS
+        rcm -> reverse Cuthill-McKee on the spring/damper graph (bandwidth reduction)
+        morton -> Z-order curve of the start positions
+
+    return: np.ndarray, old row of each new row
+    """
+
+    if method == "rcm":
+        return rcm(n=engine.n_masses, i=np.concatenate((engine.s1, engine.d1)), j=np.concatenate((engine.s2, engine.d2)))
+    return morton(pos=engine.start_pos)
@@ -0,0 +1,277 @@
+"""
+
+Parallel: islands of a MSDNetwork stepped at the same time on a thread pool
+
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import time
+import numpy as np
+from msdnet.engine import Engine
+from msdnet.islands import network_components
+
+
+def span(rows: np.ndarray) -> slice|None:
+
+    """
+    rows as a slice when they are a contiguous range (views of the engine arrays), None otherwise
+    """
+
+    if rows.size and rows[-1] - rows[0] + 1 == rows.size:
+        return slice(int(rows[0]), int(rows[-1]) + 1)
+    return None
+
+
+class Task():
+
+    def __init__(self, engine, islands: list[int], rows: np.ndarray, springs: np.ndarray, dampers: np.ndarray) -> None:
+
+        """
+        Create task: some islands of the engine stepped as a network of their own (a sub-engine).
+        When the rows (springs, dampers) of the task are a contiguous range the sub-engine arrays are views
+        of the engine arrays: the task works in place on a contiguous block of memory. Otherwise they are
+        gathered before and scattered back after each step
+
+        engine: Engine, compiled network
+        islands: list[int], islands of the task
+        rows: np.ndarray, sorted mass rows of the islands
+        springs: np.ndarray, sorted springs of the islands
+        dampers: np.ndarray, sorted dampers of the islands
+        """
+
+        self.islands = islands
+        self.rows = rows
+        self.springs = springs
+        self.dampers = dampers
+
+        # contiguous ranges -> views, None -> gathered
+        self.mass_span = span(rows)
+        self.spring_span = span(springs)
+        self.damper_span = span(dampers)
+        self.contiguous = self.mass_span is not None and (not springs.size or self.spring_span is not None) and (not dampers.size or self.damper_span is not None)
+
+        # local endpoints of the edges
+        if self.mass_span is not None:
+            local = lambda index: index - rows[0]
+        else:
+            local = lambda index: np.searchsorted(rows, index)
+
+        fields = Engine.mass_arrays + ["k", "length", "c"]
+        arrays = {field: getattr(engine, field)[self.where(field=field)] for field in fields}
+        arrays |= {
+            "s1": local(engine.s1[springs]).astype(np.intp), "s2": local(engine.s2[springs]).astype(np.intp),
+            "d1": local(engine.d1[dampers]).astype(np.intp), "d2": local(engine.d2[dampers]).astype(np.intp)
+        }
+        self.engine = Engine.from_arrays(arrays=arrays, names=[engine.names[row] for row in rows], external_forces={})
+        self.engine.backend = engine.backend
+        self.copies = [field for field in fields if not isinstance(self.where(field=field), slice)] # gathered at each step
+
+        # counters
+        self.time = 0.0
+        self.calls = 0
+
+
+    def where(self, field: str) -> slice|np.ndarray:
+
+        """
+        rows of the task in an engine array: a slice for the contiguous ranges, an index otherwise
+
+        field: str, engine array
+        """
+
+        if field in ["k", "length"]:
+            return self.spring_span if self.spring_span is not None else self.springs
+        if field == "c":
+            return self.damper_span if self.damper_span is not None else self.dampers
+        return self.mass_span if self.mass_span is not None else self.rows
+
+
+    def run(self, engine, dt: float, acc_is_costant: bool, clip_pos: tuple|None) -> None:
+
+        """
+        one step of the task (called by a worker thread, tasks share no rows)
+
+        engine: Engine, compiled network (external and contact forces already in acc)
+        """
+
+        start = time.perf_counter()
+        sub = self.engine
+        for field in self.copies:
+            np.take(getattr(engine, field), self.where(field=field), axis=0, out=getattr(sub, field))
+
+        sub.step(dt=dt, acc_is_costant=acc_is_costant, clip_pos=clip_pos)
+
+        if self.mass_span is None:
+            for field in ["pos", "prev_pos", "vel", "acc", "frame"]:
+                getattr(engine, field)[self.rows] = getattr(sub, field)
+
+        self.time += time.perf_counter() - start
+        self.calls += 1
+
+
+class Parallel():
+
+    def __init__(self, workers: int|None = None, min_masses: int = 256) -> None:
+
+        """
+        Create parallel stepper. The network is split in islands (masses joined by springs or dampers, see msdnet.islands):
+        islands do not exchange forces, so they can be stepped at the same time. Islands with at least min_masses masses
+        get a task of their own, the smaller ones are packed together in tasks of about min_masses masses;
+        each step the tasks run on a pool of workers threads (the compiled kernel and the large NumPy kernels release the GIL).
+        Results are the same of the serial step. Islands built one after the other (a network of several shapes)
+        are contiguous rows of the engine and each task works in place on its own block of memory.
+
+        Used by the built-in Verlet step (numpy and numba backends); the other integrators, ensembles, networks with
+        sleeping islands and networks with a single task run the serial step.
+        With collision the contact forces are evaluated on the whole network before the parallel step
+
+        workers: int|None, threads (None -> number of cpus)
+        min_masses: int, smallest island with a task of its own
+        """
+
+        try:
+            assert workers is None or workers >= 1
+            assert min_masses >= 1
+        except:
+            print("[ERROR] workers and min_masses must be >= 1!\n")
+            exit(0)
+
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.min_masses = min_masses
+
+        self.engine = None
+        self.count = 0 # islands
+        self.labels = None # island of each mass
+        self.tasks = []
+        self.pool = None
+
+        # counters
+        self.steps = 0
+        self.wall = 0.0 # seconds of the parallel steps
+
+
+    def bind(self, engine) -> None:
+
+        """
+        split the engine in islands and tasks (called automatically when the network is recompiled)
+
+        engine: Engine, compiled network
+        """
+
+        try:
+            assert not engine.batch
+        except:
+            print("[ERROR] parallel step does not support ensembles!\n")
+            exit(0)
+
+        self.count, self.labels = network_components(engine=engine)
+        sizes = np.bincount(self.labels, minlength=self.count)
+
+        # islands in row order: the large ones alone, the small ones packed together
+        group = np.empty(self.count, dtype=np.intp) # task of each island
+        groups, packed = 0, 0
+        for island in range(self.count):
+            if sizes[island] >= self.min_masses:
+                if packed:
+                    groups += 1
+                    packed = 0
+                group[island] = groups
+                groups += 1
+            else:
+                group[island] = groups
+                packed += sizes[island]
+                if packed >= self.min_masses:
+                    groups += 1
+                    packed = 0
+        groups += packed > 0
+
+        # rows, springs and dampers of each task (sorted: stable sort by task)
+        def split(task: np.ndarray) -> list[np.ndarray]:
+            order = np.argsort(task, kind="stable")
+            return np.split(order, np.cumsum(np.bincount(task, minlength=groups))[:-1])
+
+        rows = split(group[self.labels])
+        springs = split(group[self.labels[engine.s1]])
+        dampers = split(group[self.labels[engine.d1]])
+        islands = split(group)
+
+        self.tasks = [
+            Task(engine=engine, islands=islands[t].tolist(), rows=rows[t], springs=springs[t], dampers=dampers[t])
+            for t in range(groups)
+        ]
+
+        if self.pool is None and len(self.tasks) > 1:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="msdnet")
+        self.engine = engine
+
+
+    def ready(self, engine) -> bool:
+
+        """
+        bind the engine if it changed
+
+        engine: Engine, compiled network
+
+        return: bool, True if there are tasks to run in parallel
+        """
+
+        if engine is not self.engine:
+            self.bind(engine=engine)
+        return len(self.tasks) > 1
+
+
+    def step(self, engine, dt: float, acc_is_costant: bool = False, clip_pos: tuple|None = None) -> None:
+
+        """
+        step all the tasks on the pool and wait for them
+
+        engine: Engine, compiled network (external and contact forces already in acc)
+        dt: float, sample time
+        acc_is_costant: bool, if False reset accelerations after the update
+        clip_pos: tuple|None, (min, max) position, masses bounce on the limits
+        """
+
+        start = time.perf_counter()
+        backend = engine.backend
+        futures = []
+        for task in self.tasks:
+            task.engine.backend = backend
+            futures.append(self.pool.submit(task.run, engine, dt, acc_is_costant, clip_pos))
+        for future in futures:
+            future.result()
+
+        self.wall += time.perf_counter() - start
+        self.steps += 1
+
+
+    def close(self) -> None:
+
+        """
+        stop the worker threads
+        """
+
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+    def stats(self) -> dict:
+
+        """
+        counters snapshot
+
+        return: dict -> {"workers", "islands", "steps", "wall", "busy", "tasks": [{"islands", "masses", "springs", "dampers",
+            "contiguous", "time", "calls", "mean"}, ...]}, busy -> summed task time/wall time (about the cores in use)
+        """
+
+        tasks = [
+            {
+                "islands": [int(island) for island in task.islands], "masses": int(task.rows.size),
+                "springs": int(task.springs.size), "dampers": int(task.dampers.size), "contiguous": task.contiguous,
+                "time": task.time, "calls": task.calls, "mean": task.time/max(task.calls, 1)
+            }
+            for task in self.tasks
+        ]
+        busy = sum(task.time for task in self.tasks)/self.wall if self.wall > 0 else 0.0
+        return {"workers": self.workers, "islands": self.count, "steps": self.steps, "wall": self.wall, "busy": busy, "tasks": tasks}
@@ -0,0 +1,110 @@
+"""
+
+Profiler: per-phase timers and call counters of the step pipeline (opt in, see MSDNet.add_profiler)
+
+"""
+
+import time
+
+
+class Profiler():
+
+    def __init__(self, callback = None) -> None:
+
+        """
+        Create profiler. The step pipeline marks the end of each phase, the time since the previous mark
+        is added to the phase:
+
+            schedule -> strike schedule (see MSDNet.add_schedule)
+            inputs -> input signals (see MSDNet.add_input)
+            external -> external forces
+            springs, dampers, collision -> force evaluation (NumPy step)
+            kernel -> fused compiled step (numba backend)
+            parallel -> islands stepped on the thread pool (see MSDNet.add_parallel)
+            integrate -> position update
+            record -> recorder capture
+            hammer, scan -> Synth hammer and wavetable scan (the scan of a step is counted with the next step)
+
+        callback: callable|None, called at the end of each step -> callback(network, step, phases),
+            phases: dict, phase -> seconds spent in the step
+        """
+
+        self.callback = callback
+        self.times = dict() # phase -> cumulative seconds
+        self.calls = dict() # phase -> calls
+        self.current = dict() # phase -> seconds in the current step
+        self.steps = 0
+        self.last = time.perf_counter()
+        self.open = False # a step is in progress
+
+
+    def begin(self) -> None:
+
+        """
+        start a step (no effect if a step is already in progress, for example started by Synth)
+        """
+
+        if not self.open:
+            self.last = time.perf_counter()
+            self.open = True
+
+
+    def mark(self, phase: str) -> None:
+
+        """
+        end of phase: the time since the previous mark is added to it
+
+        phase: str, phase name
+        """
+
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.times[phase] = self.times.get(phase, 0.0) + elapsed
+        self.calls[phase] = self.calls.get(phase, 0) + 1
+        self.current[phase] = self.current.get(phase, 0.0) + elapsed
+        self.last = now
+
+
+    def end(self, network) -> None:
+
+        """
+        end of the step: call the callback with the phases of the step
+
+        network: MSDNet, profiled network
+        """
+
+        if self.callback is not None:
+            self.callback(network, self.steps, self.current)
+        self.steps += 1
+        self.current = dict()
+        self.open = False
+        self.last = time.perf_counter()
+
+
+    def reset(self) -> None:
+
+        """
+        clear the counters
+        """
+
+        self.times, self.calls, self.current = dict(), dict(), dict()
+        self.steps = 0
+
+
+    def stats(self) -> dict:
+
+        """
+        counters snapshot (plain types, ready for json.dumps)
+
+        return: dict -> {"steps", "total", "step_mean", "phases": {phase: {"time", "calls", "mean", "share"}}}
+        """
+
+        total = sum(self.times.values())
+        phases = {
+            phase: {
+                "time": seconds, "calls": self.calls[phase],
+                "mean": seconds/self.calls[phase], "share": seconds/total if total else 0.0
+            }
+            for phase, seconds in sorted(self.times.items(), key=lambda item: -item[1])
+        }
+        return {"steps": self.steps, "total": total, "step_mean": total/max(self.steps, 1), "phases": phases}
@@ -0,0 +1,225 @@
+"""
+
+Recorder: trajectory capture in a ring buffer (last K steps) or in a memory-mapped file (long runs)
+
+"""
+
+import json
+import os
+import numpy as np
+
+
+class Recorder():
+
+    def __init__(self, shape: tuple, capacity: int|None = None, path: str|None = None, velocities: bool = False, chunk: int = 4096, dtype = np.float64) -> None:
+
+        """
+        Create recorder. Each step stores the positions returned by run_network (engine.frame)
+        and optionally the velocities (displacement of the last step, engine.vel).
+        The storage is allocated up front (ring) or one chunk at a time (file), so each capture is a fixed-size copy.
+
+            ring (capacity) -> last capacity steps in memory. Every frame is written twice (at head and head + capacity)
+                so that the last steps are always a contiguous slice: read-back is a view, no copies
+            file (path) -> all the steps in a raw file, grown by chunk steps and written through np.memmap,
+                read-back is a memmap of the file (only the pages that are read are loaded).
+                The layout is saved in path.json (see load)
+
+        shape: tuple, shape of a frame (engine.frame.shape -> N x 3 or B x N x 3)
+        capacity: int|None, ring size in steps
+        path: str|None, file of the recording
+        velocities: bool, if True record the velocities too
+        chunk: int, file growth in steps
+        dtype: numpy dtype of the recording (np.float32 halves the size)
+        """
+
+        try:
+            assert (capacity is None) != (path is None)
+            assert capacity is None or capacity >= 1
+            assert chunk >= 1
+        except:
+            print("[ERROR] set either capacity (ring buffer) or path (memory-mapped file), capacity and chunk must be >= 1!\n")
+            exit(0)
+
+        self.shape = tuple(shape)
+        self.fields = 2 if velocities else 1 # positions (+ velocities)
+        self.record = (self.fields,) + self.shape # one step
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        self.path = path
+        self.chunk = chunk
+        self.steps = 0 # captured steps (since the last clear)
+
+        if capacity is not None:
+            self.buffer = np.zeros((2 * capacity,) + self.record, dtype=self.dtype)
+        else:
+            self.buffer = None # current chunk (memmap)
+            self.chunks = 0
+            self.step_bytes = int(np.prod(self.record)) * self.dtype.itemsize
+            open(path, "wb").close()
+            self.__write_layout()
+
+
+    def __write_layout(self) -> None:
+
+        layout = {"shape": list(self.shape), "fields": self.fields, "dtype": self.dtype.str, "steps": self.steps}
+        with open(f"{self.path}.json", "w") as f:
+            json.dump(layout, f)
+
+
+    def __map_chunk(self, chunk: int) -> None:
+
+        if self.buffer is not None:
+            self.buffer.flush()
+
+        with open(self.path, "r+b") as f:
+            f.truncate((chunk + 1) * self.chunk * self.step_bytes)
+
+        self.buffer = np.memmap(
+            self.path, dtype=self.dtype, mode="r+", offset=chunk * self.chunk * self.step_bytes,
+            shape=(self.chunk,) + self.record
+        )
+        self.chunks = chunk + 1
+
+
+    def capture(self, engine) -> None:
+
+        """
+        record the current step
+
+        engine: Engine, compiled network (or Ensemble)
+        """
+
+        try:
+            assert engine.frame.shape == self.shape
+        except:
+            print(f"[ERROR] recorder frame shape {self.shape} does not match the network {engine.frame.shape}!\n")
+            exit(0)
+
+        if self.capacity is not None:
+            head = self.steps % self.capacity
+            rows = (head, head + self.capacity)
+        else:
+            head = self.steps % self.chunk
+            if head == 0 or self.buffer is None:
+                self.__map_chunk(chunk=self.steps//self.chunk)
+            rows = (head,)
+
+        for row in rows:
+            self.buffer[row, 0] = engine.frame
+            if self.fields == 2:
+                self.buffer[row, 1] = engine.vel
+
+        self.steps += 1
+
+
+    def __view(self, field: int) -> np.ndarray:
+
+        if self.capacity is not None:
+            n = min(self.steps, self.capacity)
+            end = (self.steps - 1) % self.capacity + self.capacity + 1 if self.steps >= self.capacity else self.steps
+            return self.buffer[end - n:end, field]
+
+        self.flush()
+        if not self.steps:
+            return np.zeros((0,) + self.shape, dtype=self.dtype)
+        data = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(self.steps,) + self.record)
+        return data[:, field]
+
+
+    def positions(self) -> np.ndarray:
+
+        """
+        recorded positions, oldest first (view, valid until the next capture for the ring buffer)
+
+        return: np.ndarray (T, N, 3) or (T, B, N, 3)
+        """
+
+        return self.__view(field=0)
+
+
+    def velocities(self) -> np.ndarray:
+
+        """
+        recorded velocities, oldest first (see positions)
+
+        return: np.ndarray (T, N, 3) or (T, B, N, 3)
+        """
+
+        try:
+            assert self.fields == 2
+        except:
+            print("[ERROR] velocities are not recorded (see Recorder velocities)!\n")
+            exit(0)
+
+        return self.__view(field=1)
+
+
+    def __len__(self) -> int:
+        return self.steps if self.capacity is None else min(self.steps, self.capacity)
+
+
+    def flush(self) -> None:
+
+        """
+        write the pending pages and the layout of the file recording
+        """
+
+        if self.path is not None:
+            if self.buffer is not None:
+                self.buffer.flush()
+            self.__write_layout()
+
+
+    def clear(self) -> None:
+
+        """
+        drop the recording
+        """
+
+        self.steps = 0
+        if self.path is not None:
+            self.buffer = None
+            self.chunks = 0
+            open(self.path, "wb").close()
+            self.__write_layout()
+
+
+    def close(self) -> None:
+
+        """
+        flush the file recording and trim it to the recorded steps
+        """
+
+        if self.path is not None:
+            self.flush()
+            self.buffer = None
+            with open(self.path, "r+b") as f:
+                f.truncate(self.steps * self.step_bytes)
+
+
+    @staticmethod
+    def load(path: str) -> dict:
+
+        """
+        open a file recording (memory-mapped, read only)
+
+        path: str, file of the recording
+
+        return: dict -> {"positions": (T, N, 3), "velocities": (T, N, 3)|None}
+        """
+
+        try:
+            with open(f"{path}.json") as f:
+                layout = json.load(f)
+            assert os.path.exists(path)
+        except:
+            print(f"[ERROR] {path} is not a recording (see Recorder)!\n")
+            exit(0)
+
+        shape, fields = tuple(layout["shape"]), layout["fields"]
+        if not layout["steps"]:
+            empty = np.zeros((0,) + shape, dtype=layout["dtype"])
+            return {"positions": empty, "velocities": empty if fields == 2 else None}
+
+        data = np.memmap(path, dtype=layout["dtype"], mode="r", shape=(layout["steps"], fields) + shape)
+        return {"positions": data[:, 0], "velocities": data[:, 1] if fields == 2 else None}
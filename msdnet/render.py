@@ -0,0 +1,366 @@
+"""
+
+Batch render of parameter sweeps on a process pool
+
+usage: python -m msdnet.render sweep.toml
+
+sweep.toml:
+
+    [render]
+    output = "renders"      # output directory (manifest.json is written here)
+    format = "wav"          # "wav" -> scanned synthesis (see msdnet_tools.synth), "npy" -> trajectory (see MSDNet.run_steps)
+    workers = 0             # processes, 0 -> number of cpus
+    seed = 0                # each job is seeded with seed + a hash of its parameters
+    clip_pos = [0, 1]
+    path = "all"            # scan path: "all" masses or [[mass, coordinate], ...]
+    coordinate = "y"        # coordinate of the path if "all"
+    duration = 2.0          # wav: sec, sr, rate, freq, gain, interp (see Synth)
+    sr = 48000
+    rate = 500
+    freq = 220
+    gain = 5
+    steps = 1000            # npy: steps, stride, masses, coordinates (see MSDNet.run_steps)
+    monitor = 100           # optional: check energy every 100 steps, diverging jobs stop at once (status "diverged", see MSDNet.add_monitor)
+
+    [network]
+    shape = "string"        # "string", "cloth", "circle" (see msdnet_tools.shapes)
+    n_masses = 30
+    origin = [0, 0.5]
+    scale = [1, 0.5]
+    g = [0, 0, 0]
+    dt = 1
+    m = 50
+    d = 0.999
+    k = 30
+    c = 1
+    r = 5
+    anchored_mass = [1, 30] # string, circle
+    levels = 10             # cloth
+
+    [hammer]                # optional, see Hammer.create_hammer
+    shape = "sine"
+    mode = "one_shot"
+    path = "all"            # "all" masses, "rand" (random path of path_length masses) or [[mass, coordinate], ...]
+    coordinate = "y"
+
+    [grid]                  # parameters to sweep -> "section.key" = [values], all the combinations are rendered
+    "network.k" = [10, 20, 30]
+    "hammer.shape" = ["sine", "sinc"]
+
+Workers receive the job as a plain dict (network description, not the network) and build the network themselves.
+Outputs are written atomically and named after a hash of the job parameters (adding or removing grid values does not rename
+the other jobs): rerunning a sweep skips the outputs that already exist and the jobs that diverged. manifest.json is updated
+after each job, a job that fails is recorded with status "error" and the sweep goes on.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+import numpy as np
+from msdnet_tools.shapes import Cloth, String, Circle
+from msdnet_tools.hammer import Hammer
+from msdnet_tools.synth import Synth
+from msdnet_tools.generic_tools import generate_random_path
+
+
+def load_config(path: str) -> dict:
+
+    """
+    read the sweep configuration
+
+    path: str, toml file
+
+    return: dict
+    """
+
+    try:
+        import tomllib # python >= 3.11
+    except ImportError:
+        import tomli as tomllib
+
+    try:
+        with open(path, "rb") as f:
+            config = tomllib.load(f)
+        assert "network" in config
+    except:
+        print(f"[ERROR] {path} is not a valid sweep configuration (see msdnet.render)!\n")
+        exit(0)
+
+    return config
+
+
+def expand_jobs(config: dict) -> list[dict]:
+
+    """
+    expand the parameter grid into jobs
+
+    config: dict, sweep configuration
+
+    return: list[dict], jobs -> {"name", "seed", "network", "hammer", "render"}
+    """
+
+    render = {"output": "renders", "format": "wav", "seed": 0} | config.get("render", {})
+    grid = config.get("grid", {})
+
+    try:
+        assert render["format"] in ["wav", "npy"]
+        assert all(key.split(".")[0] in ["network", "hammer", "render"] and isinstance(values, list) for key, values in grid.items())
+    except:
+        print("[ERROR] format must be wav or npy and grid keys must be network.<param>, hammer.<param> or render.<param> with a list of values!\n")
+        exit(0)
+
+    jobs = []
+    names = set()
+    keys = list(grid)
+    for values in itertools.product(*(grid[key] for key in keys)):
+        job = {
+            "network": dict(config["network"]),
+            "hammer": dict(config["hammer"]) if "hammer" in config else None,
+            "render": dict(render)
+        }
+        for key, value in zip(keys, values):
+            section, param = key.split(".", 1)
+            if job[section] is None:
+                job[section] = dict()
+            job[section][param] = value
+
+        # seed and name depend only on the parameters that change the output (not on the position in the grid)
+        params = {key: value for key, value in job["render"].items() if key not in ["output", "workers"]}
+        digest = hashlib.sha1(json.dumps([job["network"], job["hammer"], params], sort_keys=True).encode()).hexdigest()[:12]
+        job["seed"] = (int(job["render"]["seed"]) + int(digest[:8], 16)) % 2**32
+        job["name"] = f"job_{digest}"
+        if job["name"] in names:
+            continue
+        names.add(job["name"])
+        job["file"] = os.path.join(job["render"]["output"], f"{job['name']}.{job['render']['format']}")
+        jobs.append(job)
+
+    return jobs
+
+
+def build_network(description: dict):
+
+    """
+    build a network from its description (see [network] in the module docstring)
+
+    description: dict, network description
+
+    return: MSDNet
+    """
+
+    p = {"origin": [0, 0.5], "scale": [1, 0.5], "g": [0, 0, 0], "dt": 1, "anchored_mass": []} | description
+    shape = p["shape"]
+    params = {"m": p["m"], "d": p["d"], "k": p["k"], "c": p["c"], "r": p["r"]}
+    common = {"n_masses": p["n_masses"], "origin": p["origin"], "scale": p["scale"], "g": p["g"], "dt": p["dt"]}
+
+    if shape == "string":
+        return String(**common).generate_string_msdnet(**params, anchored_mass=p["anchored_mass"])
+    if shape == "circle":
+        return Circle(**common).generate_circle_msdnet(**params, anchored_mass=p["anchored_mass"])
+    if shape == "cloth":
+        return Cloth(**common, levels=p["levels"]).generate_cloth_msdnet(**params)
+
+    print(f"[ERROR] shape {shape} not yet implemented!\n")
+    exit(0)
+
+
+def build_path(network, path: str|list, coordinate: str = "y", path_length: int|None = None) -> list[tuple]:
+
+    """
+    path: str|list, "all" masses, "rand" (random path) or [[mass, coordinate], ...]
+
+    return: list[tuple]
+    """
+
+    if path == "all":
+        return [(mass, coordinate) for mass in network.masses]
+    if path == "rand":
+        return generate_random_path(masses=network.masses, path_length=path_length or len(network.masses), coordinate=coordinate)
+    return [tuple(p) for p in path]
+
+
+def render_job(job: dict) -> dict:
+
+    """
+    render a job (runs in a worker process)
+
+    job: dict, see expand_jobs
+
+    return: dict, job result for the manifest
+    """
+
+    start = time.perf_counter()
+    np.random.seed(job["seed"])
+
+    net = build_network(description=job["network"])
+    render = job["render"]
+    clip_pos = tuple(render["clip_pos"]) if render.get("clip_pos") else None
+
+    hammer = None
+    if job["hammer"] is not None:
+        h = {"shape": "sine", "mode": "one_shot", "path": "all", "coordinate": "y"} | job["hammer"]
+        hammer = Hammer()
+        hammer.create_hammer(shape=h["shape"], mode=h["mode"], shot_prob=h.get("shot_prob", 0.01))
+        hammer.add_hammer_path(path=build_path(network=net, path=h["path"], coordinate=h["coordinate"], path_length=h.get("path_length")))
+
+    if render.get("monitor"):
+        net.add_monitor(every=render["monitor"], action="abort")
+
+    tmp = f"{job['file']}.tmp"
+    result = {"name": job["name"], "file": job["file"], "seed": job["seed"], "network": job["network"], "hammer": job["hammer"]}
+
+    try:
+        render_output(net=net, render=render, hammer=hammer, clip_pos=clip_pos, tmp=tmp, result=result)
+        os.replace(tmp, job["file"])
+        result["status"] = "done"
+    except FloatingPointError as error:
+        result["status"] = "diverged"
+        result["error"] = str(error)
+        result["monitor"] = net.monitor.stats() if net.monitor is not None else None
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def run_job(job: dict) -> dict:
+
+    """
+    render a job, any failure is returned as a result with status "error" (runs in a worker process)
+
+    job: dict, see expand_jobs
+
+    return: dict, job result for the manifest
+    """
+
+    start = time.perf_counter()
+    try:
+        return render_job(job=job)
+    except (Exception, SystemExit) as error:
+        return {
+            "name": job["name"], "file": job["file"], "seed": job["seed"], "network": job["network"], "hammer": job["hammer"],
+            "status": "error", "error": f"{type(error).__name__}: {error}", "elapsed": time.perf_counter() - start
+        }
+
+
+def render_output(net, render: dict, hammer, clip_pos: tuple|None, tmp: str, result: dict) -> None:
+
+    """
+    render the output of a job in tmp (wav or npy, see render_job)
+
+    net: MSDNet, network of the job
+    render: dict, [render] section of the job
+    hammer: Hammer|None, hammer of the job
+    clip_pos: tuple|None, see MSDNet.run_network
+    tmp: str, temporary output file
+    result: dict, job result, updated with the output peak (wav) or shape (npy)
+    """
+
+    if render["format"] == "wav":
+        path = build_path(network=net, path=render.get("path", "all"), coordinate=render.get("coordinate", "y"))
+        synth = Synth(
+            network=net, path=path, freq=render.get("freq", 220), sr=render.get("sr", 48000), rate=render.get("rate", 1000),
+            hammer=hammer, clip_pos=clip_pos, gain=render.get("gain", 1.0), interp=render.get("interp", "linear")
+        )
+        result["peak"] = synth.render(filename=tmp, duration=render.get("duration", 1.0))
+    else:
+        if hammer is not None:
+            hammer.apply_hammer_force(masses=net.masses)
+        trajectory = net.run_steps(
+            n_steps=render.get("steps", 1000), clip_pos=clip_pos, stride=render.get("stride", 1),
+            masses=render.get("masses"), coordinates=render.get("coordinates", "xyz")
+        )
+        with open(tmp, "wb") as f:
+            np.save(f, trajectory)
+        result["shape"] = list(trajectory.shape)
+
+
+def write_manifest(path: str, entries: list[dict]) -> None:
+
+    """
+    write manifest.json atomically
+
+    path: str, manifest file
+    entries: list[dict], job results
+    """
+
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def run_sweep(config_path: str) -> list[dict]:
+
+    """
+    render all the jobs of a sweep, skipping the outputs that already exist and the jobs that diverged before,
+    manifest.json is written after each job
+
+    config_path: str, toml file
+
+    return: list[dict], manifest
+    """
+
+    config = load_config(path=config_path)
+    jobs = expand_jobs(config=config)
+    output = jobs[0]["render"]["output"] if jobs else "renders"
+    workers = config.get("render", {}).get("workers", 0) or os.cpu_count()
+    os.makedirs(output, exist_ok=True)
+
+    manifest_path = os.path.join(output, "manifest.json")
+    previous = dict()
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = {entry["name"]: entry for entry in json.load(f)}
+
+    # previous results are kept as they are: outputs already rendered and jobs that diverged
+    manifest = dict()
+    todo = []
+    for job in jobs:
+        os.makedirs(os.path.dirname(job["file"]) or ".", exist_ok=True)
+        entry = previous.get(job["name"])
+        if os.path.exists(job["file"]):
+            manifest[job["name"]] = entry if entry is not None else {"name": job["name"], "file": job["file"], "seed": job["seed"], "status": "skipped"}
+        elif entry is not None and entry.get("status") == "diverged":
+            manifest[job["name"]] = entry
+        else:
+            todo.append(job)
+
+    print(f"[INFO] {len(jobs)} jobs, {len(jobs) - len(todo)} already rendered or diverged, {workers} workers")
+
+    entries = lambda: [manifest[job["name"]] for job in jobs if job["name"] in manifest]
+    write_manifest(path=manifest_path, entries=entries())
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run_job, job): job for job in todo}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as error: # the worker process died
+                result = {"name": job["name"], "file": job["file"], "seed": job["seed"], "status": "error", "error": f"{type(error).__name__}: {error}", "elapsed": 0.0}
+            manifest[result["name"]] = result
+            write_manifest(path=manifest_path, entries=entries())
+            print(f"[INFO] {result['file']} {result['status']} ({result['elapsed']:.2f} sec)")
+
+    return entries()
+
+
+def main(argv: list[str]|None = None) -> None:
+
+    argv = sys.argv[1:] if argv is None else argv
+
+    if len(argv) != 1:
+        print("usage: python -m msdnet.render sweep.toml")
+        exit(0)
+
+    run_sweep(config_path=argv[0])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+
+Sleep: quiescent islands of a MSDNetwork are frozen and skipped by the step
+
+"""
+
+import numpy as np
+from msdnet.engine import norm
+from msdnet.islands import network_components
+
+
+class Sleep():
+
+    def __init__(self, speed: float = 1e-7, force: float = 1e-8, steps: int = 60) -> None:
+
+        """
+        Create sleep manager. The network is split in islands (masses joined by springs or dampers, see msdnet.islands).
+        A mass is quiet when its displacement in a step is below speed and the displacement due to its net force
+        (|u[n] - d·u[n - 1]| = |a|·dt^2 in the Verlet step) is below force; an island whose masses stay quiet for steps steps
+        falls asleep: its masses stop (no drift), its springs and dampers are skipped and, when all the islands sleep,
+        the step does nothing at all. An island wakes when an external force, an input, a hammer shot or a strike
+        reaches one of its masses, when one of them is pressed (mouse drag), when an awake mass touches one of them
+        (contacts of add_collision, see touch) or with wake (lock_unlock_mass, Interact).
+        Forces are compared with the ones left in acc by the previous step, so with acc_is_costant=True
+        a constant force does not keep the islands awake, a change of it does.
+
+        speed: float, displacement per step of a quiet mass (position units)
+        force: float, displacement per step due to the net force of a quiet mass (position units)
+        steps: int, quiet steps before an island falls asleep
+        """
+
+        try:
+            assert speed >= 0 and force >= 0 and steps >= 1
+        except:
+            print("[ERROR] speed and force must be >= 0 and steps >= 1!\n")
+            exit(0)
+
+        self.speed = speed
+        self.force = force
+        self.steps = steps
+
+        self.engine = None
+        self.count = 0 # islands
+        self.labels = None # island of each mass
+        self.quiet = None # quiet steps of each island
+        self.asleep = None # sleeping islands
+        self.masses = None # sleeping masses (N mask)
+        self.any = False # some island sleeps
+        self.springs = None # awake springs (None -> all)
+        self.dampers = None # awake dampers (None -> all)
+        self.awake = None # awake masses (None -> all)
+        self.rest = None # acc left by the last step (None -> zero, see check)
+
+        # counters
+        self.skipped = 0 # steps skipped because all the islands were asleep
+        self.total = {"sleeps": 0, "wakes": 0}
+
+
+    def bind(self, engine) -> None:
+
+        """
+        split the engine in islands, all awake (called automatically when the network is recompiled)
+
+        engine: Engine, compiled network
+        """
+
+        try:
+            assert not engine.batch
+        except:
+            print("[ERROR] sleep does not support ensembles!\n")
+            exit(0)
+
+        self.count, self.labels = network_components(engine=engine)
+        self.spring_island = self.labels[engine.s1]
+        self.damper_island = self.labels[engine.d1]
+        self.quiet = np.zeros(self.count, dtype=np.int64)
+        self.asleep = np.zeros(self.count, dtype=bool)
+        self.rest = None
+        self.engine = engine
+        self.__update()
+
+
+    def __update(self) -> None:
+
+        # masks and awake edges after a change of the sleeping islands
+        self.any = bool(self.asleep.any())
+        self.masses = self.asleep[self.labels]
+        if self.any:
+            self.springs = np.flatnonzero(~self.asleep[self.spring_island])
+            self.dampers = np.flatnonzero(~self.asleep[self.damper_island])
+            self.awake = np.flatnonzero(~self.masses)
+        else:
+            self.springs = self.dampers = self.awake = None
+
+
+    def wake(self, rows: np.ndarray) -> None:
+
+        """
+        wake the islands of masses
+
+        rows: np.ndarray, mass rows
+        """
+
+        if self.engine is None or not self.any:
+            return
+
+        islands = np.unique(self.labels[rows])
+        islands = islands[self.asleep[islands]]
+        if islands.size:
+            self.asleep[islands] = False
+            self.quiet[islands] = 0
+            self.total["wakes"] += int(islands.size)
+            self.__update()
+
+
+    def touch(self, i: np.ndarray, j: np.ndarray) -> None:
+
+        """
+        wake the sleeping islands in contact with awake masses (pairs of two sleeping masses stay at rest)
+
+        i: np.ndarray, first mass of each contact (see Collision.touching)
+        j: np.ndarray, second mass of each contact
+        """
+
+        if self.engine is None or not self.any or not i.size:
+            return
+
+        mixed = self.masses[i] != self.masses[j]
+        if mixed.any():
+            self.wake(rows=np.concatenate((i[mixed], j[mixed])))
+
+
+    def check(self, engine) -> bool:
+
+        """
+        before the step: wake the islands touched by new forces (acc changed since the last step) or pressed masses
+
+        engine: Engine, compiled network (external forces already in acc)
+
+        return: bool, True if all the islands are asleep (the step can be skipped)
+        """
+
+        if engine is not self.engine:
+            self.bind(engine=engine)
+
+        if not self.any:
+            return False
+
+        rest = self.rest
+        touched = engine.pressed.any() or (engine.acc.any() if rest is None else not np.array_equal(engine.acc, rest))
+        if touched:
+            sleeping = np.flatnonzero(self.masses)
+            acc = engine.acc[sleeping]
+            forced = acc.any(axis=-1) if rest is None else (acc != rest[sleeping]).any(axis=-1)
+            self.wake(rows=sleeping[engine.pressed[sleeping] | forced])
+
+        return self.any and self.awake.size == 0
+
+
+    def update(self, engine) -> None:
+
+        """
+        after the step: count the quiet steps of the awake islands, put to sleep the ones quiet for steps steps
+
+        engine: Engine, compiled network
+        """
+
+        # forces kept by acc_is_costant=True (compared by the next check)
+        self.rest = engine.acc.copy() if engine.acc.any() else None
+
+        rows = self.awake
+        if rows is None:
+            u = engine.pos - engine.prev_pos
+            a = u - engine.d[:, None] * engine.vel
+            labels = self.labels
+        else:
+            u = engine.pos[rows] - engine.prev_pos[rows]
+            a = u - engine.d[rows, None] * engine.vel[rows]
+            labels = self.labels[rows]
+
+        loud = (norm(u) > self.speed) | (norm(a) > self.force)
+        noisy = np.zeros(self.count, dtype=bool)
+        noisy[labels[loud]] = True
+
+        self.quiet += 1
+        self.quiet[noisy] = 0
+        falling = (self.quiet >= self.steps) & ~self.asleep
+        if not falling.any():
+            return
+
+        self.asleep |= falling
+        self.total["sleeps"] += int(falling.sum())
+        self.__update()
+
+        # stop the sleeping masses where they are
+        rows = np.flatnonzero(falling[self.labels])
+        engine.prev_pos[rows] = engine.pos[rows]
+        engine.frame[rows] = engine.pos[rows]
+        engine.vel[rows] = 0
+
+
+    def stats(self) -> dict:
+
+        """
+        counters snapshot
+
+        return: dict -> {"islands", "asleep", "sleeping_masses", "skipped", "sleeps", "wakes"}
+        """
+
+        return {
+            "islands": self.count, "asleep": int(self.asleep.sum()) if self.asleep is not None else 0,
+            "sleeping_masses": int(self.masses.sum()) if self.masses is not None else 0,
+            "skipped": self.skipped, **self.total
+        }
@@ -0,0 +1,64 @@
+"""
+
+Array storage of networks: .npz archives, optionally memory-mapped on load
+
+"""
+
+import zipfile
+import numpy as np
+
+
+def save_arrays(path: str, arrays: dict, compressed: bool = False) -> None:
+
+    """
+    write arrays in a .npz archive
+
+    path: str, file name
+    arrays: dict[str, np.ndarray]
+    compressed: bool, if True deflate the arrays (smaller file, not memory-mappable)
+    """
+
+    with open(path, "wb") as f:
+        (np.savez_compressed if compressed else np.savez)(f, **arrays)
+
+
+def load_arrays(path: str, mmap_mode: str|None = None) -> dict:
+
+    """
+    read the arrays of a .npz archive
+
+    path: str, file name
+    mmap_mode: str|None, None -> read the arrays in memory, "r" (read only) or "c" (copy on write) -> map the arrays
+        of an uncompressed archive on the file: loading does not read the data, pages are read when used.
+        Compressed entries are always read
+
+    return: dict[str, np.ndarray]
+    """
+
+    if mmap_mode is None:
+        with np.load(path, allow_pickle=False) as data:
+            return {name: data[name] for name in data.files}
+
+    arrays = dict()
+    with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+        for info in archive.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as entry:
+                    arrays[name] = np.lib.format.read_array(entry, allow_pickle=False)
+                continue
+
+            # local file header: 30 bytes + name + extra field, then the .npy file
+            f.seek(info.header_offset + 26)
+            size = np.frombuffer(f.read(4), dtype="<u2")
+            f.seek(info.header_offset + 30 + int(size[0]) + int(size[1]))
+            version = np.lib.format.read_magic(f)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran, dtype = read_header(f)
+            if dtype.hasobject or not int(np.prod(shape)):
+                f.seek(info.header_offset + 30 + int(size[0]) + int(size[1]))
+                arrays[name] = np.lib.format.read_array(f, allow_pickle=False)
+                continue
+            arrays[name] = np.memmap(f, dtype=dtype, mode=mmap_mode, offset=f.tell(), shape=shape, order="F" if fortran else "C")
+
+    return arrays
@@ -0,0 +1,231 @@
+"""
+
+Component tables of a MSDNetwork: name -> component, with components added in bulk kept as array rows
+
+"""
+
+from collections.abc import Mapping, MutableMapping
+import numpy as np
+
+
+class ComponentTable(MutableMapping):
+
+    def __init__(self, make) -> None:
+
+        """
+        ordered name -> component table (MSDNet.masses, springs, dampers).
+        Components added one at a time (add_mass, add_spring...) are stored as objects,
+        components added in bulk (add_masses, add_springs...) only as arrays: their objects are created
+        on first access, bound to the compiled engine (see msdnet.network_components.bound)
+
+        make: callable, row -> component bound to the engine row
+        """
+
+        self.make = make
+        self.names = [] # name of each row (engine order)
+        self.rows = dict() # name -> row
+        self.objects = dict() # row -> component (created so far)
+        self.blocks = [] # bulk rows not compiled yet -> (first row, dict of arrays)
+        self.compiled = 0 # rows in the last compiled engine
+        self.version = 0 # changes at each add
+
+
+    def __getitem__(self, name: str):
+        row = self.rows[name]
+        component = self.objects.get(row)
+        if component is None:
+            component = self.objects[row] = self.make(row)
+        return component
+
+    def __setitem__(self, name: str, component) -> None:
+        row = self.rows.get(name)
+        if row is None:
+            row = self.rows[name] = len(self.names)
+            self.names.append(name)
+        self.objects[row] = component
+        self.version += 1
+
+    def __delitem__(self, name: str) -> None:
+        print("[ERROR] components can not be removed from a network!\n")
+        exit(0)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name) -> bool:
+        return name in self.rows
+
+
+    def extend(self, names: list[str], arrays: dict) -> np.ndarray:
+
+        """
+        add components in bulk
+
+        names: list[str], names of the new components (must be new)
+        arrays: dict, engine arrays of the new rows
+
+        return: np.ndarray, rows of the new components
+        """
+
+        start = len(self.names)
+        try:
+            assert len(set(names)) == len(names) and self.rows.keys().isdisjoint(names)
+        except:
+            print("[ERROR] component names must be unique!\n")
+            exit(0)
+
+        self.names.extend(names)
+        self.rows.update(zip(names, range(start, start + len(names))))
+        self.blocks.append((start, arrays))
+        self.version += 1
+        return np.arange(start, start + len(names))
+
+
+    def attach(self, names: list[str]) -> None:
+
+        """
+        fill an empty table with the rows of an engine (see MSDNet.load)
+
+        names: list[str], name of each row
+        """
+
+        self.names = list(names)
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.compiled = len(self.names)
+        self.version += 1
+
+
+    def permute(self, order: np.ndarray) -> None:
+
+        """
+        renumber the rows of a compiled table (see MSDNet.reorder), names keep their components
+
+        order: np.ndarray, old row of each new row
+        """
+
+        inverse = np.empty(len(order), dtype=np.intp)
+        inverse[order] = np.arange(len(order))
+        self.names = [self.names[row] for row in order.tolist()]
+        self.rows = {name: row for row, name in enumerate(self.names)}
+        self.objects = {int(inverse[row]): component for row, component in self.objects.items()}
+        self.version += 1
+
+
+    def index(self, components) -> np.ndarray:
+
+        """
+        rows of components given by name or by row
+
+        components: np.ndarray|list, names or rows
+
+        return: np.ndarray
+        """
+
+        components = np.asarray(components)
+        if components.dtype.kind in "iu":
+            return components.astype(np.intp)
+        rows = self.rows
+        return np.array([rows[name] for name in components.ravel().tolist()], dtype=np.intp).reshape(components.shape)
+
+
+    def assemble(self, fields: list[str], specs: dict, previous, values) -> dict:
+
+        """
+        arrays of all the rows for a new engine: rows of the previous engine are copied from it,
+        bulk rows from their blocks, components not bound yet (new or replaced) are read with values
+
+        fields: list[str], engine arrays of the table
+        specs: dict, array -> (dtype, element shape)
+        previous: Engine|None, last compiled engine
+        values: callable, list of components -> dict of arrays
+
+        return: dict[str, np.ndarray]
+        """
+
+        n = len(self.names)
+        arrays = {name: np.zeros((n,) + specs[name][1], dtype=specs[name][0]) for name in fields}
+
+        if previous is not None and self.compiled:
+            for name in fields:
+                arrays[name][:self.compiled] = getattr(previous, name)[:self.compiled]
+
+        for start, block in self.blocks:
+            for name in fields:
+                arrays[name][start:start + len(block[fields[0]])] = block[name]
+
+        new = [(row, component) for row, component in self.objects.items() if component.engine is None]
+        if new:
+            rows = np.array([row for row, _ in new], dtype=np.intp)
+            new_values = values([component for _, component in new])
+            for name in fields:
+                arrays[name][rows] = new_values[name]
+
+        return arrays
+
+
+    def bind(self, engine) -> None:
+
+        """
+        bind the created components to the new engine
+        """
+
+        for row, component in self.objects.items():
+            component.engine = engine
+            component.index = row
+        self.blocks = []
+        self.compiled = len(self.names)
+
+
+class MassParams(Mapping):
+
+    """
+    read-only mass name -> {"start", "weight", "radius"} view (MSDNet.mass_params)
+    """
+
+    def __init__(self, network) -> None:
+        self.network = network
+
+    def __getitem__(self, name: str) -> dict:
+        row = self.network.masses.rows[name]
+        engine = self.network.engine
+        return {"start": engine.start_pos[row].tolist(), "weight": engine.m[row].item(), "radius": engine.radius[row].item()}
+
+    def __iter__(self):
+        return iter(self.network.masses)
+
+    def __len__(self) -> int:
+        return len(self.network.masses)
+
+
+class SpringParams(Mapping):
+
+    """
+    read-only spring name -> {"stiffness", "length", "link", "m1", "m2" (, "damper", "c")} view (MSDNet.spring_params)
+    """
+
+    def __init__(self, network) -> None:
+        self.network = network
+        self.cache = (None, None) # (dampers version, spring row -> damper row)
+
+    def __getitem__(self, name: str) -> dict:
+        net = self.network
+        row = net.springs.rows[name]
+        engine = net.engine
+        m1, m2 = engine.names[engine.s1[row]], engine.names[engine.s2[row]]
+        params = {"stiffness": engine.k[row].item(), "length": engine.length[row].item(), "link": f"{m1} < -- > {m2}", "m1": m1, "m2": m2}
+
+        if self.cache[0] != net.dampers.version:
+            self.cache = (net.dampers.version, {spring: damper for damper, spring in enumerate(net.damper_spring)})
+        damper = self.cache[1].get(row)
+        if damper is not None:
+            params.update({"damper": net.dampers.names[damper], "c": engine.c[damper].item()})
+        return params
+
+    def __iter__(self):
+        return iter(self.network.springs)
+
+    def __len__(self) -> int:
+        return len(self.network.springs)
@@ -21,15 +21,11 @@ def generate_random_path(masses: dict, path_length: int, coordinate: str = "xyz"
         print("[ERROR] path_length must be less than number of masses; coordinate must be x, y, z or xyz or !\n")
         exit(0)
 
-    path_coord = list(masses.keys())
-    path = []
-    i = 0
-    while i < path_length:
-        m = np.random.choice(path_coord)
-        c = np.random.choice(coord[:-1]) if coordinate == "xyz" else coordinate
-        path.append((m, c))
-        path_coord.pop(path_coord.index(m))
-        i += 1
+    # distinct masses -> one permutation, coordinates drawn at once
+    names = list(masses.keys())
+    chosen = np.random.permutation(len(names))[:path_length]
+    coords = np.random.choice(coord[:-1], size=path_length) if coordinate == "xyz" else [coordinate] * path_length
+    path = [(names[i], str(c)) for i, c in zip(chosen.tolist(), coords)]
 
     return path
 
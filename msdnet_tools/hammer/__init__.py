@@ -1 +1,2 @@
-from msdnet_tools.hammer.hammer import Hammer
\ No newline at end of file
+from msdnet_tools.hammer.hammer import Hammer
+from msdnet_tools.hammer.hammer import StrikeSchedule
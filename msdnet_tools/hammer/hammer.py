@@ -5,10 +5,61 @@ Hammer object
 """
 
 from msdnet_tools.generic_tools import generate_random_path
+from msdnet_tools.scanner import ScanPath
+from functools import lru_cache
 import numpy as np
 
 #TODO: add force to all masses
 
+
+@lru_cache(maxsize=None)
+def shot_shape(shape: str, length: int) -> np.ndarray:
+
+    """
+    amplitude of each element of a shot, computed once for each (shape, path length)
+
+    shape: str, ["sine", "sinc"] ("rand" shots change at each call, see Hammer)
+    length: int, path length
+
+    return: np.ndarray (read only)
+    """
+
+    n = np.arange(length)
+    if shape == "sine":
+        amplitude = np.sin(2 * np.pi * n/length)
+    else:
+        amplitude = np.sin(np.pi * n/length)
+        amplitude[length//2] = 1
+    amplitude.flags.writeable = False
+    return amplitude
+
+
+def strike(masses: dict, path: ScanPath, amplitude: np.ndarray, gain: float = 1.0) -> None:
+
+    """
+    add a shot to the masses: force gain·amplitude[n] on the coordinate of the n-th element of path
+
+    masses: dict, masses network (MSDNet.masses or Ensemble.member_masses)
+    path: ScanPath, compiled hammer path (bound again when the network is recompiled)
+    amplitude: np.ndarray, amplitude of each element
+    gain: float, shot gain
+    """
+
+    mass = masses[path.path[0][0]]
+    engine = getattr(mass, "engine", None)
+
+    if engine is None or engine.batch:
+        coord = {"x": 0, "y": 1, "z": 2}
+        for n, (name, c) in enumerate(path.path):
+            force = np.zeros(3)
+            force[coord[c]] = gain * amplitude[n]
+            masses[name].apply_force(force)
+        return
+
+    if path.engine is not engine:
+        path.bind(masses=masses, engine=engine)
+    np.add.at(engine.acc, (path.rows, path.flat - 3 * path.rows), gain * amplitude/engine.m[path.rows])
+
 class Hammer():
 
     def __init__(self) -> None:
@@ -29,6 +80,7 @@ class Hammer():
         self.hammer_rand_path_coordinate = "xyz"
         self.shot_prob = 0.01
         self.is_shot = True
+        self.compiled = None # compiled hammer path (see strike)
     
     def create_hammer(self, shape: str = "rand", mode: str = "one_shot", rand_path: bool = False, rand_path_coordinate: str = "xyz", shot_prob: float = 0.01) -> None:
 
@@ -72,7 +124,7 @@ class Hammer():
         self.hammer_path = path
 
 
-    def __generate_shot(self) -> None:
+    def __generate_shot(self) -> np.ndarray:
 
         try:
             assert self.hammer_path is not None
@@ -80,28 +132,10 @@ class Hammer():
             print("[ERROR] hammer path not found!\n")
             exit(0)
 
-        coord = {"x": 0, "y": 1, "z": 2}
-        
         q = len(self.hammer_path)
-        force_vector = np.zeros((q, 3))
-
-        for n, m in enumerate(self.hammer_path):
-
-            ndx = m[1]
-
-            if self.shape == "rand":
-                force_vector[n][coord[ndx]] = np.random.uniform(low=-1, high=1)
-
-            if self.shape == "sine":
-                force_vector[n][coord[ndx]] = np.sin(2 * np.pi * n/q)
-
-            if self.shape == "sinc":
-                if n != q//2:
-                    force_vector[n][coord[ndx]] = np.sin(np.pi * n/q)
-                else:
-                    force_vector[n][coord[ndx]] = 1
-        
-        return force_vector
+        if self.shape == "rand":
+            return np.random.uniform(low=-1, high=1, size=q)
+        return shot_shape(self.shape, q)
 
 
     def __generate_force(self, masses: dict) -> None:
@@ -112,10 +146,9 @@ class Hammer():
         masses: dict, masses network
         """
 
-        force_vector = self.__generate_shot()
-
-        for n, m in enumerate(self.hammer_path):
-            masses[m[0]].apply_force(force_vector[n])
+        if self.compiled is None or self.compiled.path != self.hammer_path:
+            self.compiled = ScanPath(path=self.hammer_path)
+        strike(masses=masses, path=self.compiled, amplitude=self.__generate_shot())
         
         
     def apply_hammer_force(self, masses) -> None:
@@ -135,7 +168,7 @@ class Hammer():
             if self.is_shot and self.hammer_rand_path:
                 self.hammer_path = self.generate_rand_path(
                     masses=masses,
-                    path_length=np.random.randint(low=1, high=len(self.masses) + 1),
+                    path_length=np.random.randint(low=1, high=len(masses) + 1),
                     coordinate=self.hammer_rand_path_coordinate
                 )
     
@@ -152,4 +185,84 @@ class Hammer():
         """
 
         rand_path = generate_random_path(masses=masses, path_length=path_length, coordinate=coordinate)
-        return rand_path
\ No newline at end of file
+        return rand_path
+
+class StrikeSchedule():
+
+    def __init__(self, events: list|None = None, unit: str = "step") -> None:
+
+        """
+        Create strike schedule: hammer shots at given steps (or times) consumed by the network inside its step loop
+        (see MSDNet.add_schedule), so run_network, run_steps, render and Synth strike at the right step by themselves
+
+        events: list|None, [(when, path, shape, gain), ...] (see add)
+        unit: str, ["step", "time"], when is a step of the network or a time in sec (step = round(time/dt))
+        """
+
+        try:
+            assert unit in ["step", "time"]
+        except:
+            print("[ERROR] unit must be step or time!\n")
+            exit(0)
+
+        self.unit = unit
+        self.events = [] # (when, ScanPath, shape, gain)
+        self.steps = None # step of each event, sorted (see __sort)
+        self.dt = None # dt of steps
+
+        for event in events or []:
+            self.add(*event)
+
+
+    def add(self, when: float, path: list[tuple], shape: str = "sine", gain: float = 1.0) -> None:
+
+        """
+        add a shot
+
+        when: float, step (or time, see unit) of the shot
+        path: list[tuple], masses to strike -> [(mass_name, coordinate), ...]
+        shape: str, ["sine", "sinc", "rand"] (see Hammer.create_hammer)
+        gain: float, shot gain
+        """
+
+        try:
+            assert shape in ["sine", "sinc", "rand"]
+            assert len(path) > 0 and when >= 0
+        except:
+            print("[ERROR] shape must be sine, sinc or rand, path not empty and when >= 0!\n")
+            exit(0)
+
+        self.events.append((when, ScanPath(path=path), shape, gain))
+        self.steps = None
+
+
+    def __sort(self, dt: float) -> None:
+
+        when = np.array([event[0] for event in self.events], dtype=float)
+        steps = np.rint(when/dt) if self.unit == "time" else np.rint(when)
+        order = np.argsort(steps, kind="stable")
+        self.events = [self.events[i] for i in order]
+        self.steps = steps[order].astype(np.int64)
+        self.dt = dt
+
+
+    def apply(self, network, step: int) -> None:
+
+        """
+        apply the shots of a step (called by the network before each step)
+
+        network: MSDNet
+        step: int, current step of the network
+        """
+
+        if self.steps is None or (self.unit == "time" and self.dt != network.dt):
+            self.__sort(dt=network.dt)
+
+        first, last = np.searchsorted(self.steps, [step, step + 1])
+        for _, path, shape, gain in self.events[first:last]:
+            amplitude = np.random.uniform(low=-1, high=1, size=len(path)) if shape == "rand" else shot_shape(shape, len(path))
+            strike(masses=network.masses, path=path, amplitude=amplitude, gain=gain)
+
+
+    def __len__(self) -> int:
+        return len(self.events)
@@ -1 +1,3 @@
-from msdnet_tools.scanner.scanner import Scanner
\ No newline at end of file
+from msdnet_tools.scanner.scanner import Scanner
+from msdnet_tools.scanner.scanner import ScanPath
+from msdnet_tools.scanner.scanner import WaveTable
\ No newline at end of file
@@ -4,62 +4,141 @@ Scan the path from MSDNetwork
 
 """
 
+from collections import OrderedDict
 import numpy as np
+from msdnet.engine import Engine, MotionView
 from msdnet_tools.generic_tools import generate_random_path, smooth_data
 
+class ScanPath():
+
+    def __init__(self, path: list[tuple]) -> None:
+
+        """
+        path compiled into index arrays: scanning is a single gather from the position array
+
+        path: list[tuple], path to scan -> [(mass_name, coordinate), ...]
+        """
+
+        self.path = list(path)
+        self.engine = None # engine the indexes refer to
+
+        self.rows = None # mass index of each element
+        self.flat = None # index of each element in the flattened N x 3 positions
+        self.start = None # start position of each element (for anchored masses)
+
+
+    def bind(self, masses: dict, engine) -> None:
+
+        """
+        resolve the path in engine rows (called automatically when the network is recompiled)
+
+        masses: dict[MASSES], from MSDNet
+        engine: Engine, compiled network
+        """
+
+        index = {"x": 0, "y": 1, "z": 2}
+
+        cols = np.array([index[coord] for _, coord in self.path], dtype=np.intp)
+        self.rows = np.array([masses[mass].index for mass, _ in self.path], dtype=np.intp)
+        self.flat = self.rows * 3 + cols
+        self.start = engine.start_pos.ravel()[self.flat]
+        self.engine = engine
+
+    def __len__(self) -> int:
+        return len(self.path)
+
+
 class Scanner():
 
-    def __init__(self, masses: dict()) -> None:
+    def __init__(self, masses: dict(), max_paths: int = 64) -> None:
 
         """
         scanner object
 
         masses: dict[MASSES], from MSDNet
+        max_paths: int, paths passed to scan as lists that stay compiled (least recently used are dropped).
+            Paths compiled with compile_path are not cached
         """
 
         self.masses = masses
+        self.max_paths = max_paths
+        self.paths = OrderedDict() # compiled paths, key -> tuple(path), most recently used last
+
+
+    def compile_path(self, path: list[tuple]) -> ScanPath:
+
+        """
+        compile path once, to scan it without per element lookups
+
+        path: list[tuple], path to scan
+
+        return: ScanPath
+        """
+
+        return ScanPath(path=path)
     
 
-    def __rtscan(self, masses_motion, path, smooth: bool, wlen: int):
+    def __rtscan(self, masses_motion, path: ScanPath, smooth: bool, wlen: int):
 
         """
         generate scanning
 
-        masses_motion: dict, positions of the mass
-        path: list, path to scan
+        masses_motion: dict|np.ndarray|Engine, positions of the mass (from run_network, (B x) N x 3 positions or an Ensemble)
+        path: ScanPath, path to scan
         smooth: bool, if True smooth motion
         wlen: int, if smooth == True, set filter window length (moving average). This param must be less than number of masses
 
         return: path motion
         """
 
-        index = {"x": 0, "y": 1, "z": 2}
-        
-        path_motion = np.zeros(len(path))
+        if isinstance(masses_motion, Engine):
+            engine = masses_motion
+        elif isinstance(masses_motion, MotionView):
+            engine = masses_motion.network.engine
+        else:
+            engine = self.__engine()
 
-        for n, p in enumerate(path):
-            mass, position = p[0], p[1]
-            current_position = masses_motion[mass][position]
-            path_motion[n] = current_position
+        if path.engine is not engine:
+            path.bind(masses=self.masses, engine=engine)
 
-            if smooth:
-                path_motion = smooth_data(x=path_motion, wlen=wlen)
-        
-        for i, p in enumerate(path):
-            mass, coord = p[0], p[1]
-            if self.masses[mass].anchored:
-                path_motion[i] = self.masses[mass].start_pos[index[coord]]
+        positions = engine.frame if isinstance(masses_motion, (Engine, MotionView)) else masses_motion
+
+        if isinstance(positions, np.ndarray):
+            # (B x) N x 3 -> (B x) P
+            path_motion = positions.reshape(positions.shape[:-2] + (-1,))[..., path.flat]
+        else:
+            path_motion = np.array([positions[mass][coord] for mass, coord in path.path], dtype=float)
+
+        if smooth:
+            path_motion = np.apply_along_axis(smooth_data, -1, path_motion, wlen=wlen)
+
+        anchored = engine.anchored[..., path.rows]
+        np.copyto(path_motion, path.start, where=anchored)
         
         return path_motion
+
+
+    def __engine(self):
+
+        engine = next(iter(self.masses.values())).engine if self.masses else None
+
+        try:
+            assert engine is not None
+        except:
+            print("[ERROR] network not compiled, run it (or call MSDNet.compile) before scanning!\n")
+            exit(0)
+
+        return engine
     
 
-    def scan(self, masses_motion: dict, path: list[tuple], smooth: bool = False, **kwargs) -> list:
+    def scan(self, masses_motion: dict, path: list[tuple]|ScanPath, smooth: bool = False, **kwargs) -> list:
 
         """
         scan path in a network
 
-        masses_motion: dict[MSDNet], receive from MSDNet run_network
-        path: list, path to scan
+        masses_motion: dict[MSDNet], receive from MSDNet run_network (or N x 3 positions array).
+            If an Ensemble (or B x N x 3 positions), scan all the members -> B x P
+        path: list|ScanPath, path to scan (see compile_path)
         smooth: bool, if True smooth motion
         kwargs: wlen, if smooth == True, set filter window length (moving average). This param must be less than number of masses
 
@@ -76,11 +155,47 @@ class Scanner():
                 print("[ERROR] wlen must be less than a number of masses!\n")
                 exit(0)
         
+        if not isinstance(path, ScanPath):
+            key = tuple(path)
+            if key in self.paths:
+                self.paths.move_to_end(key)
+            else:
+                self.paths[key] = self.compile_path(path=path)
+                if len(self.paths) > self.max_paths:
+                    self.paths.popitem(last=False)
+            path = self.paths[key]
             
         path_scan = self.__rtscan(masses_motion=masses_motion, path=path, smooth=smooth, wlen=kernel_len["wlen"])
         return path_scan
 
 
+    def wavetable(self, path: list[tuple]|ScanPath, interp: str = "linear", smooth: bool = False, displacement: bool = False, **kwargs) -> "WaveTable":
+
+        """
+        audio-rate scanning: keep the last network frames of path and read them as a wavetable
+        at any fractional phase, interpolating in time between frames (see WaveTable)
+
+        path: list|ScanPath, path to scan
+        interp: str, time interpolation between frames -> ["none", "linear", "cubic"]
+        smooth: bool, if True smooth motion (see scan)
+        displacement: bool, if True store the displacement of the path from its start position
+        kwargs: wlen, see scan
+
+        return: WaveTable
+        """
+
+        try:
+            assert interp in WaveTable.frames
+        except:
+            print("[ERROR] interp must be none, linear or cubic!\n")
+            exit(0)
+
+        if not isinstance(path, ScanPath):
+            path = self.compile_path(path=path)
+
+        return WaveTable(scanner=self, path=path, interp=interp, smooth=smooth, displacement=displacement, **kwargs)
+
+
     def generate_rand_path(self, path_length: int, coordinate: str = "xyz") -> list[tuple]:
 
         """
@@ -95,3 +210,95 @@ class Scanner():
         rand_path = generate_random_path(masses=self.masses, path_length=path_length, coordinate=coordinate)
         return rand_path
 
+
+
+
+class WaveTable():
+
+    frames = {"none": 1, "linear": 2, "cubic": 4} # frames kept for each interpolation
+
+    def __init__(self, scanner: Scanner, path: ScanPath, interp: str = "linear", smooth: bool = False, displacement: bool = False, **kwargs) -> None:
+
+        """
+        last frames of a scanned path (oldest first), read as a wavetable between two frames.
+        read(phase, t) interpolates the path at phase and the frames at t in [0, 1):
+            none -> last frame (sample and hold)
+            linear -> between frame[0] (t = 0) and frame[1] (t = 1), one frame of latency
+            cubic -> Catmull-Rom on 4 frames, between frame[1] and frame[2], two frames of latency
+
+        scanner: Scanner
+        path: ScanPath, path to scan
+        interp: str, ["none", "linear", "cubic"]
+        smooth: bool, see Scanner.scan
+        displacement: bool, if True store the displacement of the path from its start position
+        kwargs: wlen, see Scanner.scan
+        """
+
+        self.scanner = scanner
+        self.path = path
+        self.interp = interp
+        self.smooth = smooth
+        self.displacement = displacement
+        self.kwargs = kwargs
+
+        self.table = np.zeros((self.frames[interp], len(path)))
+        self.pushed = 0 # number of frames pushed
+
+    @property
+    def latency(self) -> int:
+
+        """
+        frames pushed after the one read at t = 0
+        """
+
+        return {"none": 0, "linear": 1, "cubic": 2}[self.interp]
+
+    def push(self, masses_motion) -> None:
+
+        """
+        scan a new network frame (the oldest one is dropped)
+
+        masses_motion: dict[MSDNet]|np.ndarray, from MSDNet run_network (see Scanner.scan)
+        """
+
+        frame = self.scanner.scan(masses_motion=masses_motion, path=self.path, smooth=self.smooth, **self.kwargs)
+        if self.displacement:
+            frame -= self.path.start
+
+        if self.pushed == 0:
+            self.table[:] = frame # no history yet: hold the first frame
+        else:
+            self.table[:-1] = self.table[1:]
+            self.table[-1] = frame
+        self.pushed += 1
+
+    def read(self, phase: np.ndarray, t: np.ndarray, out: np.ndarray|None = None) -> np.ndarray:
+
+        """
+        read the wavetable
+
+        phase: np.ndarray, position in the path [0, len(path)), linearly interpolated between elements (the path is cyclic)
+        t: np.ndarray, position between frames [0, 1)
+        out: np.ndarray|None, where to write the samples
+
+        return: np.ndarray, samples
+        """
+
+        q = self.table.shape[1]
+        i0 = phase.astype(np.intp)
+        i1 = (i0 + 1) % q
+        frac = phase - i0
+        values = self.table[:, i0] * (1 - frac) + self.table[:, i1] * frac # frames x samples
+
+        if self.interp == "none":
+            y = values[0]
+        elif self.interp == "linear":
+            y = values[0] + t * (values[1] - values[0])
+        else:
+            p0, p1, p2, p3 = values
+            y = p1 + 0.5 * t * (p2 - p0 + t * (2 * p0 - 5 * p1 + 4 * p2 - p3 + t * (3 * (p1 - p2) + p3 - p0)))
+
+        if out is None:
+            return y
+        out[:] = y
+        return out
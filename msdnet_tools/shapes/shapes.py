@@ -1,4 +1,5 @@
 from msdnet import MSDNet
+import numpy as np
 import math
 
 class Shape:
@@ -60,28 +61,31 @@ class Cloth(Shape):
         cloth.add_gravity(self.g)
         cloth.add_dt(self.dt)
 
-        # add masses
-        dy = self.ylen
-        for i in range(self.levels):
-            dx = self.xlen
-            for j in range(self.n_masses):
-                cloth.add_mass(name=f"l{i}m{j}", m=m, pos=[dx + self.origin[0], dy + self.origin[1], 0], r=r, d=d, anchored=False)
-                if i == 0:
-                    cloth.lock_unlock_mass(name=f"l{i}m{j}", anchored=True)
-                dx += self.xlen
-            dy += self.ylen
-        
-        # add springs and dampers hor
-        for i in range(self.levels):
-            for j in range(1, self.n_masses):
-                cloth.add_spring(name=f"l{i}sh{j}", k=k, length=self.xlen, m1=f"l{i}m{j - 1}", m2=f"l{i}m{j}")
-                cloth.add_damper(name=f"l{i}d{j}", c=c, spring=f"l{i}sh{j}")
-        
-        # add springs and dampers ver
-        for i in range(1, self.levels):
-            for j in range(self.n_masses):
-                cloth.add_spring(name=f"l{i}sv{j}", k=k, length=self.ylen, m1=f"l{i - 1}m{j}", m2=f"l{i}m{j}")
-                cloth.add_damper(name=f"l{i}d{j}", c=c, spring=f"l{i}sv{j}")
+        # add masses (level 0 anchored)
+        dx = np.cumsum(np.full(self.n_masses, self.xlen)) + self.origin[0]
+        dy = np.cumsum(np.full(self.levels, self.ylen)) + self.origin[1]
+        positions = np.stack(np.broadcast_arrays(dx[None, :], dy[:, None]), axis=-1).reshape(-1, 2)
+        rows = cloth.add_masses(
+            positions=positions, m=m, d=d, r=r, anchored=np.repeat(np.arange(self.levels) == 0, self.n_masses),
+            names=[f"l{i}m{j}" for i in range(self.levels) for j in range(self.n_masses)]
+        ).reshape(self.levels, self.n_masses)
+
+        # add springs hor and ver
+        hor = cloth.add_springs(
+            edges=np.stack((rows[:, :-1], rows[:, 1:]), axis=-1).reshape(-1, 2), k=k, length=self.xlen,
+            names=[f"l{i}sh{j}" for i in range(self.levels) for j in range(1, self.n_masses)]
+        ).reshape(self.levels, self.n_masses - 1)
+        ver = cloth.add_springs(
+            edges=np.stack((rows[:-1], rows[1:]), axis=-1).reshape(-1, 2), k=k, length=self.ylen,
+            names=[f"l{i}sv{j}" for i in range(1, self.levels) for j in range(self.n_masses)]
+        ).reshape(self.levels - 1, self.n_masses)
+
+        # add dampers: hor and ver dampers share the names l{i}d{j}, ver dampers replace the hor ones from level 1
+        springs = np.concatenate((hor[0], ver[:, 1:].ravel(), ver[:, 0]))
+        names = [f"l0d{j}" for j in range(1, self.n_masses)]
+        names += [f"l{i}d{j}" for i in range(1, self.levels) for j in range(1, self.n_masses)]
+        names += [f"l{i}d0" for i in range(1, self.levels)]
+        cloth.add_dampers(springs=springs, c=c, names=names)
 
         return cloth
 
@@ -116,18 +120,18 @@ class String(Shape):
         string.add_gravity(self.g)
         string.add_dt(self.dt)
 
-        dx = self.xlen
-        for i in range(self.n_masses):
-            string.add_mass(name=f"m{i}", m=m, pos=[dx + self.origin[0], self.origin[1], 0], r=r, d=d, anchored=False)
-            dx += self.xlen
-        
-        if anchored_mass:
-            for n in anchored_mass:
-                string.lock_unlock_mass(name=f"m{n - 1}", anchored=True)
-        
-        for i in range(1, self.n_masses):
-            string.add_spring(name=f"s{i}", k=k, length=self.xlen, m1=f"m{i - 1}", m2=f"m{i}")
-            string.add_damper(name=f"d{i}", c=c, spring=f"s{i}")
+        dx = np.cumsum(np.full(self.n_masses, self.xlen)) + self.origin[0]
+        anchored = np.zeros(self.n_masses, dtype=bool)
+        anchored[[n - 1 for n in anchored_mass]] = True
+        rows = string.add_masses(
+            positions=np.stack((dx, np.full(self.n_masses, self.origin[1])), axis=-1), m=m, d=d, r=r, anchored=anchored,
+            names=[f"m{i}" for i in range(self.n_masses)]
+        )
+
+        string.add_springs(
+            edges=np.stack((rows[:-1], rows[1:]), axis=-1), k=k, length=self.xlen, c=c,
+            names=[f"s{i}" for i in range(1, self.n_masses)], damper_names=[f"d{i}" for i in range(1, self.n_masses)]
+        )
 
         return string
 
@@ -156,26 +160,25 @@ class Circle(Shape):
         circle.add_gravity(self.g)
         circle.add_dt(self.dt)
 
-        for i in range(self.n_masses):
-            x = (self.size[0]/2) * math.cos(self.circle_step * i)
-            y = (self.size[1]/2) * math.sin(self.circle_step * i)
-            circle.add_mass(name=f"m{i}", m=m, pos=[x + self.origin[0], y + self.origin[1], 0], r=r, d=d, anchored=False)
-        
-        
-        for i in range(self.n_masses):
-            p1 = circle.masses[f"m{i}"].start_pos
-            p2 = circle.masses[f"m{(i + 1)%self.n_masses}"].start_pos
-            dist = math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
-            circle.add_spring(name=f"s{i}", k=k, length=dist, m1=f"m{i}", m2=f"m{(i + 1)%self.n_masses}")
-            circle.add_damper(name=f"d{i}", c=c, spring=f"s{i}")
-        
-        circle.add_mass(name=f"center", m=m, pos=[self.origin[0], self.origin[1], 0], r=r, d=d, anchored=True)
-        for i in range(self.n_masses):
-            p1 = circle.masses[f"center"].start_pos
-            p2 = circle.masses[f"m{i}"].start_pos
-            dist = math.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
-            circle.add_spring(name=f"sc{i}", k=k, length=dist, m1=f"center", m2=f"m{i}")
-            circle.add_damper(name=f"dc{i}", c=c, spring=f"sc{i}")
+        angle = self.circle_step * np.arange(self.n_masses)
+        x = (self.size[0]/2) * np.cos(angle)
+        y = (self.size[1]/2) * np.sin(angle)
+        rows = circle.add_masses(
+            positions=np.stack((x + self.origin[0], y + self.origin[1]), axis=-1), m=m, d=d, r=r,
+            names=[f"m{i}" for i in range(self.n_masses)]
+        )
+
+        # rim springs, rest length from the start positions
+        circle.add_springs(
+            edges=np.stack((rows, np.roll(rows, -1)), axis=-1), k=k, c=c,
+            names=[f"s{i}" for i in range(self.n_masses)], damper_names=[f"d{i}" for i in range(self.n_masses)]
+        )
+
+        center = circle.add_masses(positions=[[self.origin[0], self.origin[1], 0]], m=m, d=d, r=r, anchored=True, names=["center"])
+        circle.add_springs(
+            edges=np.stack((np.repeat(center, self.n_masses), rows), axis=-1), k=k, c=c,
+            names=[f"sc{i}" for i in range(self.n_masses)], damper_names=[f"dc{i}" for i in range(self.n_masses)]
+        )
         
         return circle
 
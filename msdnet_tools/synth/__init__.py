@@ -0,0 +1 @@
+from msdnet_tools.synth.synth import Synth
\ No newline at end of file
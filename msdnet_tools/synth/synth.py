@@ -0,0 +1,244 @@
+"""
+
+Scanned synthesis: read a path of a MSDNetwork as a wavetable
+
+"""
+
+from msdnet import MSDNet
+from msdnet_tools.scanner import Scanner
+from msdnet_tools.hammer import Hammer
+import numpy as np
+import time
+import wave
+
+
+class Synth():
+
+    def __init__(self, network: MSDNet, path: list[tuple], freq: float, sr: int = 48000, rate: float = 1000.0, hammer: Hammer|None = None, clip_pos: tuple|None = None, acc_is_costant: bool = False, gain: float = 1.0, interp: str = "linear", smooth: bool = False, **kwargs) -> None:
+
+        """
+        Create scanned synthesis oscillator
+
+        network: MSDNet, the network to scan
+        path: list[tuple], path to scan -> [(mass_name, coordinate), ...], the wavetable
+        freq: float, scan frequency (pitch) in Hz
+        sr: int, sample rate
+        rate: float, physics steps per second of audio (haptic rate, <= sr)
+        hammer: Hammer|None, hammer used to excite the network (applied before each physics step)
+        clip_pos: tuple|None, see MSDNet.run_network
+        acc_is_costant: bool, see MSDNet.run_network
+        gain: float, output gain applied to the displacement of the path from its rest position
+        interp: str, time interpolation between physics frames -> ["none", "linear", "cubic"] (see Scanner.wavetable)
+        smooth: bool, if True smooth the scanned path (see Scanner.scan)
+        kwargs: wlen, see Scanner.scan
+        """
+
+        try:
+            assert 0 < rate <= sr
+            assert len(path) > 1
+        except:
+            print("[ERROR] rate must be between 0 and sr and path must contain at least 2 masses!\n")
+            exit(0)
+
+        self.network = network
+        self.path = path
+        self.freq = freq
+        self.sr = sr
+        self.rate = rate
+        self.hammer = hammer
+        self.clip_pos = clip_pos
+        self.acc_is_costant = acc_is_costant
+        self.gain = gain
+
+        self.scanner = Scanner(masses=network.masses)
+        self.table = self.scanner.wavetable(path=path, interp=interp, smooth=smooth, displacement=True, **kwargs)
+
+        self.phase = 0.0 # wavetable read position in [0, len(path))
+        self.samples = 0 # rendered samples
+        self.steps = 0 # physics steps
+        self.segment = 0 # physics frame read at t = 0 by the wavetable
+
+        # first frame, then the frames needed by the interpolation
+        for _ in range(self.table.latency + 1):
+            self.__step()
+
+        self.block_size = 0 # size of the preallocated buffers
+
+
+    def __step(self) -> None:
+
+        profiler = self.network.profiler
+        if self.hammer is not None:
+            if profiler is not None:
+                profiler.begin()
+            self.hammer.apply_hammer_force(masses=self.network.masses)
+            if profiler is not None:
+                profiler.mark("hammer")
+        motion = self.network.run_network(clip_pos=self.clip_pos, acc_is_costant=self.acc_is_costant)
+        self.table.push(masses_motion=motion)
+        if profiler is not None:
+            profiler.mark("scan")
+        self.steps += 1
+
+
+    def __allocate(self, block_size: int) -> None:
+
+        self.ramp = np.arange(block_size, dtype=float)
+        self.time = np.empty(block_size) # physics time of each sample (in frames)
+        self.frame = np.empty(block_size) # physics frame of each sample
+        self.phase_buffer = np.empty(block_size)
+        self.block = np.empty(block_size, dtype=np.float32)
+        self.block_size = block_size
+
+
+    def next_block(self, block_size: int, out: np.ndarray|None = None) -> np.ndarray:
+
+        """
+        compute the next block of audio.
+        All the buffers are preallocated and a block runs at most ceil(block_size * rate/sr) physics steps.
+        Between two physics frames the wavetable is interpolated in time (see interp)
+
+        block_size: int, number of samples
+        out: np.ndarray|None, float32 buffer of block_size samples (if None an internal buffer is reused at each call)
+
+        return: np.ndarray, float32 block
+        """
+
+        if block_size != self.block_size:
+            self.__allocate(block_size=block_size)
+
+        q = len(self.path)
+        t, frame, phase = self.time, self.frame, self.phase_buffer
+        out = self.block if out is None else out
+
+        # physics time of each sample -> frame + position between frames
+        np.add(self.ramp, self.samples, out=t)
+        t *= self.rate/self.sr
+        np.floor(t, out=frame)
+        t -= frame
+
+        # wavetable position of each sample
+        np.multiply(self.ramp, self.freq * q/self.sr, out=phase)
+        phase += self.phase
+        phase %= q
+
+        # read the samples of each physics frame, then step (rate <= sr -> frames increase by at most 1 per sample)
+        start = 0
+        while start < block_size:
+            end = int(np.searchsorted(frame, self.segment, side="right"))
+            if end > start:
+                self.table.read(phase=phase[start:end], t=t[start:end], out=out[start:end])
+            start = end
+            if start < block_size:
+                self.__step()
+                self.segment += 1
+
+        out *= self.gain
+
+        self.phase = (self.phase + block_size * self.freq * q/self.sr) % q
+        self.samples += block_size
+
+        return out
+
+
+    def blocks(self, block_size: int = 256) -> "AudioBlocks":
+
+        """
+        pull-style real-time generator of fixed-size audio blocks
+
+        block_size: int, samples per block
+
+        return: AudioBlocks, iterator of float32 blocks with per-block timing (see AudioBlocks.timing)
+        """
+
+        return AudioBlocks(synth=self, block_size=block_size)
+
+
+    def render(self, filename: str, duration: float, block_size: int = 4096) -> float:
+
+        """
+        render the oscillator offline, block by block, in a 16 bit mono WAV file (bounded memory)
+
+        filename: str, path of the WAV file
+        duration: float, duration in sec
+        block_size: int, samples per block
+
+        return: float, peak of the signal before clipping (to adjust the gain)
+        """
+
+        total = int(round(duration * self.sr))
+        peak = 0.0
+
+        with wave.open(filename, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sr)
+
+            written = 0
+            while written < total:
+                n = min(block_size, total - written)
+                block = self.next_block(block_size=n)
+                peak = max(peak, float(np.abs(block).max()))
+                wav.writeframes((np.clip(block, -1, 1) * 32767).astype("<i2").tobytes())
+                written += n
+
+        return peak
+
+
+class AudioBlocks():
+
+    def __init__(self, synth: Synth, block_size: int) -> None:
+
+        """
+        iterator of fixed-size float32 blocks computed by a Synth.
+        The yielded block is an internal buffer reused at each iteration: copy it if you need to keep it.
+        For each block the compute time is measured against the block deadline (block_size/sr) -> see timing
+
+        synth: Synth, oscillator
+        block_size: int, samples per block
+        """
+
+        self.synth = synth
+        self.block_size = block_size
+        self.deadline = block_size/synth.sr
+
+        self.timing = {
+            "block_size": block_size,
+            "deadline": self.deadline, # sec available for each block
+            "blocks": 0, # computed blocks
+            "last": 0.0, # compute time of the last block
+            "max": 0.0, # worst compute time
+            "total": 0.0,
+            "overruns": 0 # blocks computed slower than the deadline (xruns)
+        }
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> np.ndarray:
+
+        start = time.perf_counter()
+        block = self.synth.next_block(block_size=self.block_size)
+        elapsed = time.perf_counter() - start
+
+        timing = self.timing
+        timing["blocks"] += 1
+        timing["last"] = elapsed
+        timing["max"] = max(timing["max"], elapsed)
+        timing["total"] += elapsed
+        if elapsed > self.deadline:
+            timing["overruns"] += 1
+
+        return block
+
+    def stats(self) -> dict:
+
+        """
+        timing snapshot
+
+        return: dict, timing plus mean compute time and load (compute time/deadline, < 1 means real-time safe)
+        """
+
+        blocks = max(self.timing["blocks"], 1)
+        mean = self.timing["total"]/blocks
+        return self.timing | {"mean": mean, "load": mean/self.deadline, "max_load": self.timing["max"]/self.deadline}
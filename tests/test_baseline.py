@@ -0,0 +1,72 @@
+"""
+
+Trajectories of the array engine against the ones of the original per-mass loops (tests/data/baseline.npz)
+
+Regenerate the reference from a checkout of the loop implementation:
+    PYTHONPATH=<checkout> python tests/test_baseline.py tests/data/baseline.npz
+
+"""
+
+import os
+import sys
+import numpy as np
+from msdnet_tools.shapes import Cloth, String, Circle
+from msdnet_tools.hammer import Hammer
+
+DATA = os.path.join(os.path.dirname(__file__), "data", "baseline.npz")
+
+# the loops summed the forces of each mass in another order: rounding differences (~1e-16 per step)
+# grow with the motion, up to ~5e-14 in 300 steps of the hammered string
+TOLERANCE = 1e-13
+
+
+def run(net, n_steps: int, **kwargs) -> np.ndarray:
+    out = []
+    for _ in range(n_steps):
+        motion = net.run_network(**kwargs)
+        out.append([[motion[mass]["x"], motion[mass]["y"], motion[mass]["z"]] for mass in motion])
+    return np.array(out)
+
+
+def scenario() -> dict:
+
+    """
+    cloth with random and one shot external forces, hammered string (shot twice), circle under gravity
+
+    return: dict, name -> steps x masses x 3 positions
+    """
+
+    np.random.seed(0)
+    cloth = Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.1), g=(0, 0.000015, 0), dt=1).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=5)
+    cloth.add_external_force("f", [0.01, 0.02, 0], masses=["l5m3", "l5m3", "l9m9"], mode="rand_shot")
+    cloth.add_external_force("g", [0.0, 0.0001, 0], masses="all", mode="one_shot")
+    a = run(cloth, 300, clip_pos=(0, 1))
+
+    string = String(n_masses=30, origin=(0, 0.3), scale=(1, 0.5), g=(0, 0, 0), dt=1).generate_string_msdnet(m=50, d=0.981, k=30, c=10, r=5, anchored_mass=[1, 30])
+    hammer = Hammer()
+    hammer.create_hammer(shape="sine", mode="one_shot")
+    hammer.add_hammer_path([(f"m{i}", "y") for i in range(5, 20)])
+    hammer.apply_hammer_force(masses=string.masses)
+    b = run(string, 200, clip_pos=(0, 1))
+    string.run_network()
+    hammer.is_shot = True
+    hammer.apply_hammer_force(masses=string.masses)
+    b2 = run(string, 100, clip_pos=(0, 1), acc_is_costant=False)
+
+    circle = Circle(n_masses=30, origin=(0.5, 0.5), scale=(0.5, 0.5), g=(0, 0.00001, 0), dt=1).generate_circle_msdnet(m=50, d=0.981, k=30, c=10, r=5)
+    c = run(circle, 300, clip_pos=(0, 1))
+
+    return {"a": a, "b": b, "b2": b2, "c": c}
+
+
+def test_baseline_trajectories():
+    reference = np.load(DATA)
+    result = scenario()
+    assert sorted(reference.files) == sorted(result)
+    for name, trajectory in result.items():
+        assert trajectory.shape == reference[name].shape
+        assert np.abs(trajectory - reference[name]).max() <= TOLERANCE, name
+
+
+if __name__ == "__main__":
+    np.savez_compressed(sys.argv[1], **scenario())
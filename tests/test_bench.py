@@ -0,0 +1,67 @@
+"""
+
+Benchmarks: compare flags the regressions (rates lower, times and memory higher) and --compare exits with status 1 on them
+
+"""
+
+import json
+import pytest
+from msdnet.bench import compare, main
+
+
+def report(**values) -> dict:
+    better = {"step": "higher", "build": "lower", "memory": "lower"}
+    return {"environment": {}, "results": [{"name": name, "value": value, "unit": "", "better": better[name]} for name, value in values.items()]}
+
+
+def test_compare():
+    previous = report(step=100.0, build=1.0, memory=1000)
+    changes = {
+        change["name"]: change
+        for change in compare(current=report(step=70.0, build=1.2, memory=1400), previous=previous, tolerance=0.25)
+    }
+    assert changes["step"]["regression"] and not changes["build"]["regression"] and changes["memory"]["regression"]
+    assert changes["step"]["change"] == pytest.approx(-0.3) and changes["build"]["change"] == pytest.approx(0.2)
+
+    # improvements are never regressions, whatever the tolerance
+    changes = compare(current=report(step=1000.0, build=0.1, memory=10), previous=previous, tolerance=0.0)
+    assert not any(change["regression"] for change in changes)
+
+    # new benchmarks and zero previous values are skipped
+    changes = compare(current=report(step=1.0, build=1.0), previous=report(step=0.0), tolerance=0.25)
+    assert changes == []
+
+
+def run(tmp_path, previous: dict|None = None):
+    argv = ["--sizes", "10", "--shapes", "string", "--paths", "4", "--min-time", "0.001", "--out", str(tmp_path/"bench.json")]
+    if previous is not None:
+        with open(tmp_path/"previous.json", "w") as f:
+            json.dump(previous, f)
+        argv += ["--compare", str(tmp_path/"previous.json"), "--tolerance", "0.5"]
+    main(argv)
+    with open(tmp_path/"bench.json") as f:
+        return json.load(f)
+
+
+def test_main_compare(tmp_path):
+    current = run(tmp_path)
+    names = [entry["name"] for entry in current["results"]]
+    assert names == ["build/string/10", "memory/string/10", "step/string/10", "scan/4", "hammer/4", "synth/4"]
+    assert all(entry["value"] > 0 for entry in current["results"])
+
+    # a previous run far slower: no regression, status 0
+    def scaled(factor: float) -> dict:
+        results = [entry | {"value": entry["value"] * (factor if entry["better"] == "higher" else 1/factor)} for entry in current["results"]]
+        return current | {"results": results}
+
+    run(tmp_path, previous=scaled(0.01))
+
+    # a previous run far faster: every benchmark regressed, status 1
+    with pytest.raises(SystemExit) as error:
+        run(tmp_path, previous=scaled(100))
+    assert error.value.code == 1
+
+
+def test_invalid_arguments(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["--sizes", "1", "--out", str(tmp_path/"bench.json")])
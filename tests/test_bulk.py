@@ -0,0 +1,76 @@
+"""
+
+add_masses, add_springs and add_dampers build the same network as add_mass, add_spring and add_damper
+
+"""
+
+import numpy as np
+import pytest
+from msdnet import MSDNet
+from msdnet.engine import Engine
+
+
+N = 12
+rng = np.random.default_rng(3)
+POS = np.stack((np.linspace(0.1, 0.9, N), 0.3 + 0.05*rng.random(N), np.zeros(N)), axis=1)
+M, D, R = 1 + rng.random(N), 0.99 - 0.01*rng.random(N), 3 + rng.random(N)
+ANCHORED = np.zeros(N, dtype=bool)
+ANCHORED[[0, -1]] = True
+EDGES = np.array([[i, i + 1] for i in range(N - 1)] + [[i, i + 2] for i in range(N - 2)])
+K, C = 0.5 + rng.random(len(EDGES)), 0.1*rng.random(len(EDGES))
+LENGTH = np.linalg.norm(POS[EDGES[:, 1]] - POS[EDGES[:, 0]], axis=1)
+
+
+def per_item():
+    net = MSDNet()
+    net.add_gravity([0, 0.00001, 0])
+    for i in range(N):
+        net.add_mass(name=f"m{i}", m=M[i], pos=list(POS[i]), d=D[i], r=R[i], anchored=bool(ANCHORED[i]))
+    for i, (a, b) in enumerate(EDGES):
+        net.add_spring(name=f"s{i}", k=K[i], length=LENGTH[i], m1=f"m{a}", m2=f"m{b}")
+    for i in range(len(EDGES)):
+        net.add_damper(name=f"d{i}", c=C[i], spring=f"s{i}")
+    return net
+
+
+def bulk(dampers_on_springs):
+    net = MSDNet()
+    net.add_gravity([0, 0.00001, 0])
+    rows = net.add_masses(positions=POS, m=M, d=D, r=R, anchored=ANCHORED)
+    if dampers_on_springs:
+        net.add_springs(edges=rows[EDGES], k=K, c=C) # length from the start positions
+    else:
+        springs = net.add_springs(edges=rows[EDGES], k=K, length=LENGTH)
+        net.add_dampers(springs=springs, c=C)
+    return net
+
+
+def push(net):
+    net.add_external_force("push", [0.0, 0.001, 0], masses=["m5"], mode="one_shot")
+    return net
+
+
+@pytest.mark.parametrize("dampers_on_springs", [True, False])
+def test_bulk_equals_per_item(dampers_on_springs):
+    a, b = per_item(), bulk(dampers_on_springs)
+
+    assert a.masses.names == b.masses.names and a.springs.names == b.springs.names and a.dampers.names == b.dampers.names
+    assert a.damper_spring == b.damper_spring
+    for name in Engine.mass_arrays + Engine.edge_arrays:
+        assert np.allclose(getattr(a.engine, name), getattr(b.engine, name)), name
+
+    assert np.allclose(push(a).run_steps(n_steps=200), push(b).run_steps(n_steps=200))
+
+
+def test_bulk_components():
+    net = bulk(dampers_on_springs=True)
+    mass, spring = net.masses["m3"], net.springs["s2"]
+    assert np.allclose(mass.pos, POS[3]) and mass.m == M[3] and mass.anchored == ANCHORED[3]
+    assert spring.m1 is net.masses["m2"] and spring.m2 is net.masses["m3"] and spring.k == K[2]
+
+    # per-item components after the bulk ones
+    net.add_mass(name="extra", m=1, pos=[0.5, 0.5, 0], d=0.99, r=3)
+    net.add_spring(name="extra_s", k=1, length=0.2, m1="m6", m2="extra")
+    net.add_damper(name="extra_d", c=0.1, spring="extra_s")
+    assert net.engine.s1[-1] == 6 and net.engine.s2[-1] == N and net.damper_spring[-1] == len(EDGES)
+    assert np.isfinite(net.run_steps(n_steps=50)).all()
@@ -0,0 +1,70 @@
+"""
+
+Collision: broad phase finds every pair in contact, penalty response pushes the masses apart
+
+"""
+
+import numpy as np
+from msdnet.msdn import MSDNet
+from msdnet.collision import Collision
+
+
+def brute_force(pos: np.ndarray, radius: np.ndarray) -> set:
+    dist = np.linalg.norm(pos[:, None] - pos[None], axis=-1)
+    i, j = np.nonzero((dist < radius[:, None] + radius[None]) & (dist > 0))
+    return {(a, b) for a, b in zip(i.tolist(), j.tolist()) if a < b}
+
+
+def test_broad_phase_finds_all_contacts():
+    rng = np.random.default_rng(0)
+    for flat in [True, False]:
+        pos = rng.random((400, 3))
+        if flat:
+            pos[:, 2] = 0
+        radius = rng.uniform(0.01, 0.04, 400)
+        i, j = Collision(k=1, scale=1).pairs(pos=pos, cell=2 * radius.max())
+        candidates = {(min(a, b), max(a, b)) for a, b in zip(i.tolist(), j.tolist())}
+        assert len(candidates) == i.size # each pair once
+        assert brute_force(pos=pos, radius=radius) <= candidates
+
+
+def two_masses(speed: float, connected: bool = False, **kwargs):
+    net = MSDNet()
+    net.add_dt(1.0)
+    net.add_gravity([0, 0, 0])
+    rows = net.add_masses(np.array([[0.4, 0.5], [0.6, 0.5]]), m=np.array([1.0, 3.0]), d=1.0, r=10)
+    if connected:
+        net.add_springs(np.array([[rows[0], rows[1]]]), k=0.0)
+    net.add_collision(scale=1/800, **kwargs)
+    net.compile()
+    net.engine.prev_pos[0, 0] -= speed
+    net.engine.prev_pos[1, 0] += speed
+    return net
+
+
+def test_head_on_bounce():
+    net = two_masses(speed=0.002, k=0.1)
+    momentum = net.engine.m @ (net.engine.pos - net.engine.prev_pos)
+    x = net.run_steps(n_steps=200)[:, :, 0]
+    contact = 2 * 10/800
+
+    assert net.stats()["collision"]["total_contacts"] > 0
+    assert (x[:, 1] - x[:, 0]).min() > 0.5 * contact # the overlap is pushed back
+    u = net.engine.pos - net.engine.prev_pos
+    assert u[1, 0] - u[0, 0] > 0.003 # moving apart (elastic: about the approach speed)
+    assert np.allclose(net.engine.m @ u, momentum, rtol=0, atol=1e-15) # equal and opposite contact forces
+
+
+def test_damping_and_connected_masses():
+    elastic = two_masses(speed=0.002, k=0.1)
+    damped = two_masses(speed=0.002, k=0.1, c=0.2)
+    elastic.run_steps(n_steps=200)
+    damped.run_steps(n_steps=200)
+    energy = lambda net: net.engine.m @ np.sum((net.engine.pos - net.engine.prev_pos)**2, axis=1)
+    assert energy(damped) < 0.9 * energy(elastic)
+
+    # masses joined by a spring go through each other
+    connected = two_masses(speed=0.002, connected=True, k=0.1)
+    x = connected.run_steps(n_steps=200)[:, :, 0]
+    assert connected.stats()["collision"]["total_contacts"] == 0
+    assert x[-1, 0] > x[-1, 1]
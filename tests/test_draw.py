@@ -0,0 +1,53 @@
+"""
+
+Bulk drawing: springs clipped to the canvas, blown up networks drawn without failing, NumPy and numba draw the same pixels
+
+"""
+
+import numpy as np
+import pytest
+from msdnet.draw import draw_network, clip_segments
+from msdnet import kernels
+
+
+def scene(seed: int):
+    rng = np.random.default_rng(seed)
+    n = 500
+    pos = rng.uniform(-200, 1000, (n, 2))
+    pos[:20] *= 1e12
+    pos[20:25] = np.nan
+    pos[25:30, 0] = np.inf
+    pos[30:35] = -1e300
+    s1, s2 = rng.integers(0, n, 1000), rng.integers(0, n, 1000)
+    return pos, rng.choice([2.0, 3.0, 4.4], n), s1, s2
+
+
+def test_clip_segments():
+    start = np.array([[-100.0, 50.0], [10.0, 10.0], [-5.0, -5.0], [np.nan, 0.0], [1e300, 0.0]])
+    end = np.array([[300.0, 50.0], [20.0, 30.0], [-1.0, -9.0], [10.0, 10.0], [-1e300, 0.0]])
+    a, b = clip_segments(start=start, end=end, width=200, height=100)
+    assert np.array_equal(a[:2], [[0.0, 50.0], [10.0, 10.0]])
+    assert np.array_equal(b[:2], [[199.0, 50.0], [20.0, 30.0]])
+
+    # far endpoints: inside the canvas whatever the rounding
+    assert a.shape == (3, 2) and a[2, 1] == 0.0 and b[2, 1] == 0.0
+    assert 0 <= a[2, 0] <= 199 and 0 <= b[2, 0] <= 199
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_far_and_non_finite_positions(seed):
+    pos, radius, s1, s2 = scene(seed=seed)
+    pixels = np.zeros((800, 600), dtype=np.uint32)
+    draw_network(pixels, pos, radius, s1, s2, 1, 2)
+    assert (pixels == 2).any()
+
+
+@pytest.mark.skipif(kernels.njit is None, reason="numba is not installed")
+@pytest.mark.parametrize("seed", range(5))
+def test_numba_draws_the_same_pixels(seed):
+    pos, radius, s1, s2 = scene(seed=seed)
+    expected = np.zeros((800, 600), dtype=np.uint32)
+    result = np.zeros((800, 600), dtype=np.uint32)
+    draw_network(expected, pos, radius, s1, s2, 1, 2)
+    kernels.draw_network(result, pos, radius, s1, s2, 1, 2)
+    assert np.array_equal(result, expected)
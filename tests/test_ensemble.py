@@ -0,0 +1,60 @@
+"""
+
+Ensemble: each member moves like the same network run alone
+
+"""
+
+import numpy as np
+from msdnet import Ensemble
+from msdnet_tools.shapes import String
+from msdnet_tools.hammer import Hammer
+
+
+def string(k: float):
+    return String(n_masses=30, origin=(0, 0.3), scale=(1, 0.5), g=(0, 0.00001, 0), dt=1).generate_string_msdnet(m=50, d=0.981, k=k, c=10, r=5, anchored_mass=[1, 30])
+
+
+def hammer(masses) -> None:
+    hammer = Hammer()
+    hammer.create_hammer(shape="sine", mode="one_shot")
+    hammer.add_hammer_path([(f"m{i}", "y") for i in range(5, 20)])
+    hammer.apply_hammer_force(masses=masses)
+
+
+def test_member_matches_network():
+    stiffness = [10.0, 20.0, 30.0, 40.0]
+    ensemble = Ensemble(network=string(k=stiffness[0]), size=len(stiffness))
+    ensemble.set_param("k", np.array(stiffness))
+    hammer(masses=ensemble.member_masses(2))
+    members = ensemble.run_steps(n_steps=300, clip_pos=(0, 1))
+
+    for member, k in enumerate(stiffness):
+        net = string(k=k)
+        if member == 2:
+            hammer(masses=net.masses)
+        alone = net.run_steps(n_steps=300, clip_pos=(0, 1))
+        assert np.array_equal(members[:, member], alone), member
+
+
+def test_member_mass_under_gravity():
+    def heavy_string(m: float):
+        return String(n_masses=30, origin=(0, 0.3), scale=(1, 0.5), g=(0, 0.00001, 0), dt=1).generate_string_msdnet(m=m, d=0.981, k=30, c=10, r=5, anchored_mass=[1, 30])
+
+    ensemble = Ensemble(network=heavy_string(m=50), size=2)
+    ensemble.set_param("m", [50, 100])
+    members = ensemble.run_steps(n_steps=300, clip_pos=(0, 1))
+
+    for member, m in enumerate([50, 100]):
+        assert np.array_equal(members[:, member], heavy_string(m=m).run_steps(n_steps=300, clip_pos=(0, 1))), member
+
+
+def test_members_own_external_forces():
+    net = string(k=30)
+    net.add_external_force("kick", [0, 0.001, 0], masses=["m10"], mode="rand_shot")
+    ensemble = Ensemble(network=net, size=4)
+    np.random.seed(0)
+    members = ensemble.run_steps(n_steps=2000, clip_pos=(0, 1))
+
+    # independent draws: the members are kicked at different steps
+    assert all(not np.array_equal(members[:, 0], members[:, member]) for member in range(1, 4))
+    assert ensemble.external_forces[0][0]["force"].shape == (4, 1, 3)
@@ -0,0 +1,60 @@
+"""
+
+Implicit integrator: stable with stiff springs where the Verlet step blows up, first order accurate with soft ones
+
+"""
+
+import numpy as np
+import pytest
+from msdnet.msdn import MSDNet
+
+pytest.importorskip("scipy")
+
+
+def string(k: float, dt: float, d: float = 0.999, integrator: str|None = None, **kwargs):
+
+    """
+    30 masses string under tension (springs at 0.8 of their start length), the 10th mass kicked (same speed whatever dt)
+    """
+
+    net = MSDNet()
+    net.add_dt(dt)
+    net.add_gravity([0, 0, 0])
+    n = 30
+    rows = net.add_masses(np.c_[np.linspace(0, 1, n), np.full(n, 0.3)], m=1.0, d=d, r=5, anchored=np.r_[True, np.zeros(n - 2, dtype=bool), True])
+    net.add_springs(np.c_[rows[:-1], rows[1:]], k=k, length=0.8/(n - 1))
+    net.add_external_force("push", [0.0, 1e-3/dt, 0], masses=["m10"], mode="one_shot")
+    if integrator is not None:
+        net.add_integrator(integrator, **kwargs)
+    return net
+
+
+def test_verlet_blows_up():
+    # dt^2·k/m far above the stability limit of the explicit step
+    with np.errstate(all="ignore"):
+        motion = string(k=50, dt=1).run_steps(n_steps=200)
+    assert not (np.isfinite(motion).all() and np.abs(motion).max() < 10)
+
+
+@pytest.mark.parametrize("jacobian", ["constant", "full"])
+def test_implicit_is_stable(jacobian):
+    net = string(k=50, dt=1, integrator="implicit", jacobian=jacobian)
+    y = net.run_steps(n_steps=1000)[:, :, 1] - 0.3
+    assert np.isfinite(y).all()
+    assert 0 < np.abs(y).max() < 0.01
+    assert np.abs(y[-100:]).max() < 0.1 * np.abs(y).max() # the string rings down
+    if jacobian == "constant":
+        assert net.integrator.factorizations == 1 # dt, k, m and the anchored masses never change
+
+
+def test_implicit_converges_to_verlet():
+    # soft springs: the error of backward Euler halves with dt
+    def error(dt: float) -> float:
+        steps = int(round(2/dt))
+        verlet = string(k=0.5, dt=dt, d=1.0).run_steps(n_steps=steps)[:, :, 1]
+        implicit = string(k=0.5, dt=dt, d=1.0, integrator="implicit", jacobian="full").run_steps(n_steps=steps)[:, :, 1]
+        return np.abs(implicit - verlet).max()/np.abs(verlet - 0.3).max()
+
+    coarse, fine = error(dt=0.01), error(dt=0.005)
+    assert coarse < 0.01
+    assert fine < 0.6 * coarse
@@ -0,0 +1,65 @@
+"""
+
+InputSignal: one sample per step on the path, the same as applying the forces by hand before each step
+
+"""
+
+import numpy as np
+import pytest
+from msdnet_tools.shapes import Cloth
+
+
+PATH = [("l5m10", "y"), ("l5m11", "x"), ("l5m12", "y"), ("l5m12", "y")] # repeated element -> forces add up
+GAINS = np.array([1.0, 0.5, -2.0, 0.25])
+
+
+def cloth():
+    return Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.1), g=(0, 0.000015, 0), dt=1).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=5)
+
+
+def by_hand(signal, n_steps):
+    # signal: T x P forces (before the gains), no force after the end of the signal
+    net = cloth()
+    coord = {"x": 0, "y": 1, "z": 2}
+    frames = []
+    for step in range(n_steps):
+        if step < len(signal):
+            for n, (name, c) in enumerate(PATH):
+                force = np.zeros(3)
+                force[coord[c]] = signal[step, n] * GAINS[n]
+                net.masses[name].apply_force(force)
+        net.run_network()
+        frames.append(net.engine.frame.copy())
+    return np.array(frames)
+
+
+def test_mono_signal():
+    signal = 0.01 * np.sin(np.arange(60) * 0.3)
+    net = cloth()
+    net.add_input("mic", signal=signal, path=PATH, gains=GAINS)
+    driven = net.run_steps(n_steps=90) # last 30 steps without samples
+
+    assert np.allclose(driven, by_hand(np.repeat(signal[:, None], len(PATH), axis=1), n_steps=90))
+    assert net.inputs["mic"].steps == 60 and net.inputs["mic"].pending() == 0
+
+
+def test_blocks():
+    # T x P blocks from an iterator and pushed blocks: the samples are consumed in order across the blocks
+    signal = 0.01 * np.random.default_rng(0).standard_normal((70, len(PATH)))
+    net = cloth()
+    net.add_input("stream", signal=iter([signal[:25], signal[25:25], signal[25:40]]), path=PATH, gains=GAINS)
+    first = net.run_steps(n_steps=45)
+    net.inputs["stream"].push(signal[40:70])
+    assert net.inputs["stream"].pending() == 30
+    second = net.run_steps(n_steps=35)
+
+    expected = by_hand(np.concatenate((signal[:40], np.zeros((5, len(PATH))), signal[40:])), n_steps=80)
+    assert np.allclose(np.concatenate((first, second)), expected)
+
+
+def test_invalid_path():
+    net = cloth()
+    with pytest.raises(SystemExit):
+        net.add_input("bad", signal=np.zeros(10), path=[("l5m10", "w")])
+    with pytest.raises(SystemExit):
+        net.add_input("bad", signal=np.zeros(10), path=[("nope", "x")])
@@ -0,0 +1,88 @@
+"""
+
+Explicit integrators: order of accuracy of each method with fixed substeps, adaptive substeps refining the strikes only
+
+"""
+
+import numpy as np
+import pytest
+from msdnet.msdn import MSDNet
+
+
+def string(k: float, tension: bool = True, integrator: str|None = None, **kwargs):
+
+    """
+    30 masses string, dt = 1. tension -> springs at 0.8 of their start length, the 10th mass kicked across the string,
+    else springs at rest and the 10th mass struck along the string at step 50
+    """
+
+    net = MSDNet()
+    net.add_dt(1.0)
+    net.add_gravity([0, 0, 0])
+    n = 30
+    rows = net.add_masses(np.c_[np.linspace(0, 1, n), np.full(n, 0.3)], m=1.0, d=1.0 if tension else 0.99, r=5, anchored=np.r_[True, np.zeros(n - 2, dtype=bool), True])
+    if tension:
+        net.add_springs(np.c_[rows[:-1], rows[1:]], k=k, length=0.8/(n - 1))
+        net.add_external_force("push", [0.0, 1e-3, 0], masses=["m10"], mode="one_shot")
+    else:
+        net.add_springs(np.c_[rows[:-1], rows[1:]], k=k)
+        net.add_input("strike", signal=np.r_[np.zeros(50), 0.02 * np.hanning(6)], path=[("m10", "x")])
+    if integrator is not None:
+        net.add_integrator(integrator, **kwargs)
+    return net
+
+
+def error(motion: np.ndarray, reference: np.ndarray) -> float:
+    return np.abs(motion - reference).max()/np.abs(reference - reference[0]).max()
+
+
+def test_verlet_matches_builtin_step():
+    builtin = string(k=0.5).run_steps(n_steps=100)
+    explicit = string(k=0.5, integrator="verlet", substeps=1).run_steps(n_steps=100)
+    assert np.allclose(builtin, explicit, rtol=0, atol=1e-12)
+
+
+@pytest.fixture(scope="module")
+def reference():
+    return string(k=0.5, integrator="rk4", substeps=32, max_substeps=32).run_steps(n_steps=100)[:, :, 1]
+
+
+@pytest.mark.parametrize("method, order", [("verlet", 1), ("euler", 1), ("velocity_verlet", 2), ("rk4", 4)])
+def test_order(method, order, reference):
+    # error against a fine rk4 run: divided by 2^order when the substeps double
+    errors = [error(string(k=0.5, integrator=method, substeps=n).run_steps(n_steps=100)[:, :, 1], reference) for n in [2, 4, 8]]
+
+    assert errors[0] < 0.25
+    for coarse, fine in zip(errors[:-1], errors[1:]):
+        assert fine < 0.6 * coarse/2**(order - 1)
+
+
+def test_adaptive_substeps():
+    # k·dt^2/m = 2: one substep blows up, the adaptive integrator refines the strike only
+    with np.errstate(all="ignore"):
+        fixed = string(k=2, tension=False, integrator="velocity_verlet", substeps=1).run_steps(n_steps=150)
+    assert not (np.isfinite(fixed).all() and np.abs(fixed).max() < 10)
+
+    reference = string(k=2, tension=False, integrator="rk4", substeps=32, max_substeps=32).run_steps(n_steps=150)[:, :, 0]
+    net = string(k=2, tension=False, integrator="velocity_verlet", max_strain=0.02, max_substeps=16)
+    motion, substeps = [], []
+    for _ in range(150):
+        net.run_network()
+        motion.append(net.engine.frame[:, 0].copy())
+        substeps.append(net.integrator.last)
+    stats = net.integrator.stats()
+
+    assert error(np.array(motion), reference) < 0.1
+    assert substeps[:50] == [1] * 50 # quiet passage at dt
+    assert max(substeps[52:]) > 1 and max(substeps) <= 16
+    assert stats["steps"] == 150 and stats["substeps"] == sum(substeps) and stats["refined"] == sum(n > 1 for n in substeps)
+
+
+def test_invalid_integrator():
+    net = string(k=0.5)
+    with pytest.raises(SystemExit):
+        net.add_integrator("leapfrog")
+    with pytest.raises(SystemExit):
+        net.add_integrator("rk4", substeps=32) # above max_substeps
+    with pytest.raises(SystemExit):
+        net.add_integrator("euler", max_strain=0)
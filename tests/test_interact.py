@@ -0,0 +1,57 @@
+"""
+
+Interact: grid index picking of the masses under the mouse
+
+"""
+
+import numpy as np
+import pytest
+from msdnet.interact import Interact
+from msdnet_tools.shapes import Cloth
+
+
+def cloth():
+    return Cloth(n_masses=30, levels=10, origin=(0.1, 0.2), scale=(0.8, 0.4), g=(0, 1.5e-5, 0), dt=1).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=30)
+
+
+def brute_force(pos: np.ndarray, point: np.ndarray, radius) -> np.ndarray:
+    dist = np.linalg.norm(pos - point, axis=1)
+    return np.flatnonzero(dist < radius), dist
+
+
+def test_pick_nearest():
+    net = cloth()
+    interact = Interact(network=net, canvas_size=(800, 800))
+    pos = net.engine.frame[:, :2] * 800
+    for target in [5, 17, 123, 299]:
+        point = pos[target] + np.array([0.4, -0.3])
+        hits, dist = brute_force(pos=pos, point=point, radius=net.engine.radius)
+        assert hits.size > 1 # large radius: the masses overlap
+        assert interact.pick(point=point).tolist() == [hits[np.argmin(dist[hits])]]
+
+
+def test_grab_radius():
+    net = cloth()
+    interact = Interact(network=net, canvas_size=(800, 800), grab_radius=45)
+    pos = net.engine.frame[:, :2] * 800
+    for point in [pos[40], pos[200] + 7, np.array([400.0, 400.0])]:
+        expected, _ = brute_force(pos=pos, point=point, radius=45)
+        assert sorted(interact.pick(point=point).tolist()) == expected.tolist()
+
+
+def test_follows_the_engine():
+    # recompiled network and far or non finite positions
+    net = cloth()
+    interact = Interact(network=net, canvas_size=(800, 800))
+    net.run_steps(n_steps=10)
+    net.add_spring("extra", 10, 0.1, "l0m0", "l9m29")
+    net.engine.frame[:5] = np.nan
+    net.engine.frame[5:10] = 1e200
+    point = net.engine.frame[20, :2] * 800
+    assert interact.pick(point=point).tolist() == [20]
+
+
+def test_network_must_be_msdnet():
+    net = cloth()
+    with pytest.raises(SystemExit):
+        Interact(network=net.motion, canvas_size=(800, 800))
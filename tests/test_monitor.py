@@ -0,0 +1,76 @@
+"""
+
+Monitor: diverging runs are aborted (or flagged) early, stable runs are not, the trace holds the energy of each check
+
+"""
+
+import numpy as np
+import pytest
+from msdnet.msdn import MSDNet
+
+
+def string(k: float, **kwargs):
+
+    """
+    30 masses string under tension, no damping, the 10th mass kicked. dt = 1: k = 50 blows up, k = 0.5 is stable
+    """
+
+    net = MSDNet()
+    net.add_dt(1.0)
+    net.add_gravity([0, 0, 0])
+    n = 30
+    rows = net.add_masses(np.c_[np.linspace(0, 1, n), np.full(n, 0.3)], m=1.0, d=1.0, r=5, anchored=np.r_[True, np.zeros(n - 2, dtype=bool), True])
+    net.add_springs(np.c_[rows[:-1], rows[1:]], k=k, length=0.8/(n - 1))
+    net.add_external_force("push", [0.0, 1e-3, 0], masses=["m10"], mode="one_shot")
+    monitor = net.add_monitor(**kwargs)
+    return net, monitor
+
+
+def test_abort():
+    net, monitor = string(k=50, every=5)
+    with np.errstate(all="ignore"), pytest.raises(FloatingPointError, match="growth"):
+        net.run_steps(n_steps=400)
+
+    # steady growth over window checks, stopped long before the positions overflow
+    assert monitor.diverged and monitor.reason == "growth" and monitor.step == net.steps == 5 * (monitor.window + 1)
+    assert np.isfinite(net.engine.pos).all()
+
+
+def test_flag():
+    net, monitor = string(k=50, every=5, action="flag")
+    with np.errstate(all="ignore"):
+        net.run_steps(n_steps=400)
+
+    stats = net.stats()["monitor"]
+    assert net.steps == 400 and stats["checks"] == 80
+    assert stats["diverged"] and stats["reason"] == "growth" and stats["step"] == 45 # first divergence kept
+    assert not np.isfinite(monitor.energy()[-1]) and stats["energy"] is None
+
+
+def test_stable():
+    net, monitor = string(k=0.5, every=5)
+    net.run_steps(n_steps=400)
+
+    trace = monitor.trace()
+    assert not monitor.diverged and monitor.reason is None
+    assert np.array_equal(trace[:, 0], np.arange(5, 405, 5))
+    energy = monitor.energy()
+    assert np.allclose(energy, energy[0], rtol=1e-3) # no damping: the kick energy stays
+    assert np.all(trace[:, 1] > 0) and np.all(trace[:, 2] > 0)
+
+
+@pytest.mark.parametrize("kwargs, reason", [({"limit": 1e-4}, "limit"), ({"max_strain": 0.2}, "strain")])
+def test_limits(kwargs, reason):
+    # stable run, energy about 3.5e-4 and strain about 0.25
+    net, monitor = string(k=0.5, every=5, action="flag", **kwargs)
+    net.run_steps(n_steps=50)
+    assert monitor.diverged and monitor.reason == reason and monitor.step == 5
+
+
+def test_remove_and_invalid():
+    net, _ = string(k=0.5)
+    assert net.add_monitor(every=0) is None and net.monitor is None and net.stats()["monitor"] is None
+    with pytest.raises(SystemExit):
+        net.add_monitor(every=10, action="ignore")
+    with pytest.raises(SystemExit):
+        net.add_monitor(every=10, growth=1)
@@ -0,0 +1,44 @@
+"""
+
+numba backend: same trajectories of the NumPy step, bit for bit
+
+"""
+
+import numpy as np
+import pytest
+from msdnet_tools.shapes import Cloth, String
+from msdnet_tools.hammer import Hammer
+
+pytest.importorskip("numba")
+
+
+def cloth(backend: str):
+    net = Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.1), g=(0, 0.000015, 0), dt=1).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=5)
+    net.add_backend(backend)
+    return net
+
+
+def test_run_steps():
+    numpy = cloth(backend="numpy").run_steps(n_steps=300, clip_pos=(0, 1))
+    numba = cloth(backend="numba").run_steps(n_steps=300, clip_pos=(0, 1))
+    assert np.array_equal(numpy, numba)
+
+
+def test_strided_run_steps():
+    # the steps between two recorded ones run in a single compiled call
+    every = cloth(backend="numba").run_steps(n_steps=301, clip_pos=(0, 1))
+    strided = cloth(backend="numba").run_steps(n_steps=301, clip_pos=(0, 1), stride=7)
+    assert np.array_equal(every[::7], strided)
+
+
+def test_hammer():
+    out = []
+    for backend in ["numpy", "numba"]:
+        net = String(n_masses=30, origin=(0, 0.3), scale=(1, 0.5), g=(0, 0, 0), dt=1).generate_string_msdnet(m=50, d=0.981, k=30, c=10, r=5, anchored_mass=[1, 30])
+        net.add_backend(backend)
+        hammer = Hammer()
+        hammer.create_hammer(shape="sine", mode="one_shot")
+        hammer.add_hammer_path([(f"m{i}", "y") for i in range(5, 20)])
+        hammer.apply_hammer_force(masses=net.masses)
+        out.append(net.run_steps(n_steps=200, clip_pos=(0, 1)))
+    assert np.array_equal(out[0], out[1])
@@ -0,0 +1,32 @@
+"""
+
+reorder: renumbered masses follow the same trajectories, compared by name
+
+"""
+
+import numpy as np
+import pytest
+from msdnet_tools.shapes import Cloth
+
+
+def cloth():
+    net = Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.3), g=(0, 1e-5, 0), dt=1).generate_cloth_msdnet(m=50, d=0.99, k=10, c=1, r=5)
+    net.add_external_force("push", [0, 1e-3, 0], masses=["l5m10"], mode="one_shot")
+    return net
+
+
+@pytest.mark.parametrize("method", ["rcm", "morton", "random"])
+def test_reorder_matches_original(method):
+    reference = cloth()
+    names = list(reference.masses)
+    expected = reference.run_steps(n_steps=300, clip_pos=(0, 1), masses=names)
+
+    net = cloth()
+    if method == "random":
+        method = np.random.default_rng(0).permutation(len(names))
+    order = net.reorder(method=method, edges=False) # edges in the original order -> same force sums
+    assert not np.array_equal(order, np.arange(len(names)))
+
+    result = net.run_steps(n_steps=300, clip_pos=(0, 1), masses=names)
+    assert np.abs(result - expected).max() == 0.0
+    assert net.mass_params["l3m5"] == reference.mass_params["l3m5"]
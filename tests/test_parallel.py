@@ -0,0 +1,60 @@
+"""
+
+Parallel islands: same trajectories of the serial step, bit for bit
+
+"""
+
+import numpy as np
+import pytest
+from msdnet.msdn import MSDNet
+
+
+def grid(net, n: int, x: float, tag: str) -> None:
+    xs, ys = np.meshgrid(np.linspace(0, 0.2, n), np.linspace(0, 0.2, n))
+    anchored = np.zeros(n * n, dtype=bool)
+    anchored[:n] = True
+    rows = net.add_masses(np.c_[xs.ravel() + x, ys.ravel() + 0.2, np.zeros(n * n)], m=1.0, d=0.995, r=3, anchored=anchored, names=[f"{tag}{i}" for i in range(n * n)])
+    rows = rows.reshape(n, n)
+    edges = np.r_[np.c_[rows[:, :-1].ravel(), rows[:, 1:].ravel()], np.c_[rows[:-1].ravel(), rows[1:].ravel()]]
+    net.add_springs(edges, k=0.2, c=0.01)
+
+
+def network(backend: str, interleaved: bool):
+
+    """
+    four grids built one after the other (contiguous islands) or two chains with interleaved rows and a grid
+    """
+
+    net = MSDNet()
+    net.add_dt(1.0)
+    net.add_gravity([0, 1e-5, 0])
+    if interleaved:
+        pos = np.random.default_rng(0).random((400, 3))
+        rows = net.add_masses(pos, m=1.0, d=0.99, r=3, anchored=np.r_[True, True, np.zeros(398, dtype=bool)])
+        net.add_springs(np.c_[rows[0:-2:2], rows[2::2]], k=0.1, c=0.01)
+        net.add_springs(np.c_[rows[1:-2:2], rows[3::2]], k=0.1)
+        grid(net, n=10, x=0.5, tag="g")
+    else:
+        for part in range(4):
+            grid(net, n=12, x=0.22 * part, tag=f"g{part}_")
+    net.add_external_force("push", [0, 1e-4, 0], masses=[net.masses.names[-1]], mode="one_shot")
+    net.add_backend(backend)
+    return net
+
+
+@pytest.mark.parametrize("interleaved", [False, True])
+@pytest.mark.parametrize("backend", ["numpy", "numba"])
+def test_parallel_matches_serial(backend, interleaved):
+    if backend == "numba":
+        pytest.importorskip("numba")
+
+    serial = network(backend=backend, interleaved=interleaved)
+    parallel = network(backend=backend, interleaved=interleaved)
+    parallel.add_parallel(workers=4, min_masses=64)
+
+    expected = serial.run_steps(n_steps=300, clip_pos=(0, 1))
+    result = parallel.run_steps(n_steps=300, clip_pos=(0, 1))
+    assert len(parallel.stats()["parallel"]["tasks"]) > 1
+    assert np.array_equal(result, expected)
+    assert np.array_equal(parallel.engine.vel, serial.engine.vel)
+    parallel.add_parallel(enabled=False)
@@ -0,0 +1,64 @@
+"""
+
+Profiler: one call of each phase per step, callback at the end of each step, same motion with and without the profiler
+
+"""
+
+import numpy as np
+import pytest
+from msdnet.kernels import njit
+from msdnet_tools.hammer import StrikeSchedule
+from msdnet_tools.shapes import Cloth
+
+
+def cloth(backend="numpy"):
+    net = Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.1), g=(0, 0.000015, 0), dt=1).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=5)
+    net.add_backend(backend)
+    net.add_external_force("push", [0.0, 0.0001, 0], masses=["l5m3"], mode="one_shot")
+    net.add_schedule(StrikeSchedule(events=[(10, [("l5m10", "y")], "sine", 1.0)]))
+    net.add_recorder(capacity=8)
+    return net
+
+
+def test_phases():
+    expected = cloth().run_steps(n_steps=40)
+
+    net = cloth()
+    steps = []
+    profiler = net.add_profiler(callback=lambda network, step, phases: steps.append((network, step, dict(phases))))
+    motion = net.run_steps(n_steps=40)
+
+    assert np.array_equal(motion, expected)
+    stats = net.stats()["profile"]
+    assert stats["steps"] == 40
+    assert set(stats["phases"]) == {"schedule", "external", "springs", "dampers", "integrate", "record"}
+    assert all(phase["calls"] == 40 for phase in stats["phases"].values())
+    assert np.isclose(sum(phase["share"] for phase in stats["phases"].values()), 1)
+    assert np.isclose(stats["total"], sum(seconds for _, _, phases in steps for seconds in phases.values()))
+
+    assert [step for _, step, _ in steps] == list(range(40)) and all(network is net for network, _, _ in steps)
+    assert all(set(phases) == set(stats["phases"]) for _, _, phases in steps)
+
+    profiler.reset()
+    assert net.stats()["profile"]["steps"] == 0 and not profiler.stats()["phases"]
+
+
+def test_profiler_survives_recompile():
+    net = cloth()
+    net.add_profiler()
+    net.run_steps(n_steps=5)
+    net.add_spring(name="extra", k=1, length=0.1, m1="l0m0", m2="l1m1") # new engine
+    net.run_steps(n_steps=5)
+    assert net.profiler.stats()["phases"]["springs"]["calls"] == 10
+
+    net.add_profiler(enabled=False)
+    assert net.profiler is None and net.engine.profiler is None and net.stats()["profile"] is None
+
+
+@pytest.mark.skipif(njit is None, reason="numba not installed")
+def test_numba_kernel_phase():
+    expected = cloth(backend="numba").run_steps(n_steps=40)
+    net = cloth(backend="numba")
+    net.add_profiler()
+    assert np.array_equal(net.run_steps(n_steps=40), expected)
+    assert net.profiler.stats()["phases"]["kernel"]["calls"] == 40
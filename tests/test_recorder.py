@@ -0,0 +1,58 @@
+"""
+
+Recorder: ring buffer keeps the last capacity steps in order, the file recording keeps them all
+
+"""
+
+import numpy as np
+import pytest
+from msdnet.recorder import Recorder
+from msdnet_tools.shapes import Cloth
+
+
+def cloth():
+    net = Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.1), g=(0, 0.000015, 0), dt=1).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=5)
+    net.add_external_force("push", [0.0, 0.0001, 0], masses=["l5m3"], mode="one_shot")
+    return net
+
+
+@pytest.mark.parametrize("n_steps", [10, 64, 150])
+def test_ring_buffer_wraparound(n_steps):
+    expected = cloth().run_steps(n_steps=n_steps)
+
+    net = cloth()
+    recorder = net.add_recorder(capacity=64, velocities=True)
+    velocities = []
+    for _ in range(n_steps):
+        net.run_network()
+        velocities.append(net.engine.vel.copy())
+
+    assert len(recorder) == min(n_steps, 64)
+    assert np.array_equal(recorder.positions(), expected[-64:])
+    assert np.array_equal(recorder.velocities(), np.array(velocities)[-64:])
+
+
+def test_file_recording(tmp_path):
+    expected = cloth().run_steps(n_steps=100)
+
+    path = str(tmp_path/"run.bin")
+    net = cloth()
+    recorder = net.add_recorder(path=path, chunk=16) # several chunks
+    net.run_steps(n_steps=60)
+    assert np.array_equal(recorder.positions(), expected[:60])
+    net.run_steps(n_steps=40)
+    recorder.close()
+
+    loaded = Recorder.load(path)
+    assert np.array_equal(loaded["positions"], expected)
+    assert loaded["velocities"] is None
+
+
+def test_clear():
+    net = cloth()
+    recorder = net.add_recorder(capacity=8)
+    net.run_steps(n_steps=20)
+    recorder.clear()
+    assert len(recorder) == 0 and recorder.positions().shape == (0, 300, 3)
+    net.run_steps(n_steps=3)
+    assert np.array_equal(recorder.positions()[-1], net.engine.frame)
@@ -0,0 +1,54 @@
+"""
+
+run_steps: the trajectory tensor holds what run_network returns at each recorded step
+
+"""
+
+import numpy as np
+import pytest
+from msdnet_tools.shapes import Cloth
+
+
+def cloth():
+    net = Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.1), g=(0, 0.000015, 0), dt=1).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=5)
+    net.add_external_force("push", [0.0, 0.0001, 0], masses=["l5m3", "l9m9"], mode="one_shot")
+    return net
+
+
+def run_network(net, n_steps: int) -> np.ndarray:
+    out = []
+    for _ in range(n_steps):
+        motion = net.run_network(clip_pos=(0, 1))
+        out.append([[motion[mass]["x"], motion[mass]["y"], motion[mass]["z"]] for mass in motion])
+    return np.array(out)
+
+
+def test_matches_run_network():
+    expected = run_network(cloth(), n_steps=100)
+    result = cloth().run_steps(n_steps=100, clip_pos=(0, 1))
+    assert result.shape == (100, 300, 3)
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("n_steps, stride", [(100, 1), (100, 7), (99, 10), (5, 10)])
+def test_stride_masses_coordinates(n_steps, stride):
+    net = cloth()
+    names = ["l9m9", "l0m0", "l5m3"]
+    rows = net.masses.index(names)
+    expected = run_network(cloth(), n_steps=n_steps)[::stride][:, rows][:, :, [1, 0]]
+
+    out = np.empty((-(-n_steps//stride), 3, 2))
+    result = net.run_steps(n_steps=n_steps, clip_pos=(0, 1), stride=stride, masses=names, coordinates="yx", out=out)
+    assert result is out
+    assert np.array_equal(result, expected)
+    assert net.steps == n_steps
+
+
+def test_bad_arguments():
+    net = cloth()
+    with pytest.raises(SystemExit):
+        net.run_steps(n_steps=10, stride=0)
+    with pytest.raises(SystemExit):
+        net.run_steps(n_steps=10, coordinates="w")
+    with pytest.raises(SystemExit):
+        net.run_steps(n_steps=10, out=np.empty((3, 300, 3)))
@@ -0,0 +1,64 @@
+"""
+
+Scanner: compiled paths read the same values of the per element lookups, the path cache stays bounded
+
+"""
+
+import numpy as np
+from msdnet import Ensemble
+from msdnet_tools.scanner import Scanner
+from msdnet_tools.shapes import String
+
+
+def string():
+    net = String(n_masses=30, origin=(0, 0.3), scale=(1, 0.5), g=(0, 0.00001, 0), dt=1).generate_string_msdnet(m=50, d=0.981, k=30, c=10, r=5, anchored_mass=[1, 30])
+    net.add_external_force("push", [0.0, 0.01, 0], masses=["m10"], mode="one_shot")
+    return net
+
+
+def lookup(net, motion: dict, path: list[tuple]) -> np.ndarray:
+    index = {"x": 0, "y": 1, "z": 2}
+    return np.array([
+        net.masses[mass].start_pos[index[coord]] if net.masses[mass].anchored else motion[mass][coord]
+        for mass, coord in path
+    ])
+
+
+def test_scan_matches_lookup():
+    net = string()
+    scanner = Scanner(masses=net.masses)
+    path = [(f"m{i}", coord) for i in range(30) for coord in "yx"]
+    compiled = scanner.compile_path(path)
+    for _ in range(50):
+        motion = net.run_network(clip_pos=(0, 1))
+        expected = lookup(net=net, motion=motion, path=path)
+        assert np.array_equal(scanner.scan(masses_motion=motion, path=path), expected)
+        assert np.array_equal(scanner.scan(masses_motion=motion, path=compiled), expected)
+        assert np.array_equal(scanner.scan(masses_motion=net.engine.frame.copy(), path=path), expected)
+
+
+def test_scan_ensemble():
+    net = string()
+    ensemble = Ensemble(network=net, size=3)
+    ensemble.set_param("k", [10.0, 20.0, 30.0])
+    path = [(f"m{i}", "y") for i in range(30)]
+    ensemble.run_steps(n_steps=20)
+    scanned = Scanner(masses=net.masses).scan(masses_motion=ensemble, path=path)
+    assert scanned.shape == (3, 30)
+    for member in range(3):
+        assert np.array_equal(scanned[member], Scanner(masses=net.masses).scan(masses_motion=ensemble.frame[member], path=path))
+
+
+def test_path_cache_is_bounded():
+    net = string()
+    net.run_network()
+    scanner = Scanner(masses=net.masses, max_paths=4)
+    paths = [[(f"m{i}", "y"), (f"m{i + 1}", "x")] for i in range(1, 20)]
+    for path in paths:
+        scanner.scan(masses_motion=net.motion, path=path)
+    assert len(scanner.paths) == 4
+    assert list(scanner.paths) == [tuple(path) for path in paths[-4:]]
+
+    # a cached path used again is the most recent one
+    scanner.scan(masses_motion=net.motion, path=paths[-4])
+    assert list(scanner.paths)[-1] == tuple(paths[-4])
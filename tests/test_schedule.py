@@ -0,0 +1,73 @@
+"""
+
+StrikeSchedule: shots land on the scheduled steps (or times), the same as striking by hand before those steps
+
+"""
+
+import numpy as np
+import pytest
+from msdnet_tools.hammer import StrikeSchedule
+from msdnet_tools.hammer.hammer import shot_shape, strike
+from msdnet_tools.scanner import ScanPath
+from msdnet_tools.shapes import Cloth
+
+
+PATH = [(f"l5m{i}", "y") for i in range(5, 15)]
+
+
+def cloth(dt=1):
+    return Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.1), g=(0, 0.000015, 0), dt=dt).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=5)
+
+
+def by_hand(net, shots, n_steps):
+    # shots: {step: [(path, shape, gain), ...]}
+    frames = []
+    for step in range(n_steps):
+        for path, shape, gain in shots.get(step, []):
+            strike(masses=net.masses, path=ScanPath(path=path), amplitude=shot_shape(shape, len(path)), gain=gain)
+        net.run_network()
+        frames.append(net.engine.frame.copy())
+    return np.array(frames)
+
+
+def test_shots_at_steps():
+    net = cloth()
+    net.add_schedule(StrikeSchedule(events=[(80, PATH, "sinc", 0.5), (20, PATH, "sine", 1.0), (20, PATH[:3], "sine", 2.0)]))
+    scheduled = net.run_steps(n_steps=120)
+
+    expected = by_hand(cloth(), {20: [(PATH, "sine", 1.0), (PATH[:3], "sine", 2.0)], 80: [(PATH, "sinc", 0.5)]}, n_steps=120)
+    assert np.allclose(scheduled, expected)
+
+    # nothing happens before the first shot (frame t is the position before the update of step t, see Engine)
+    free = cloth().run_steps(n_steps=22)
+    assert np.array_equal(scheduled[:21], free[:21])
+    assert not np.allclose(scheduled[21], free[21])
+
+
+@pytest.mark.parametrize("dt", [1, 0.5])
+def test_shots_at_times(dt):
+    net = cloth(dt=dt)
+    net.add_schedule(StrikeSchedule(events=[(10, PATH, "sine", 1.0), (25.2, PATH, "sinc", 1.0)], unit="time"))
+    scheduled = net.run_steps(n_steps=80)
+
+    steps = [round(10/dt), round(25.2/dt)]
+    expected = by_hand(cloth(dt=dt), {steps[0]: [(PATH, "sine", 1.0)], steps[1]: [(PATH, "sinc", 1.0)]}, n_steps=80)
+    assert np.allclose(scheduled, expected)
+
+
+def test_schedule_across_calls():
+    # the step count goes on between calls: a shot inside the second call lands there
+    net = cloth()
+    net.add_schedule(StrikeSchedule(events=[(30, PATH, "sine", 1.0)]))
+    first = net.run_steps(n_steps=25)
+    second = net.run_steps(n_steps=25)
+
+    expected = by_hand(cloth(), {30: [(PATH, "sine", 1.0)]}, n_steps=50)
+    assert np.allclose(np.concatenate((first, second)), expected)
+
+
+def test_invalid_event():
+    with pytest.raises(SystemExit):
+        StrikeSchedule(events=[(10, PATH, "square", 1.0)])
+    with pytest.raises(SystemExit):
+        StrikeSchedule(unit="sample")
@@ -0,0 +1,106 @@
+"""
+
+Sleep: settled islands fall asleep, their springs and dampers are skipped, forces and contacts wake them
+
+"""
+
+import numpy as np
+import pytest
+import msdnet.engine
+from msdnet.msdn import MSDNet
+from msdnet.kernels import njit
+
+BACKENDS = ["numpy", pytest.param("numba", marks=pytest.mark.skipif(njit is None, reason="numba is not installed"))]
+
+
+def strings(backend: str, gap: float = 0.3):
+
+    """
+    two strings at rest (anchored at both ends, no gravity), gap apart
+    """
+
+    net = MSDNet()
+    net.add_dt(1.0)
+    net.add_gravity([0, 0, 0])
+    n = 50
+    for part in range(2):
+        rows = net.add_masses(
+            np.c_[np.linspace(0.1, 0.9, n), np.full(n, 0.3 + gap * part), np.zeros(n)], m=1.0, d=0.98, r=3,
+            anchored=np.r_[True, np.zeros(n - 2, dtype=bool), True], names=[f"p{part}m{i}" for i in range(n)]
+        )
+        net.add_springs(np.c_[rows[:-1], rows[1:]], k=0.3, c=0.01)
+    net.add_backend(backend)
+    return net
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sleep_and_wake_on_force(backend):
+    net = strings(backend=backend)
+    sleep = net.add_sleep(speed=1e-6, force=1e-7, steps=60)
+    net.run_steps(n_steps=100)
+    assert net.stats()["sleep"]["asleep"] == 2
+
+    # a force on one string wakes its island only
+    net.masses["p0m25"].apply_force([0, 1e-3, 0])
+    net.run_steps(n_steps=1)
+    assert sleep.asleep.tolist() == [False, True]
+    assert sleep.springs.size == 49 and sleep.dampers.size == 49
+    assert net.engine.pos[25, 1] != 0.3
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_sleeping_edges_are_skipped(backend, monkeypatch):
+    net = strings(backend=backend)
+    net.add_sleep(speed=1e-6, force=1e-7, steps=60)
+    net.run_steps(n_steps=100)
+    net.masses["p0m25"].apply_force([0, 1e-3, 0])
+
+    # springs of the forces evaluated by the step
+    evaluated = []
+    if backend == "numba":
+        kernel = msdnet.engine.verlet_step
+        def spy(*args):
+            evaluated.append(args[9].size)
+            return kernel(*args)
+        monkeypatch.setattr(msdnet.engine, "verlet_step", spy)
+    else:
+        spring_forces = msdnet.engine.Engine.spring_forces
+        def spy(self, pos=None, edges=None):
+            evaluated.append(self.s1.size if edges is None else edges.size)
+            return spring_forces(self, pos=pos, edges=edges)
+        monkeypatch.setattr(msdnet.engine.Engine, "spring_forces", spy)
+
+    net.run_steps(n_steps=10)
+    assert evaluated == [49] * 10
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_acc_is_costant(backend):
+    # a constant force on an anchored mass does not keep the islands awake, a change of it wakes its island
+    net = strings(backend=backend)
+    sleep = net.add_sleep(speed=1e-6, force=1e-7, steps=60)
+    net.engine.acc[0, 1] = 1e-5
+    for _ in range(100):
+        net.run_network(acc_is_costant=True)
+    assert sleep.asleep.all() and sleep.total["wakes"] == 0
+
+    net.engine.acc[0, 1] = 2e-5
+    net.run_network(acc_is_costant=True)
+    assert sleep.asleep.tolist() == [False, True]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_wake_on_contact(backend):
+    net = strings(backend=backend, gap=0.004)
+    sleep = net.add_sleep(speed=1e-6, force=1e-7, steps=60)
+    net.add_collision(k=0.01, scale=1/800)
+    net.run_steps(n_steps=3000)
+    assert sleep.asleep.all()
+
+    # the first string is pushed into the sleeping second one
+    sleep.wake(rows=np.arange(50))
+    net.engine.prev_pos[25, 1] -= 0.002
+    start = net.engine.pos[75].copy()
+    net.run_steps(n_steps=10)
+    assert not sleep.asleep.any()
+    assert not np.array_equal(net.engine.pos[75], start)
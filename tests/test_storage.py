@@ -0,0 +1,51 @@
+"""
+
+save/load: the loaded network has the same arrays and goes on with the same trajectory, bit for bit
+
+"""
+
+import numpy as np
+import pytest
+from msdnet.msdn import MSDNet
+from msdnet.engine import Engine
+from msdnet_tools.shapes import Cloth
+from msdnet_tools.hammer import StrikeSchedule
+
+
+@pytest.mark.parametrize("compressed, mmap_mode", [(False, None), (True, None), (False, "c")])
+def test_round_trip(tmp_path, compressed, mmap_mode):
+    net = Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.1), g=(0, 0.000015, 0), dt=1).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=5)
+    net.add_external_force("push", [0.0, 0.0001, 0], masses=["l5m3", "l9m9"], mode="one_shot")
+    net.run_steps(n_steps=50, clip_pos=(0, 1))
+
+    path = str(tmp_path/"net.npz")
+    net.save(path, compressed=compressed)
+    loaded = MSDNet.load(path, mmap_mode=mmap_mode)
+
+    for name in Engine.mass_arrays + Engine.edge_arrays:
+        assert np.array_equal(getattr(net.engine, name), getattr(loaded.engine, name)), name
+    assert loaded.engine.names == net.engine.names
+    assert loaded.damper_spring == net.damper_spring
+
+    expected = net.run_steps(n_steps=200, clip_pos=(0, 1))
+    assert np.array_equal(loaded.run_steps(n_steps=200, clip_pos=(0, 1)), expected)
+
+
+def test_schedule_resumes(tmp_path):
+    def strikes():
+        path = [(f"l5m{i}", "y") for i in range(5, 15)]
+        return StrikeSchedule(events=[(20, path, "sine", 1.0), (80, path, "sinc", 0.5), (150, path[:3], "sine", 2.0)])
+
+    net = Cloth(n_masses=30, levels=10, origin=(0, 0.3), scale=(1, 0.1), g=(0, 0.000015, 0), dt=1).generate_cloth_msdnet(m=50, d=0.981, k=10, c=10, r=5)
+    net.add_schedule(strikes())
+    net.run_steps(n_steps=50, clip_pos=(0, 1))
+
+    path = str(tmp_path/"net.npz")
+    net.save(path)
+    loaded = MSDNet.load(path)
+    assert loaded.steps == net.steps == 50
+    loaded.add_schedule(strikes())
+
+    # the shots at steps 80 and 150 land at the same steps (the one at 20 is not repeated)
+    expected = net.run_steps(n_steps=200, clip_pos=(0, 1))
+    assert np.array_equal(loaded.run_steps(n_steps=200, clip_pos=(0, 1)), expected)
@@ -0,0 +1,70 @@
+"""
+
+WaveTable: audio-rate reading of scanned frames, interpolated along the path and in time between frames
+
+"""
+
+import numpy as np
+import pytest
+from msdnet_tools.scanner import Scanner
+from msdnet_tools.shapes import String
+
+
+@pytest.fixture
+def scanner():
+    net = String(n_masses=8, origin=(0, 0.3), scale=(1, 0.5), g=(0, 0, 0), dt=1).generate_string_msdnet(m=50, d=0.981, k=30, c=10, r=5, anchored_mass=[])
+    net.compile()
+    return Scanner(masses=net.masses)
+
+
+def frames(n: int) -> list[np.ndarray]:
+    # frame f: y of mass i = f + i/10 (linear in time and along the path)
+    return [np.c_[np.zeros(8), f + np.arange(8)/10, np.zeros(8)] for f in range(n)]
+
+
+PATH = [(f"m{i}", "y") for i in range(8)]
+
+
+def test_none_holds_the_last_frame(scanner):
+    table = scanner.wavetable(path=PATH, interp="none")
+    for frame in frames(3):
+        table.push(frame)
+    assert table.latency == 0
+    assert np.array_equal(table.read(phase=np.arange(8.0), t=np.full(8, 0.7)), frames(3)[-1][:, 1])
+
+
+@pytest.mark.parametrize("interp, latency", [("linear", 1), ("cubic", 2)])
+def test_time_interpolation(scanner, interp, latency):
+    table = scanner.wavetable(path=PATH, interp=interp)
+    for frame in frames(5):
+        table.push(frame)
+    assert table.latency == latency
+
+    # frames are linear in time: both interpolations give the frame latency steps back plus t
+    t = np.linspace(0, 0.99, 8)
+    expected = 4 - latency + t + np.arange(8)/10
+    assert np.allclose(table.read(phase=np.arange(8.0), t=t), expected, rtol=0, atol=1e-12)
+
+
+def test_phase_interpolation_is_cyclic(scanner):
+    table = scanner.wavetable(path=PATH, interp="linear")
+    table.push(frames(1)[0])
+    phase = np.array([0.0, 0.5, 3.25, 7.5])
+    y = table.read(phase=phase, t=np.zeros(4))
+    assert np.allclose(y, [0.0, 0.05, 0.325, (0.7 + 0.0)/2], rtol=0, atol=1e-15)
+
+
+def test_first_frame_is_held(scanner):
+    # no history yet: every frame of the table is the first one
+    table = scanner.wavetable(path=PATH, interp="cubic")
+    table.push(frames(3)[2])
+    out = np.empty(8)
+    table.read(phase=np.arange(8.0), t=np.full(8, 0.3), out=out)
+    assert np.allclose(out, frames(3)[2][:, 1], rtol=0, atol=1e-15)
+
+
+def test_displacement(scanner):
+    table = scanner.wavetable(path=PATH, interp="none", displacement=True)
+    frame = frames(2)[1]
+    table.push(frame)
+    assert np.array_equal(table.table[-1], frame[:, 1] - table.path.start)